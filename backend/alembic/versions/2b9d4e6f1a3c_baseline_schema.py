@@ -0,0 +1,190 @@
+"""Baseline schema
+
+Revision ID: 2b9d4e6f1a3c
+Revises:
+Create Date: 2026-10-16 09:00:00.000000
+
+The tables as the app used to create them with Base.metadata.create_all on
+startup. Databases created that way already have them: mark them with
+`alembic stamp 2b9d4e6f1a3c`, then `alembic upgrade head`.
+
+Tables and indexes added by later revisions are not part of the baseline.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2b9d4e6f1a3c"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Enum columns store member names
+user_role = sa.Enum("CUSTOMER", "CLUB_OWNER", "BARTENDER", "ADMIN", name="userrole")
+payment_method = sa.Enum("CARD", "CASH", name="paymentmethod")
+order_status = sa.Enum(
+    "PENDING_PAYMENT", "PAID", "PREPARING", "READY", "COMPLETED", "CANCELLED",
+    name="orderstatus",
+)
+
+
+def _timestamps() -> list:
+    return [
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("role", user_role, nullable=False),
+        sa.Column("full_name", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("stripe_account_id", sa.String(), nullable=True),
+        sa.Column("stripe_account_status", sa.String(), nullable=True),
+        sa.Column("stripe_charges_enabled", sa.Boolean(), nullable=True),
+        sa.Column("stripe_payouts_enabled", sa.Boolean(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_phone", "users", ["phone"], unique=True)
+    op.create_index("ix_users_stripe_account_id", "users", ["stripe_account_id"], unique=True)
+
+    op.create_table(
+        "clubs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("owner_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("address", sa.String(), nullable=True),
+        sa.Column("city", sa.String(), nullable=True),
+        sa.Column("formatted_address", sa.String(), nullable=True),
+        sa.Column("latitude", sa.Numeric(10, 7), nullable=True),
+        sa.Column("longitude", sa.Numeric(10, 7), nullable=True),
+        sa.Column("place_id", sa.String(), nullable=True),
+        sa.Column("logo_url", sa.String(), nullable=True),
+        sa.Column("logo_settings", sa.JSON(), nullable=True),
+        sa.Column("cover_image_url", sa.String(), nullable=True),
+        sa.Column("stripe_account_id", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_clubs_name", "clubs", ["name"])
+
+    op.create_table(
+        "bartenders",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("club_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["club_id"], ["clubs.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "drinks",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("club_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("price", sa.Numeric(10, 2), nullable=False),
+        sa.Column("category", sa.String(), nullable=True),
+        sa.Column("image_url", sa.String(), nullable=True),
+        sa.Column("brand_name", sa.String(), nullable=True),
+        sa.Column("brand_colors", sa.JSON(), nullable=True),
+        sa.Column("brand_fonts", sa.JSON(), nullable=True),
+        sa.Column("is_available", sa.Boolean(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["club_id"], ["clubs.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_drinks_name", "drinks", ["name"])
+
+    op.create_table(
+        "drink_lists",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_drink_lists_name", "drink_lists", ["name"])
+
+    op.create_table(
+        "club_drink_lists",
+        sa.Column("club_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("drink_list_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(["club_id"], ["clubs.id"]),
+        sa.ForeignKeyConstraint(["drink_list_id"], ["drink_lists.id"]),
+        sa.PrimaryKeyConstraint("club_id", "drink_list_id"),
+    )
+
+    op.create_table(
+        "drink_list_drinks",
+        sa.Column("drink_list_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("drink_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(["drink_id"], ["drinks.id"]),
+        sa.ForeignKeyConstraint(["drink_list_id"], ["drink_lists.id"]),
+        sa.PrimaryKeyConstraint("drink_list_id", "drink_id"),
+    )
+
+    op.create_table(
+        "orders",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("customer_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("club_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("total_amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("payment_method", payment_method, nullable=False),
+        sa.Column("status", order_status, nullable=False),
+        sa.Column("payment_intent_id", sa.String(), nullable=True),
+        sa.Column("qr_code", sa.String(), nullable=True),
+        *_timestamps(),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["club_id"], ["clubs.id"]),
+        sa.ForeignKeyConstraint(["customer_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_orders_payment_intent_id", "orders", ["payment_intent_id"], unique=True)
+    op.create_index("ix_orders_qr_code", "orders", ["qr_code"], unique=True)
+
+    op.create_table(
+        "order_items",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("order_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("drink_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("quantity", sa.Numeric(10, 0), nullable=False),
+        sa.Column("price_at_purchase", sa.Numeric(10, 2), nullable=False),
+        sa.ForeignKeyConstraint(["drink_id"], ["drinks.id"]),
+        sa.ForeignKeyConstraint(["order_id"], ["orders.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("order_items")
+    op.drop_table("orders")
+    op.drop_table("drink_list_drinks")
+    op.drop_table("club_drink_lists")
+    op.drop_table("drink_lists")
+    op.drop_table("drinks")
+    op.drop_table("bartenders")
+    op.drop_table("clubs")
+    op.drop_table("users")
+    order_status.drop(op.get_bind(), checkfirst=True)
+    payment_method.drop(op.get_bind(), checkfirst=True)
+    user_role.drop(op.get_bind(), checkfirst=True)
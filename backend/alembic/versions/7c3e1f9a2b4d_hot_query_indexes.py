@@ -0,0 +1,75 @@
+"""Indexes for the hot order, drink and bartender queries
+
+Revision ID: 7c3e1f9a2b4d
+Revises: 4e1a7b3c9d2f
+Create Date: 2026-10-16 10:00:00.000000
+
+Indexes are built with CREATE INDEX CONCURRENTLY so that live tables stay
+writable while they build. CONCURRENTLY cannot run in a transaction, hence
+the autocommit block. A concurrent build that fails leaves an INVALID index
+behind; it is dropped and rebuilt when the migration is re-run.
+
+The same indexes are declared on the models.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c3e1f9a2b4d"
+down_revision: Union[str, None] = "4e1a7b3c9d2f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Enum columns store member names
+ACTIVE_ORDER_STATUSES = "status IN ('PENDING_PAYMENT', 'PAID', 'PREPARING', 'READY')"
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ("ix_orders_club_id_status_created_at", "orders", ["club_id", "status", "created_at"], None),
+    ("ix_orders_club_id_created_at_active", "orders", ["club_id", "created_at"], ACTIVE_ORDER_STATUSES),
+    ("ix_orders_club_id_changed_at", "orders", ["club_id", sa.text("coalesce(updated_at, created_at)")], None),
+    (
+        "ix_orders_customer_id_created_at_id",
+        "orders",
+        ["customer_id", sa.text("created_at DESC"), sa.text("id DESC")],
+        None,
+    ),
+    ("ix_order_items_order_id", "order_items", ["order_id"], None),
+    ("ix_drinks_club_id_is_available", "drinks", ["club_id", "is_available"], None),
+    ("ix_bartenders_user_id_is_active", "bartenders", ["user_id", "is_active"], None),
+]
+
+
+def _drop_if_invalid(name: str) -> None:
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ),
+        {"name": name},
+    ).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            _drop_if_invalid(name)
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
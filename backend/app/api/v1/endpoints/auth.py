@@ -3,11 +3,34 @@ from sqlalchemy.orm import Session
 from app.db.base import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, Token, UserResponse
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.config import settings
+from app.core.security import create_access_token, password_needs_rehash
+from app.core.password_hasher import password_hasher, PasswordHasherBusy
 
 router = APIRouter()
 
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins right now, please try again shortly",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
+def _upgrade_password_hash(db: Session, user_id, password: str, old_hash: str) -> None:
+    """Rehash with the configured work factor, unless the password changed meanwhile."""
+    try:
+        new_hash = password_hasher.hash(password)
+    except PasswordHasherBusy:
+        return  # Next login will try again
+    db.query(User).filter(
+        User.id == user_id,
+        User.hashed_password == old_hash,
+    ).update({User.hashed_password: new_hash}, synchronize_session=False)
+    db.commit()
+
+
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
 def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user (customer or club_owner)."""
@@ -19,8 +42,14 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
             detail="Email already registered",
         )
     
+    # Don't hold a database connection while bcrypt runs
+    db.rollback()
+    
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = password_hasher.hash(user_data.password)
+    except PasswordHasherBusy:
+        raise _hashing_busy()
     db_user = User(
         email=user_data.email,
         phone=user_data.phone,
@@ -59,23 +88,18 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
     """Login user and return JWT token."""
     user = db.query(User).filter(User.email == credentials.email).first()
     
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Inactive user",
-        )
-    
-    # Create access token
-    access_token = create_access_token(data={"sub": str(user.id)})
-    
-    # Convert UUID to string for response
+    # Read what the response needs, then give the connection back to the
+    # pool while bcrypt runs
+    user_id = user.id
+    hashed_password = user.hashed_password
+    is_active = user.is_active
     user_dict = {
         "id": str(user.id),
         "email": user.email,
@@ -85,10 +109,34 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
         "is_active": user.is_active,
         "created_at": user.created_at,
     }
+    db.rollback()
+    
+    try:
+        password_ok = password_hasher.verify(credentials.password, hashed_password)
+    except PasswordHasherBusy:
+        raise _hashing_busy()
+    
+    if not password_ok:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user",
+        )
+    
+    if password_needs_rehash(hashed_password):
+        _upgrade_password_hash(db, user_id, credentials.password, hashed_password)
+    
+    # Create access token
+    access_token = create_access_token(data={"sub": str(user_id)})
     
     return Token(
         access_token=access_token,
         token_type="bearer",
         user=UserResponse.model_validate(user_dict),
     )
-
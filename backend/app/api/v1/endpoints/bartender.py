@@ -1,190 +1,379 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
-from app.db.base import get_db
-from app.models.user import User
-from app.models.club import Club
-from app.models.drink import Drink
-from app.models.order import Order, OrderItem, OrderStatus, PaymentMethod
-from app.models.bartender import Bartender
-from app.schemas.order import OrderResponse, OrderItemResponse, OrderStatusUpdate, QRScanRequest
-from app.core.dependencies import get_current_bartender
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from app.db.base import get_db, SessionLocal
+from app.models.order import Order, OrderStatus, PaymentMethod
+from app.schemas.order import (
+    OrderResponse,
+    OrderStatusUpdate,
+    QRScanRequest,
+    OrderFeedChanges,
+    OrderTombstone,
+    OrderStatusBatchRequest,
+    OrderStatusBatchResult,
+    OrderStatusBatchResponse,
+    OfflineSnapshot,
+    OfflineSyncRequest,
+    OfflineSyncResponse,
+)
+from app.core.config import settings
+from app.core.cursor import encode_cursor, decode_cursor
+from app.core.dependencies import Principal, get_current_bartender, load_principal
+from app.core.security import decode_access_token
+from app.core.qr_service import verify_qr_token, validate_qr_code, verify_snapshot_signature
+from app.core.offline_sync import build_snapshot, apply_offline_operations, snapshot_too_old
+from app.core.order_serialization import with_order_details, order_to_response, orders_to_responses
+from app.core.order_state_machine import (
+    BARTENDER_TRANSITIONS,
+    PAYMENT_TRANSITIONS,
+    sources_for,
+    transition_orders,
+    rows_to_responses,
+)
+from app.core.order_events import (
+    order_event_broker,
+    publish_order_event,
+    ORDER_PAID,
+    publish_orders_event,
+    ORDER_STATUS_CHANGED,
+    ORDERS_STATUS_CHANGED,
+    RESYNC,
+)
+from app.core.query_budget import query_budget
 
 router = APIRouter()
 
+# Idle live connections get a ping this often so proxies keep them open
+LIVE_PING_INTERVAL_SECONDS = 25
 
-@router.get("/orders", response_model=List[OrderResponse])
-def get_bartender_orders(
-    status_filter: OrderStatus = None,
-    current_user: User = Depends(get_current_bartender),
-    db: Session = Depends(get_db)
+MAX_STATUS_BATCH_SIZE = 100
+MAX_OFFLINE_SYNC_SIZE = 500
+
+
+# Changes are re-sent from slightly before the cursor: updated_at is the
+# transaction start time, so a slow commit can land just behind a later one
+FEED_OVERLAP = timedelta(seconds=5)
+
+
+def _order_changed_at():
+    """SQL expression for when an order last changed (new orders have no updated_at)."""
+    return func.coalesce(Order.updated_at, Order.created_at)
+
+
+def _ready_cutoff(now: datetime) -> datetime:
+    """READY orders unchanged since before this moment are aged out of the hot feed."""
+    return now - timedelta(minutes=settings.BARTENDER_READY_ORDER_TTL_MINUTES)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _is_in_hot_feed(order: Order, ready_cutoff: datetime) -> bool:
+    """Python mirror of the hot feed filter used by _active_orders_query."""
+    if order.status in (OrderStatus.PAID, OrderStatus.PREPARING):
+        return True
+    if order.status == OrderStatus.READY:
+        return _as_utc(order.updated_at or order.created_at) >= ready_cutoff
+    return order.status == OrderStatus.PENDING_PAYMENT and order.payment_method == PaymentMethod.CASH
+
+
+def _active_orders_query(
+    db: Session,
+    club_id,
+    status_filter: Optional[OrderStatus] = None,
+    now: Optional[datetime] = None,
 ):
-    """Get orders for the bartender's club."""
-    # Get bartender's club
-    bartender = db.query(Bartender).filter(
-        Bartender.user_id == current_user.id,
-        Bartender.is_active == True
-    ).first()
-    
-    if not bartender:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Bartender profile not found",
-        )
-    
-    # Query orders for this club
-    query = db.query(Order).filter(Order.club_id == bartender.club_id)
+    """
+    Orders shown on the bar screen: paid, preparing, ready and pending cash payments.
     
+    READY orders nobody has touched for BARTENDER_READY_ORDER_TTL_MINUTES are
+    left out; they are still available with an explicit status_filter.
+    """
+    query = db.query(Order).filter(Order.club_id == club_id)
+
     if status_filter:
         query = query.filter(Order.status == status_filter)
     else:
-        # Default: show paid, preparing, ready orders, and pending cash payments
+        ready_cutoff = _ready_cutoff(now or datetime.now(timezone.utc))
         query = query.filter(
             (Order.status.in_([
                 OrderStatus.PAID,
                 OrderStatus.PREPARING,
-                OrderStatus.READY
             ])) |
+            ((Order.status == OrderStatus.READY) & (_order_changed_at() >= ready_cutoff)) |
             ((Order.status == OrderStatus.PENDING_PAYMENT) & (Order.payment_method == PaymentMethod.CASH))
         )
+
+    return with_order_details(query).order_by(Order.created_at.asc())
+
+
+@router.get("/orders", response_model=List[OrderResponse])
+@query_budget(3)
+def get_bartender_orders(
+    status_filter: OrderStatus = None,
+    principal: Principal = Depends(get_current_bartender),
+    db: Session = Depends(get_db)
+):
+    """Get orders for the bartender's club."""
+    # Query orders for this club
+    orders = _active_orders_query(db, principal.club_id, status_filter).all()
     
-    orders = query.order_by(Order.created_at.asc()).all()
+    return orders_to_responses(orders)
+
+
+@router.get("/orders/changes", response_model=OrderFeedChanges)
+@query_budget(3)
+def get_bartender_order_changes(
+    cursor: Optional[str] = None,
+    principal: Principal = Depends(get_current_bartender),
+    db: Session = Depends(get_db)
+):
+    """
+    Incremental order feed for the bartender's club.
+    
+    Without a cursor, returns the whole active queue (`full=true`). With the
+    cursor from the previous response, returns only orders created or changed
+    since then, plus tombstones for orders that left the queue (completed,
+    cancelled, or READY orders that aged out). Clients upsert `orders` by ID,
+    drop `removed`, and pass `cursor` on the next call.
+    """
+    now = datetime.now(timezone.utc)
+    ready_cutoff = _ready_cutoff(now)
+    
+    if cursor is None:
+        orders = _active_orders_query(db, principal.club_id, now=now).all()
+        changed_since = max((_as_utc(o.updated_at or o.created_at) for o in orders), default=now)
+        return OrderFeedChanges(
+            orders=orders_to_responses(orders),
+            removed=[],
+            cursor=encode_cursor({
+                "c": str(principal.club_id),
+                "t": changed_since.isoformat(),
+                "a": ready_cutoff.isoformat(),
+            }),
+            full=True,
+        )
     
-    # Format response with drink names - convert UUIDs to strings explicitly
-    result = []
+    try:
+        state = decode_cursor(cursor)
+        if state["c"] != str(principal.club_id):
+            raise ValueError("Cursor belongs to another club")
+        changed_since = _as_utc(datetime.fromisoformat(state["t"]))
+        previous_cutoff = _as_utc(datetime.fromisoformat(state["a"]))
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    
+    changed_at = _order_changed_at()
+    orders = with_order_details(db.query(Order).filter(
+        Order.club_id == principal.club_id,
+        or_(
+            changed_at >= changed_since - FEED_OVERLAP,
+            # READY orders that aged out of the hot feed since the previous sync
+            (Order.status == OrderStatus.READY)
+            & (changed_at >= previous_cutoff)
+            & (changed_at < ready_cutoff),
+        ),
+    )).order_by(Order.created_at.asc()).all()
+    
+    upserts = []
+    removed = []
     for order in orders:
-        order_dict = {
-            'id': str(order.id),
-            'customer_id': str(order.customer_id),
-            'club_id': str(order.club_id),
-            'total_amount': order.total_amount,
-            'payment_method': order.payment_method,
-            'status': order.status,
-            'qr_code': order.qr_code,
-            'payment_intent_id': order.payment_intent_id,
-            'created_at': order.created_at,
-            'updated_at': order.updated_at,
-            'completed_at': order.completed_at,
-        }
-        
-        items = []
-        for item in order.items:
-            drink = db.query(Drink).filter(Drink.id == item.drink_id).first()
-            item_dict = {
-                'id': str(item.id),
-                'drink_id': str(item.drink_id),
-                'quantity': item.quantity,
-                'price_at_purchase': item.price_at_purchase,
-                'drink_name': drink.name if drink else None,
-            }
-            items.append(item_dict)
-        
-        order_dict["items"] = items
-        order_dict["club_name"] = order.club.name if order.club else None
-        result.append(OrderResponse(**order_dict))
-    
-    return result
+        if _is_in_hot_feed(order, ready_cutoff):
+            upserts.append(order)
+        else:
+            removed.append(OrderTombstone(id=str(order.id), status=order.status))
+        changed_since = max(changed_since, _as_utc(order.updated_at or order.created_at))
+    
+    return OrderFeedChanges(
+        orders=orders_to_responses(upserts),
+        removed=removed,
+        cursor=encode_cursor({
+            "c": str(principal.club_id),
+            "t": changed_since.isoformat(),
+            "a": ready_cutoff.isoformat(),
+        }),
+    )
+
+
+def _resolve_live_club(user_id: str) -> Optional[str]:
+    """Resolve the bartender's club with a short-lived session."""
+    db = SessionLocal()
+    try:
+        principal = load_principal(db, user_id)
+        if principal is None or not principal.is_active or principal.club_id is None:
+            return None
+        return str(principal.club_id)
+    finally:
+        db.close()
+
+
+def _load_club_snapshot(club_id: str) -> List[dict]:
+    db = SessionLocal()
+    try:
+        orders = _active_orders_query(db, club_id).all()
+        return [order.model_dump(mode="json") for order in orders_to_responses(orders)]
+    finally:
+        db.close()
+
+
+@router.websocket("/orders/live")
+async def bartender_orders_live(websocket: WebSocket, token: str = Query(...)):
+    """
+    Live order queue for the bartender's club.
+    
+    Sends a snapshot of the active queue on connect, then order.created,
+    order.paid and order.status_changed events as they are committed.
+    Browsers cannot set headers on WebSocket requests, so the JWT is passed
+    as the `token` query parameter.
+    """
+    payload = decode_access_token(token)
+    user_id = payload.get("sub") if payload else None
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    # The connection is long-lived, so it must not hold a pooled DB session:
+    # the club lookup and snapshot use their own sessions that are closed right away
+    club_id = await run_in_threadpool(_resolve_live_club, user_id)
+    if club_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    # Subscribe before loading the snapshot: events committed while it loads
+    # wait in the queue and are sent after it. Clients upsert orders by id,
+    # so an order that is in both is harmless
+    queue = order_event_broker.subscribe(club_id)
+    try:
+        snapshot = await run_in_threadpool(_load_club_snapshot, club_id)
+        await websocket.accept()
+        await _stream_live_orders(websocket, club_id, queue, snapshot)
+    finally:
+        order_event_broker.unsubscribe(club_id, queue)
+
+
+async def _stream_live_orders(websocket: WebSocket, club_id: str, queue: asyncio.Queue, snapshot: List[dict]) -> None:
+    async def forward_events():
+        await websocket.send_json({"type": "snapshot", "orders": snapshot})
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=LIVE_PING_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "ping"})
+                continue
+            if event["type"] == RESYNC:
+                orders = await run_in_threadpool(_load_club_snapshot, club_id)
+                event = {"type": "snapshot", "orders": orders}
+            await websocket.send_json(event)
+    
+    async def wait_for_disconnect():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+    
+    sender = asyncio.create_task(forward_events())
+    receiver = asyncio.create_task(wait_for_disconnect())
+    done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    for task in done:
+        if not task.cancelled() and task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+            raise task.exception()
+
+
+def _invalid_qr_code() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Order not found or QR code invalid",
+    )
+
+
+def _order_state(db: Session, order_uuid, club_id):
+    """
+    Status and payment method of one of the club's orders, or None.
+
+    Only read once a conditional transition matched nothing, to answer with
+    the reason (404 or 400) rather than a bare conflict.
+    """
+    return db.query(Order.status, Order.payment_method).filter(
+        Order.id == order_uuid,
+        Order.club_id == club_id,
+    ).first()
 
 
 @router.post("/scan", response_model=OrderResponse)
 def scan_qr_code(
     qr_data: QRScanRequest,
-    current_user: User = Depends(get_current_bartender),
+    principal: Principal = Depends(get_current_bartender),
     db: Session = Depends(get_db)
 ):
     """Scan QR code and validate order."""
-    # Get bartender's club
-    bartender = db.query(Bartender).filter(
-        Bartender.user_id == current_user.id,
-        Bartender.is_active == True
-    ).first()
-    
-    if not bartender:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Bartender profile not found",
-        )
+    # Malformed and forged codes are rejected before any query
+    token = verify_qr_token(qr_data.qr_code)
+    if token is None and not validate_qr_code(qr_data.qr_code):
+        raise _invalid_qr_code()
+    
+    if token is not None:
+        # Signed token: another club's code never reaches the database and
+        # the order is found by primary key
+        if token.club_id != principal.club_id:
+            raise _invalid_qr_code()
+        order_match = (Order.id == token.order_id, Order.qr_code == qr_data.qr_code)
+    else:
+        # Legacy UUID code, looked up by value
+        order_match = (Order.qr_code == qr_data.qr_code,)
+    
+    # Common case in one statement: a paid order goes straight to preparing
+    rows = transition_orders(
+        db,
+        OrderStatus.PREPARING,
+        sources_for(OrderStatus.PREPARING, BARTENDER_TRANSITIONS),
+        *order_match,
+        Order.club_id == principal.club_id,
+    )
+    if rows:
+        response = rows_to_responses(db, rows)[0]
+        db.commit()
+        publish_order_event(ORDER_STATUS_CHANGED, response)
+        return response
     
-    # Find order by QR code
-    order = db.query(Order).filter(
-        Order.qr_code == qr_data.qr_code,
-        Order.club_id == bartender.club_id
-    ).first()
+    # Nothing moved - find out why
+    order = with_order_details(db.query(Order).filter(
+        *order_match,
+        Order.club_id == principal.club_id
+    )).first()
     
     if not order:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found or QR code invalid",
-        )
+        raise _invalid_qr_code()
     
-    # Handle payment method
     if order.payment_method == PaymentMethod.CASH:
-        # Cash orders: can scan if PENDING_PAYMENT or PAID
         if order.status == OrderStatus.PENDING_PAYMENT:
             # Return order details - bartender needs to confirm payment first
-            # Don't change status yet
-            pass
-        elif order.status == OrderStatus.PAID:
-            # Already paid, can proceed to preparing
-            order.status = OrderStatus.PREPARING
-            db.commit()
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Cash order status is {order.status.value}, cannot be processed",
-            )
-    else:
-        # Card payments: must be PAID
-        if order.status != OrderStatus.PAID:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Order status is {order.status.value}, cannot be processed",
-            )
-        # Update order status to preparing
-        order.status = OrderStatus.PREPARING
-        db.commit()
+            return order_to_response(order)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cash order status is {order.status.value}, cannot be processed",
+        )
     
-    db.refresh(order)
-    
-    # Format response - convert UUIDs to strings explicitly
-    order_dict = {
-        'id': str(order.id),
-        'customer_id': str(order.customer_id),
-        'club_id': str(order.club_id),
-        'total_amount': order.total_amount,
-        'payment_method': order.payment_method,
-        'status': order.status,
-        'qr_code': order.qr_code,
-        'payment_intent_id': order.payment_intent_id,
-        'created_at': order.created_at,
-        'updated_at': order.updated_at,
-        'completed_at': order.completed_at,
-    }
-    
-    items = []
-    for item in order.items:
-        drink = db.query(Drink).filter(Drink.id == item.drink_id).first()
-        item_dict = {
-            'id': str(item.id),
-            'drink_id': str(item.drink_id),
-            'quantity': item.quantity,
-            'price_at_purchase': item.price_at_purchase,
-            'drink_name': drink.name if drink else None,
-        }
-        items.append(item_dict)
-    
-    order_dict["items"] = items
-    order_dict["club_name"] = order.club.name if order.club else None
-    
-    return OrderResponse(**order_dict)
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Order status is {order.status.value}, cannot be processed",
+    )
 
 
 @router.put("/orders/{order_id}/status", response_model=OrderResponse)
 def update_order_status(
     order_id: str,
     status_update: OrderStatusUpdate,
-    current_user: User = Depends(get_current_bartender),
+    principal: Principal = Depends(get_current_bartender),
     db: Session = Depends(get_db)
 ):
     """Update order status (bartender only)."""
@@ -196,89 +385,114 @@ def update_order_status(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid order ID format",
         )
-    # Get bartender's club
-    bartender = db.query(Bartender).filter(
-        Bartender.user_id == current_user.id,
-        Bartender.is_active == True
-    ).first()
-    
-    if not bartender:
+    from_statuses = sources_for(status_update.status, BARTENDER_TRANSITIONS)
+    if not from_statuses:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Bartender profile not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot transition to {status_update.status.value}",
         )
     
-    # Find order
-    order = db.query(Order).filter(
+    rows = transition_orders(
+        db,
+        status_update.status,
+        from_statuses,
         Order.id == order_uuid,
-        Order.club_id == bartender.club_id
-    ).first()
-    
-    if not order:
+        Order.club_id == principal.club_id,
+    )
+    if not rows:
+        order = _order_state(db, order_uuid, principal.club_id)
+        if order is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Order not found",
+            )
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot transition from {order.status.value} to {status_update.status.value}",
         )
     
-    # Validate status transition
-    valid_transitions = {
-        OrderStatus.PAID: [OrderStatus.PREPARING, OrderStatus.CANCELLED],
-        OrderStatus.PREPARING: [OrderStatus.READY, OrderStatus.CANCELLED],
-        OrderStatus.READY: [OrderStatus.COMPLETED, OrderStatus.CANCELLED],
-    }
+    response = rows_to_responses(db, rows)[0]
+    db.commit()
+    publish_order_event(ORDER_STATUS_CHANGED, response)
+    
+    return response
+
+
+@router.post("/orders/status:batch", response_model=OrderStatusBatchResponse)
+def update_order_status_batch(
+    batch: OrderStatusBatchRequest,
+    principal: Principal = Depends(get_current_bartender),
+    db: Session = Depends(get_db)
+):
+    """
+    Update the status of several orders at once (bartender only).
     
-    if status_update.status not in valid_transitions.get(order.status, []):
+    All changes are applied in one transaction with one conditional UPDATE
+    per target status. Each entry gets its own result; entries that cannot
+    move are reported without failing the others.
+    """
+    from uuid import UUID
+    if len(batch.updates) > MAX_STATUS_BATCH_SIZE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Cannot transition from {order.status.value} to {status_update.status.value}",
+            detail=f"At most {MAX_STATUS_BATCH_SIZE} updates per batch",
         )
     
-    # Update status
-    order.status = status_update.status
+    errors = {}
+    order_ids_by_target = {}
+    seen = set()
+    for index, item in enumerate(batch.updates):
+        try:
+            order_uuid = UUID(item.order_id)
+        except ValueError:
+            errors[index] = "Invalid order ID format"
+            continue
+        if order_uuid in seen:
+            errors[index] = "Order appears more than once in the batch"
+            continue
+        seen.add(order_uuid)
+        if not sources_for(item.status, BARTENDER_TRANSITIONS):
+            errors[index] = f"Cannot transition to {item.status.value}"
+            continue
+        order_ids_by_target.setdefault(item.status, []).append(order_uuid)
+    
+    rows = []
+    for target, order_ids in order_ids_by_target.items():
+        rows.extend(transition_orders(
+            db,
+            target,
+            sources_for(target, BARTENDER_TRANSITIONS),
+            Order.id.in_(order_ids),
+            Order.club_id == principal.club_id,
+        ))
+    changed = {response.id: response for response in rows_to_responses(db, rows)}
+    db.commit()
     
-    if status_update.status == OrderStatus.COMPLETED:
-        order.completed_at = datetime.utcnow()
+    results = []
+    for index, item in enumerate(batch.updates):
+        if index in errors:
+            results.append(OrderStatusBatchResult(order_id=item.order_id, ok=False, error=errors[index]))
+            continue
+        response = changed.get(str(UUID(item.order_id)))
+        if response is None:
+            results.append(OrderStatusBatchResult(
+                order_id=item.order_id,
+                ok=False,
+                error=f"Order not found or cannot transition to {item.status.value}",
+            ))
+        else:
+            results.append(OrderStatusBatchResult(order_id=item.order_id, ok=True, order=response))
     
-    db.commit()
-    db.refresh(order)
-    
-    # Format response - convert UUIDs to strings explicitly
-    order_dict = {
-        'id': str(order.id),
-        'customer_id': str(order.customer_id),
-        'club_id': str(order.club_id),
-        'total_amount': order.total_amount,
-        'payment_method': order.payment_method,
-        'status': order.status,
-        'qr_code': order.qr_code,
-        'payment_intent_id': order.payment_intent_id,
-        'created_at': order.created_at,
-        'updated_at': order.updated_at,
-        'completed_at': order.completed_at,
-    }
-    
-    items = []
-    for item in order.items:
-        drink = db.query(Drink).filter(Drink.id == item.drink_id).first()
-        item_dict = {
-            'id': str(item.id),
-            'drink_id': str(item.drink_id),
-            'quantity': item.quantity,
-            'price_at_purchase': item.price_at_purchase,
-            'drink_name': drink.name if drink else None,
-        }
-        items.append(item_dict)
-    
-    order_dict["items"] = items
-    order_dict["club_name"] = order.club.name if order.club else None
-    
-    return OrderResponse(**order_dict)
+    # One live event for the whole batch
+    publish_orders_event(ORDERS_STATUS_CHANGED, principal.club_id, list(changed.values()))
+    
+    return OrderStatusBatchResponse(results=results)
 
 
 @router.post("/orders/{order_id}/confirm-payment", response_model=OrderResponse)
 def confirm_cash_payment(
     order_id: str,
-    current_user: User = Depends(get_current_bartender),
+    principal: Principal = Depends(get_current_bartender),
     db: Session = Depends(get_db)
 ):
     """Confirm cash payment received (bartender only)."""
@@ -291,76 +505,89 @@ def confirm_cash_payment(
             detail="Invalid order ID format",
         )
     
-    # Get bartender's club
-    bartender = db.query(Bartender).filter(
-        Bartender.user_id == current_user.id,
-        Bartender.is_active == True
-    ).first()
-    
-    if not bartender:
+    # Mark as paid - only a cash order that is still pending payment
+    rows = transition_orders(
+        db,
+        OrderStatus.PAID,
+        sources_for(OrderStatus.PAID, PAYMENT_TRANSITIONS),
+        Order.id == order_uuid,
+        Order.club_id == principal.club_id,
+        Order.payment_method == PaymentMethod.CASH,
+    )
+    if not rows:
+        order = _order_state(db, order_uuid, principal.club_id)
+        if order is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Order not found",
+            )
+        if order.payment_method != PaymentMethod.CASH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="This endpoint is only for cash payments",
+            )
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Bartender profile not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Order status is {order.status.value}, cannot confirm payment",
         )
     
-    # Find order
-    order = db.query(Order).filter(
-        Order.id == order_uuid,
-        Order.club_id == bartender.club_id
-    ).first()
+    response = rows_to_responses(db, rows)[0]
+    db.commit()
+    publish_order_event(ORDER_PAID, response)
     
-    if not order:
+    return response
+
+
+@router.get("/orders/offline-snapshot", response_model=OfflineSnapshot)
+def get_offline_snapshot(
+    principal: Principal = Depends(get_current_bartender),
+    db: Session = Depends(get_db)
+):
+    """
+    Signed snapshot of the club's active orders for scanning offline.
+    
+    Orders are keyed by a short SHA-256 hash of their QR code and sorted by
+    it; devices should refresh the snapshot after expires_at.
+    """
+    orders = _active_orders_query(db, principal.club_id).all()
+    return build_snapshot(principal.club_id, orders_to_responses(orders))
+
+
+@router.post("/orders/sync", response_model=OfflineSyncResponse)
+def sync_offline_operations(
+    sync: OfflineSyncRequest,
+    principal: Principal = Depends(get_current_bartender),
+    db: Session = Depends(get_db)
+):
+    """
+    Apply scans and status changes a device recorded while offline.
+    
+    Operations are replayed in performed_at order against the current state
+    of the orders; each gets its own result (applied, unchanged, conflict or
+    rejected) and all changes are committed together.
+    """
+    if len(sync.operations) > MAX_OFFLINE_SYNC_SIZE:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Order not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_OFFLINE_SYNC_SIZE} operations per sync",
         )
     
-    # Verify it's a cash payment and pending
-    if order.payment_method != PaymentMethod.CASH:
+    # The snapshot must have been issued to this club
+    if not verify_snapshot_signature(principal.club_id, sync.snapshot_generated_at, sync.snapshot_signature):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="This endpoint is only for cash payments",
+            detail="Invalid offline snapshot signature",
         )
-    
-    if order.status != OrderStatus.PENDING_PAYMENT:
+    if snapshot_too_old(sync.snapshot_generated_at):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Order status is {order.status.value}, cannot confirm payment",
+            detail="Offline snapshot has expired; download a new snapshot and sync again",
         )
     
-    # Mark as paid
-    order.status = OrderStatus.PAID
+    results, changed = apply_offline_operations(db, principal.club_id, sync.operations)
     db.commit()
-    db.refresh(order)
-    
-    # Format response - convert UUIDs to strings explicitly
-    order_dict = {
-        'id': str(order.id),
-        'customer_id': str(order.customer_id),
-        'club_id': str(order.club_id),
-        'total_amount': order.total_amount,
-        'payment_method': order.payment_method,
-        'status': order.status,
-        'qr_code': order.qr_code,
-        'payment_intent_id': order.payment_intent_id,
-        'created_at': order.created_at,
-        'updated_at': order.updated_at,
-        'completed_at': order.completed_at,
-    }
-    
-    items = []
-    for item in order.items:
-        drink = db.query(Drink).filter(Drink.id == item.drink_id).first()
-        item_dict = {
-            'id': str(item.id),
-            'drink_id': str(item.drink_id),
-            'quantity': item.quantity,
-            'price_at_purchase': item.price_at_purchase,
-            'drink_name': drink.name if drink else None,
-        }
-        items.append(item_dict)
-    
-    order_dict["items"] = items
-    order_dict["club_name"] = order.club.name if order.club else None
-    
-    return OrderResponse(**order_dict)
+    
+    # One live event for the whole sync
+    publish_orders_event(ORDERS_STATUS_CHANGED, principal.club_id, changed)
+    
+    return OfflineSyncResponse(results=results, orders=changed)
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List
 from app.db.base import get_db
 from app.models.user import User, UserRole
 from app.models.club import Club
 from app.models.bartender import Bartender
 from app.schemas.bartender import BartenderCreate, BartenderResponse
+from app.core.config import settings
 from app.core.dependencies import get_current_club_owner
+from app.core.auth_cache import invalidate_cached_user
+from app.core.query_budget import query_budget
 
 router = APIRouter()
 
@@ -19,7 +22,7 @@ def add_bartender(
 ):
     """Add a bartender to a club (club owner only). Creates user if doesn't exist."""
     from uuid import UUID
-    from app.core.security import get_password_hash
+    from app.core.password_hasher import password_hasher, PasswordHasherBusy
     
     try:
         club_uuid = UUID(bartender_data.club_id)
@@ -64,7 +67,14 @@ def add_bartender(
                 user.full_name = bartender_data.full_name
     else:
         # Create new user with bartender role
-        hashed_password = get_password_hash(bartender_data.password)
+        try:
+            hashed_password = password_hasher.hash(bartender_data.password)
+        except PasswordHasherBusy:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please try again shortly",
+                headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+            )
         user = User(
             email=bartender_data.email,
             hashed_password=hashed_password,
@@ -83,6 +93,8 @@ def add_bartender(
     )
     
     db.add(db_bartender)
+    # Role and bartender club are cached for authorization
+    invalidate_cached_user(db, user.id)
     db.commit()
     db.refresh(db_bartender)
     
@@ -94,6 +106,7 @@ def add_bartender(
 
 
 @router.get("/club/{club_id}", response_model=List[BartenderResponse])
+@query_budget(3)
 def list_bartenders(
     club_id: str,
     current_user: User = Depends(get_current_club_owner),
@@ -120,7 +133,10 @@ def list_bartenders(
             detail="Club not found or you don't have permission",
         )
     
-    bartenders = db.query(Bartender).filter(
+    # Load the users with the bartenders rather than one query per row
+    bartenders = db.query(Bartender).options(
+        joinedload(Bartender.user).load_only(User.full_name)
+    ).filter(
         Bartender.club_id == club_uuid
     ).all()
     
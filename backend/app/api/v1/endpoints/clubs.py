@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.base import get_db
+from app.db.async_session import get_async_db
 from app.models.user import User
 from app.models.club import Club
 from app.models.drink import Drink
 from app.schemas.club import ClubCreate, ClubUpdate, ClubResponse
 from app.schemas.drink import DrinkCreate, DrinkUpdate, DrinkResponse
-from app.core.dependencies import get_current_user, get_current_club_owner
+from app.core.dependencies import Principal, get_current_user, get_current_club_owner, get_club_owner_principal_async
 from app.core.geocoding_service import geocoding_service
+from app.core.menu_cache import get_club_menu, invalidate_club_menu
+from app.core.query_budget import query_budget
 
 router = APIRouter()
 
@@ -16,8 +20,8 @@ router = APIRouter()
 @router.post("", response_model=ClubResponse, status_code=status.HTTP_201_CREATED)
 async def create_club(
     club_data: ClubCreate,
-    current_user: User = Depends(get_current_club_owner),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_club_owner_principal_async),
+    db=Depends(get_async_db)
 ):
     """Register a new club (club owner only)."""
     # Geocode address if provided (use formatted_address if available, otherwise address)
@@ -43,8 +47,8 @@ async def create_club(
     )
     
     db.add(db_club)
-    db.commit()
-    db.refresh(db_club)
+    await db.commit()
+    await db.refresh(db_club)
     
     return ClubResponse.model_validate(db_club)
 
@@ -80,8 +84,8 @@ def get_my_clubs(
 async def update_club(
     club_id: str,
     club_data: ClubUpdate,
-    current_user: User = Depends(get_current_club_owner),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_club_owner_principal_async),
+    db=Depends(get_async_db)
 ):
     """Update club information."""
     from uuid import UUID
@@ -92,7 +96,7 @@ async def update_club(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid club ID format",
         )
-    club = db.query(Club).filter(Club.id == club_uuid, Club.owner_id == current_user.id).first()
+    club = await db.scalar(select(Club).where(Club.id == club_uuid, Club.owner_id == current_user.id))
     
     if not club:
         raise HTTPException(
@@ -123,13 +127,14 @@ async def update_club(
     for field, value in update_data.items():
         setattr(club, field, value)
     
-    db.commit()
-    db.refresh(club)
+    await db.commit()
+    await db.refresh(club)
     
     return ClubResponse.model_validate(club)
 
 
 @router.get("", response_model=List[ClubResponse])
+@query_budget(1)
 def list_clubs(
     skip: int = 0,
     limit: int = 100,
@@ -141,6 +146,7 @@ def list_clubs(
 
 
 @router.get("/{club_id}", response_model=ClubResponse)
+@query_budget(1)
 def get_club(club_id: str, db: Session = Depends(get_db)):
     """Get club details by ID."""
     from uuid import UUID
@@ -164,6 +170,7 @@ def get_club(club_id: str, db: Session = Depends(get_db)):
 
 # Drink endpoints
 @router.get("/{club_id}/drinks", response_model=List[DrinkResponse])
+@query_budget(1)
 def list_drinks(club_id: str, db: Session = Depends(get_db)):
     """List all drinks for a club."""
     from uuid import UUID
@@ -174,8 +181,7 @@ def list_drinks(club_id: str, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid club ID format",
         )
-    drinks = db.query(Drink).filter(Drink.club_id == club_uuid, Drink.is_available == True).all()
-    return [DrinkResponse.model_validate(drink) for drink in drinks]
+    return get_club_menu(db, club_uuid).available_drinks()
 
 
 @router.get("/{club_id}/drink-lists", response_model=List[str])
@@ -261,6 +267,7 @@ def create_drink(
     )
     
     db.add(db_drink)
+    invalidate_club_menu(db, club_uuid)
     db.commit()
     db.refresh(db_drink)
     
@@ -298,6 +305,7 @@ def update_drink(
     for field, value in update_data.items():
         setattr(drink, field, value)
     
+    invalidate_club_menu(db, drink.club_id)
     db.commit()
     db.refresh(drink)
     
@@ -330,6 +338,7 @@ def delete_drink(
             detail="Drink not found or you don't have permission",
         )
     
+    invalidate_club_menu(db, drink.club_id)
     db.delete(drink)
     db.commit()
     
@@ -1,18 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 from uuid import UUID
 from app.db.base import get_db
 from app.models.user import User
-from app.models.drink_list import DrinkList
+from app.models.drink_list import DrinkList, drink_list_drinks
 from app.models.drink import Drink
 from app.models.club import Club
 from app.schemas.drink_list import DrinkListCreate, DrinkListUpdate, DrinkListResponse, DrinkListWithDrinks
 from app.core.dependencies import get_current_user, get_current_club_owner
+from app.core.menu_cache import invalidate_club_menu
+from app.core.query_budget import query_budget
 
 router = APIRouter()
 
 
+def _invalidate_list_clubs(db: Session, drink_list: DrinkList) -> None:
+    """Invalidate the menus of every club the drink list is associated with."""
+    for club in drink_list.clubs:
+        invalidate_club_menu(db, club.id)
+
+
 @router.post("", response_model=DrinkListResponse, status_code=status.HTTP_201_CREATED)
 def create_drink_list(
     drink_list_data: DrinkListCreate,
@@ -59,20 +68,29 @@ def create_drink_list(
 
 
 @router.get("", response_model=List[DrinkListResponse])
+@query_budget(1)
 def list_drink_lists(
     db: Session = Depends(get_db)
 ):
     """List all drink lists (public endpoint)."""
-    drink_lists = db.query(DrinkList).filter(DrinkList.is_active == True).all()
+    # Count the drinks in the same query instead of loading each list's drinks
+    rows = (
+        db.query(DrinkList, func.count(drink_list_drinks.c.drink_id))
+        .outerjoin(drink_list_drinks, drink_list_drinks.c.drink_list_id == DrinkList.id)
+        .filter(DrinkList.is_active == True)
+        .group_by(DrinkList.id)
+        .all()
+    )
     results = []
-    for dl in drink_lists:
+    for dl, drink_count in rows:
         result = DrinkListResponse.model_validate(dl)
-        result.drink_count = len(dl.drinks)
+        result.drink_count = drink_count
         results.append(result)
     return results
 
 
 @router.get("/{drink_list_id}", response_model=DrinkListWithDrinks)
+@query_budget(2)
 def get_drink_list(
     drink_list_id: str,
     db: Session = Depends(get_db)
@@ -86,7 +104,7 @@ def get_drink_list(
             detail="Invalid drink list ID format",
         )
     
-    drink_list = db.query(DrinkList).filter(DrinkList.id == drink_list_uuid).first()
+    drink_list = db.query(DrinkList).options(selectinload(DrinkList.drinks)).filter(DrinkList.id == drink_list_uuid).first()
     if not drink_list:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -144,6 +162,7 @@ def update_drink_list(
     for field, value in update_data.items():
         setattr(drink_list, field, value)
     
+    _invalidate_list_clubs(db, drink_list)
     db.commit()
     db.refresh(drink_list)
     
@@ -174,6 +193,7 @@ def delete_drink_list(
             detail="Drink list not found",
         )
     
+    _invalidate_list_clubs(db, drink_list)
     db.delete(drink_list)
     db.commit()
     
@@ -215,6 +235,7 @@ def associate_drink_list_to_club(
     # Associate club with drink list
     if club not in drink_list.clubs:
         drink_list.clubs.append(club)
+        invalidate_club_menu(db, club.id)
         db.commit()
     
     db.refresh(drink_list)
@@ -258,6 +279,7 @@ def disassociate_drink_list_from_club(
     # Disassociate club from drink list
     if club in drink_list.clubs:
         drink_list.clubs.remove(club)
+        invalidate_club_menu(db, club.id)
         db.commit()
     
     return None
@@ -3,17 +3,17 @@ Drink parsing and batch creation endpoints.
 """
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Body
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from typing import List, Dict, Any
 from pydantic import BaseModel
-from app.db.base import get_db
-from app.models.user import User
+from app.db.async_session import get_async_db
 from app.models.club import Club
 from app.models.drink import Drink
 from app.schemas.drink import DrinkCreate, DrinkResponse
-from app.core.dependencies import get_current_club_owner
+from app.core.dependencies import Principal, get_club_owner_principal_async
 from app.core.llm_service import llm_service
 from app.core.brand_logos import get_logo_url
+from app.core.menu_cache import invalidate_club_menu_async
 from uuid import UUID
 
 logger = logging.getLogger(__name__)
@@ -93,7 +93,7 @@ def _get_brand_logo(brand_name: str) -> str | None:
 @router.post("/parse-preview", response_model=ParsePreviewResponse)
 async def parse_preview(
     request: ParsePreviewRequest,
-    current_user: User = Depends(get_current_club_owner)
+    current_user: Principal = Depends(get_club_owner_principal_async)
 ):
     """
     Parse natural language drink input and fetch brand logos for preview.
@@ -145,8 +145,8 @@ async def parse_preview(
 async def batch_create_drinks(
     club_id: str,
     request: BatchCreateRequest,
-    current_user: User = Depends(get_current_club_owner),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_club_owner_principal_async),
+    db=Depends(get_async_db)
 ):
     """
     Create multiple drinks in batch.
@@ -162,7 +162,7 @@ async def batch_create_drinks(
         )
     
     # Verify club ownership
-    club = db.query(Club).filter(Club.id == club_uuid, Club.owner_id == current_user.id).first()
+    club = await db.scalar(select(Club).where(Club.id == club_uuid, Club.owner_id == current_user.id))
     if not club:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -176,13 +176,15 @@ async def batch_create_drinks(
         )
     
     # Check for existing drinks to avoid duplicates (match by name AND price)
-    existing_drinks = db.query(Drink).filter(
-        Drink.club_id == club_uuid,
-        Drink.is_available == True
-    ).all()
+    existing_drinks = await db.execute(
+        select(Drink.name, Drink.price).where(
+            Drink.club_id == club_uuid,
+            Drink.is_available == True
+        )
+    )
     
     # Use (name, price) as unique key - same name with different price is allowed
-    existing_drink_keys = {(d.name.lower().strip(), float(d.price)) for d in existing_drinks}
+    existing_drink_keys = {(name.lower().strip(), float(price)) for name, price in existing_drinks}
     
     # Create all drinks (skip duplicates)
     created_drinks = []
@@ -218,11 +220,15 @@ async def batch_create_drinks(
             detail=f"All drinks already exist. Skipped: {', '.join(skipped_drinks)}"
         )
     
-    db.commit()
+    await invalidate_club_menu_async(db, club_uuid)
+    await db.commit()
     
-    # Refresh all drinks
-    for drink in created_drinks:
-        db.refresh(drink)
+    # Load server defaults for all drinks in one query
+    (await db.scalars(
+        select(Drink)
+        .where(Drink.id.in_([drink.id for drink in created_drinks]))
+        .execution_options(populate_existing=True)
+    )).all()
     
     logger.info(f"Created {len(created_drinks)} drinks, skipped {len(skipped_drinks)} duplicates")
     
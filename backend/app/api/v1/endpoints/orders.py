@@ -1,28 +1,135 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Response
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Tuple
+from datetime import datetime
 from decimal import Decimal
+import logging
 import uuid
+import stripe
 from app.db.base import get_db
-from app.models.user import User
 from app.models.club import Club
-from app.models.drink import Drink
+from app.models.user import User
 from app.models.order import Order, OrderItem, OrderStatus, PaymentMethod
-from app.schemas.order import OrderCreate, OrderResponse, OrderItemResponse, OrderStatusUpdate
-from app.core.dependencies import get_current_user
+from app.schemas.order import OrderCreate, OrderResponse
+from app.core.dependencies import Principal, get_current_principal
 from app.core.stripe_service import create_payment_intent
 from app.core.qr_service import generate_qr_code
+from app.core.cursor import encode_cursor, decode_cursor
+from app.core.order_serialization import with_order_details, build_order_response, order_to_response, orders_to_responses
+from app.core.order_events import publish_order_event, ORDER_CREATED
+from app.core.menu_cache import get_club_menu
+from app.core.order_state_machine import PAYMENT_TRANSITIONS, sources_for, transition_orders
+from app.core.idempotency import (
+    request_fingerprint,
+    claim_idempotency_key,
+    attach_order,
+    detach_order,
+    complete_idempotency_key,
+    release_idempotency_key,
+)
+from app.core.query_budget import query_budget
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _price_cart(db: Session, club_uuid, cart_items) -> Tuple[Decimal, List[dict]]:
+    """
+    Validate and price cart lines against the club's drinks.
+    
+    Drinks come from the cached club menu. Every bad line is reported at
+    once (1-based line numbers) rather than failing on the first one.
+    """
+    from uuid import UUID
+    line_errors = []
+    drink_uuids = []
+    for line_number, item_data in enumerate(cart_items, start=1):
+        try:
+            drink_uuids.append(UUID(item_data.drink_id))
+        except ValueError:
+            drink_uuids.append(None)
+            line_errors.append(f"Line {line_number}: invalid drink ID format: {item_data.drink_id}")
+            continue
+        if item_data.quantity < 1:
+            line_errors.append(f"Line {line_number}: quantity must be at least 1")
+    
+    if not cart_items:
+        line_errors.append("Order must contain at least one drink")
+    
+    if line_errors:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="; ".join(line_errors),
+        )
+    
+    drinks = get_club_menu(db, club_uuid).drinks
+    
+    total_amount = Decimal("0.00")
+    cart_lines = []
+    for line_number, (item_data, drink_uuid) in enumerate(zip(cart_items, drink_uuids), start=1):
+        drink = drinks.get(drink_uuid)
+        if drink is None:
+            line_errors.append(f"Line {line_number}: drink {item_data.drink_id} not found")
+            continue
+        if not drink.is_available:
+            line_errors.append(f"Line {line_number}: {drink.name} is unavailable")
+            continue
+        
+        total_amount += drink.price * Decimal(str(item_data.quantity))
+        cart_lines.append({"drink_id": drink_uuid, "drink": drink, "quantity": int(item_data.quantity)})
+    
+    if line_errors:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="; ".join(line_errors),
+        )
+    
+    return total_amount, cart_lines
+
+
 @router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(12)
 def create_order(
     order_data: OrderCreate,
-    current_user: User = Depends(get_current_user),
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """Create a new order (customer only)."""
+    """
+    Create a new order (customer only).
+    
+    Send an Idempotency-Key header to make retries safe: a repeated key
+    returns the original response instead of creating another order.
+    """
+    if idempotency_key is None:
+        return _create_order(order_data, current_user, db)
+    
+    stored = claim_idempotency_key(
+        db, current_user.id, idempotency_key, request_fingerprint(order_data.model_dump_json())
+    )
+    if stored is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+        return stored
+    
+    try:
+        order_response = _create_order(order_data, current_user, db, idempotency_key)
+    except Exception:
+        release_idempotency_key(db, current_user.id, idempotency_key)
+        raise
+    
+    complete_idempotency_key(db, current_user.id, idempotency_key, order_response.model_dump(mode="json"))
+    return order_response
+
+
+def _create_order(
+    order_data: OrderCreate,
+    current_user: Principal,
+    db: Session,
+    idempotency_key: Optional[str] = None,
+) -> OrderResponse:
     from uuid import UUID
     try:
         club_uuid = UUID(order_data.club_id)
@@ -31,46 +138,18 @@ def create_order(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid club ID format",
         )
-    # Verify club exists
-    club = db.query(Club).filter(Club.id == club_uuid, Club.is_active == True).first()
+    # Verify club exists; the owner's Stripe account is needed for card payments
+    club = db.query(Club).options(
+        joinedload(Club.owner).load_only(User.stripe_account_id, User.stripe_account_status)
+    ).filter(Club.id == club_uuid, Club.is_active == True).first()
     if not club:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Club not found or inactive",
         )
     
-    # Calculate total and validate drinks
-    total_amount = Decimal("0.00")
-    order_items_data = []
-    
-    for item_data in order_data.items:
-        try:
-            drink_uuid = UUID(item_data.drink_id)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid drink ID format: {item_data.drink_id}",
-            )
-        drink = db.query(Drink).filter(
-            Drink.id == drink_uuid,
-            Drink.club_id == club_uuid,
-            Drink.is_available == True
-        ).first()
-        
-        if not drink:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Drink {item_data.drink_id} not found or unavailable",
-            )
-        
-        item_total = drink.price * Decimal(str(item_data.quantity))
-        total_amount += item_total
-        
-        order_items_data.append({
-            "drink": drink,
-            "quantity": item_data.quantity,
-            "price_at_purchase": drink.price,
-        })
+    # Validate and price the whole cart with a single query
+    total_amount, cart_lines = _price_cart(db, club_uuid, order_data.items)
     
     # Handle payment method
     payment_method = order_data.payment_method
@@ -85,91 +164,116 @@ def create_order(
     
     # Create order with pending_payment status first
     db_order = Order(
+        id=uuid.uuid4(),
         customer_id=current_user.id,
         club_id=club_uuid,
         total_amount=total_amount,
         payment_method=payment_method,
         status=OrderStatus.PENDING_PAYMENT,
     )
-    
     db.add(db_order)
-    db.flush()  # Get order ID
     
-    # Handle payment based on payment method
-    payment_intent = None
-    if payment_method == PaymentMethod.CARD:
-        # Create payment intent with Stripe Connect passthrough
-        payment_intent = create_payment_intent(
-            amount=int(total_amount * 100),  # Convert to cents
-            currency="usd",
-            metadata={
-                "customer_id": str(current_user.id),
-                "club_id": str(club.id),
-                "order_id": str(db_order.id),
-            },
-            stripe_account_id=club.owner.stripe_account_id
-        )
-        # Update order with payment intent ID
-        db_order.payment_intent_id = payment_intent.id
-    else:
+    if payment_method == PaymentMethod.CASH:
         # Cash payment - generate QR code immediately
-        qr_code = generate_qr_code()
-        db_order.qr_code = qr_code
+        db_order.qr_code = generate_qr_code(db_order.id, club_uuid)
     
-    # Create order items
-    for item_data in order_items_data:
+    # Create order items - IDs are assigned here so the response can be built
+    # from the already loaded drinks instead of reading them back
+    items = []
+    for line in cart_lines:
         db_item = OrderItem(
+            id=uuid.uuid4(),
             order_id=db_order.id,
-            drink_id=item_data["drink"].id,
-            quantity=int(item_data["quantity"]),
-            price_at_purchase=item_data["price_at_purchase"],
+            drink_id=line["drink_id"],
+            quantity=line["quantity"],
+            price_at_purchase=line["drink"].price,
         )
         db.add(db_item)
+        items.append({
+            'id': str(db_item.id),
+            'drink_id': str(db_item.drink_id),
+            'quantity': db_item.quantity,
+            'price_at_purchase': db_item.price_at_purchase,
+            'drink_name': line["drink"].name,
+        })
+    
+    if idempotency_key is not None:
+        attach_order(db, current_user.id, idempotency_key, db_order.id)
     
+    # Read everything Stripe needs now: touching expired ORM attributes after
+    # the commit would check a connection out again for the whole call
+    order_id = db_order.id
+    customer_id = current_user.id
+    club_name = club.name
+    stripe_account_id = club.owner.stripe_account_id
+    
+    # Reserve the order before talking to Stripe: committing returns the
+    # connection to the pool instead of holding it for the Stripe round trip
     db.commit()
-    db.refresh(db_order)
     
-    # Format response with items - convert UUIDs to strings explicitly
-    from uuid import UUID
-    order_dict = {
-        'id': str(db_order.id),
-        'customer_id': str(db_order.customer_id),
-        'club_id': str(db_order.club_id),
-        'total_amount': db_order.total_amount,
-        'payment_method': db_order.payment_method,
-        'status': db_order.status,
-        'qr_code': db_order.qr_code,
-        'payment_intent_id': db_order.payment_intent_id,
-        'created_at': db_order.created_at,
-        'updated_at': db_order.updated_at,
-        'completed_at': db_order.completed_at,
-    }
+    payment_intent = None
+    if payment_method == PaymentMethod.CARD:
+        try:
+            # Create payment intent with Stripe Connect passthrough
+            payment_intent = create_payment_intent(
+                amount=int(total_amount * 100),  # Convert to cents
+                currency="usd",
+                metadata={
+                    "customer_id": str(customer_id),
+                    "club_id": str(club_uuid),
+                    "order_id": str(order_id),
+                },
+                stripe_account_id=stripe_account_id,
+                idempotency_key=f"order-{order_id}",
+            )
+        except Exception as e:
+            # Whatever failed, the reserved order can never be paid
+            logger.error(f"Failed to create payment intent for order {order_id}: {e}")
+            transition_orders(
+                db,
+                OrderStatus.CANCELLED,
+                sources_for(OrderStatus.CANCELLED, PAYMENT_TRANSITIONS),
+                Order.id == order_id,
+            )
+            if idempotency_key is not None:
+                # The cancelled order is never returned: a retry gets a new one
+                detach_order(db, current_user.id, idempotency_key)
+            db.commit()
+            if not isinstance(e, stripe.error.StripeError):
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Payment provider is unavailable. Please try again.",
+            )
+        
+        # Attach the payment intent to the reserved order
+        db.query(Order).filter(Order.id == order_id).update(
+            {Order.payment_intent_id: payment_intent.id}, synchronize_session=False
+        )
+        db.commit()
     
-    items = []
-    for item in db_order.items:
-        drink = db.query(Drink).filter(Drink.id == item.drink_id).first()
-        item_dict = {
-            'id': str(item.id),
-            'drink_id': str(item.drink_id),
-            'quantity': item.quantity,
-            'price_at_purchase': item.price_at_purchase,
-            'drink_name': drink.name if drink else None,
-        }
-        items.append(item_dict)
-    order_dict["items"] = items
-    order_dict["club_name"] = club.name
+    db.refresh(db_order)  # Server-side timestamps
+    
+    response = build_order_response(db_order, items, club_name)
+    
+    # Only cash orders join the bar queue now; card orders reach bartender
+    # devices as ORDER_PAID once the payment webhook arrives. Published
+    # before the client secret is swapped in
+    if payment_method == PaymentMethod.CASH:
+        publish_order_event(ORDER_CREATED, response)
     
     # Return client secret only for card payments
     if payment_method == PaymentMethod.CARD and payment_intent:
-        order_dict["payment_intent_id"] = payment_intent.client_secret
+        response = response.model_copy(update={"payment_intent_id": payment_intent.client_secret})
     
-    return OrderResponse(**order_dict)
+    return response
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
+@query_budget(3)
 def get_order(
     order_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get order details by ID."""
@@ -181,7 +285,7 @@ def get_order(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid order ID format",
         )
-    order = db.query(Order).filter(Order.id == order_uuid).first()
+    order = with_order_details(db.query(Order).filter(Order.id == order_uuid)).first()
     
     if not order:
         raise HTTPException(
@@ -196,83 +300,53 @@ def get_order(
             detail="Not enough permissions",
         )
     
-    # Load items with drink names - convert UUIDs to strings explicitly
-    order_dict = {
-        'id': str(order.id),
-        'customer_id': str(order.customer_id),
-        'club_id': str(order.club_id),
-        'total_amount': order.total_amount,
-        'payment_method': order.payment_method,
-        'status': order.status,
-        'qr_code': order.qr_code,
-        'payment_intent_id': order.payment_intent_id,
-        'created_at': order.created_at,
-        'updated_at': order.updated_at,
-        'completed_at': order.completed_at,
-    }
-    
-    items = []
-    for item in order.items:
-        drink = db.query(Drink).filter(Drink.id == item.drink_id).first()
-        item_dict = {
-            'id': str(item.id),
-            'drink_id': str(item.drink_id),
-            'quantity': item.quantity,
-            'price_at_purchase': item.price_at_purchase,
-            'drink_name': drink.name if drink else None,
-        }
-        items.append(item_dict)
-    
-    order_dict["items"] = items
-    order_dict["club_name"] = order.club.name if order.club else None
-    
-    return OrderResponse(**order_dict)
+    return order_to_response(order)
 
 
 @router.get("/me/history", response_model=List[OrderResponse])
+@query_budget(3)
 def get_my_orders(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """Get order history for current user."""
-    orders = db.query(Order).filter(
+    """
+    Get order history for current user, newest first.
+    
+    When a full page is returned, the `X-Next-Cursor` response header holds an
+    opaque token for the next page. Passing it as `cursor` seeks directly to
+    that position (keyset pagination) instead of skipping rows; `skip` is
+    ignored in that case and still works as before without a cursor.
+    """
+    from uuid import UUID
+    query = with_order_details(db.query(Order).filter(
         Order.customer_id == current_user.id
-    ).order_by(Order.created_at.desc()).offset(skip).limit(limit).all()
-    
-    result = []
-    for order in orders:
-        # Convert UUIDs to strings explicitly
-        order_dict = {
-            'id': str(order.id),
-            'customer_id': str(order.customer_id),
-            'club_id': str(order.club_id),
-            'total_amount': order.total_amount,
-            'payment_method': order.payment_method,
-            'status': order.status,
-            'qr_code': order.qr_code,
-            'payment_intent_id': order.payment_intent_id,
-            'created_at': order.created_at,
-            'updated_at': order.updated_at,
-            'completed_at': order.completed_at,
-        }
-        
-        items = []
-        for item in order.items:
-            drink = db.query(Drink).filter(Drink.id == item.drink_id).first()
-            item_dict = {
-                'id': str(item.id),
-                'drink_id': str(item.drink_id),
-                'quantity': item.quantity,
-                'price_at_purchase': item.price_at_purchase,
-                'drink_name': drink.name if drink else None,
-            }
-            items.append(item_dict)
-        
-        order_dict["items"] = items
-        order_dict["club_name"] = order.club.name if order.club else None
-        result.append(OrderResponse(**order_dict))
+    )).order_by(Order.created_at.desc(), Order.id.desc())
     
-    return result
-
+    if cursor is not None:
+        try:
+            position = decode_cursor(cursor)
+            created_at = datetime.fromisoformat(position["c"])
+            order_id = UUID(position["i"])
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+        query = query.filter(tuple_(Order.created_at, Order.id) < tuple_(created_at, order_id))
+    else:
+        query = query.offset(skip)
+    
+    orders = query.limit(limit).all()
+    
+    if orders and len(orders) == limit:
+        last = orders[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor({
+            "c": last.created_at.isoformat(),
+            "i": str(last.id),
+        })
+    
+    return orders_to_responses(orders)
@@ -1,18 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from app.db.base import get_db
-from app.models.order import Order, OrderStatus
+from fastapi import APIRouter, HTTPException, status, Request
+from starlette.concurrency import run_in_threadpool
 from app.core.stripe_service import handle_webhook
-from app.core.qr_service import generate_qr_code
-from app.core.config import settings
-import stripe
+from app.core.webhook_inbox import store_webhook_event, is_duplicate_event, webhook_inbox_worker
+import json
 
 router = APIRouter()
 
 
 @router.post("/webhook")
-async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
-    """Handle Stripe webhook events."""
+async def stripe_webhook(request: Request):
+    """
+    Handle Stripe webhook events.
+    
+    Verified events are stored in the webhook inbox and acknowledged right
+    away; the webhook worker applies them to orders in batches.
+    """
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
     
@@ -23,46 +25,19 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
         )
     
     try:
-        event = handle_webhook(payload, sig_header)
+        handle_webhook(payload, sig_header)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
     
-    # Handle payment_intent.succeeded
-    if event["type"] == "payment_intent.succeeded":
-        payment_intent = event["data"]["object"]
-        payment_intent_id = payment_intent["id"]
-        
-        # Find order by payment_intent_id
-        order = db.query(Order).filter(
-            Order.payment_intent_id == payment_intent_id
-        ).first()
-        
-        if order:
-            # Generate QR code
-            qr_code = generate_qr_code()
-            
-            # Update order status to paid and set QR code
-            order.status = OrderStatus.PAID
-            order.qr_code = qr_code
-            
-            db.commit()
+    event = json.loads(payload)
+    if is_duplicate_event(event["id"]):
+        return {"status": "success"}
     
-    # Handle payment_intent.payment_failed
-    elif event["type"] == "payment_intent.payment_failed":
-        payment_intent = event["data"]["object"]
-        payment_intent_id = payment_intent["id"]
-        
-        # Find order and mark as cancelled
-        order = db.query(Order).filter(
-            Order.payment_intent_id == payment_intent_id
-        ).first()
-        
-        if order:
-            order.status = OrderStatus.CANCELLED
-            db.commit()
+    # Store the raw event - the sync session must not run on the event loop
+    if await run_in_threadpool(store_webhook_event, event):
+        webhook_inbox_worker.wake()
     
     return {"status": "success"}
-
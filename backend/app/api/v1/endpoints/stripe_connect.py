@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.db.base import get_db
+from app.db.async_session import get_async_db
 from app.models.user import User
 from app.core.dependencies import get_current_club_owner
 from app.core.stripe_connect_service import (
@@ -97,7 +99,7 @@ def get_connect_status(
 
 
 @router.post("/webhook")
-async def handle_connect_webhook(request: Request, db: Session = Depends(get_db)):
+async def handle_connect_webhook(request: Request, db=Depends(get_async_db)):
     """Handle Stripe Connect webhook events."""
     
     payload = await request.body()
@@ -130,14 +132,14 @@ async def handle_connect_webhook(request: Request, db: Session = Depends(get_db)
         account_id = account["id"]
         
         # Find user by stripe_account_id
-        user = db.query(User).filter(User.stripe_account_id == account_id).first()
+        user = await db.scalar(select(User).where(User.stripe_account_id == account_id))
         if user:
             user.stripe_account_status = (
                 "active" if account.get("charges_enabled") and account.get("payouts_enabled") else "pending"
             )
             user.stripe_charges_enabled = account.get("charges_enabled", False)
             user.stripe_payouts_enabled = account.get("payouts_enabled", False)
-            db.commit()
+            await db.commit()
     
     return {"status": "success"}
 
@@ -0,0 +1,142 @@
+"""
+Authenticated-user cache.
+
+Every authenticated request needs the caller's role, active flag and, for
+bartenders, their club. These change rarely, so they are kept in a short-TTL
+in-process LRU instead of being read from users/bartenders on every request.
+Code that changes them (role, is_active, bartender profiles) calls
+invalidate_cached_user() before committing: the local entry is dropped once
+the transaction commits and a Postgres NOTIFY tells the other workers to
+drop theirs. AUTH_CACHE_TTL_SECONDS bounds how stale an entry can get if a
+notification is missed.
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.notify import notify, notification_listener
+from app.models.user import UserRole
+
+USER_CHANNEL = "user_invalidated"
+
+
+@dataclass(frozen=True)
+class CachedIdentity:
+    """Authorization-relevant fields of a user."""
+    user_id: UUID
+    role: UserRole
+    is_active: bool
+    bartender_id: Optional[UUID]  # Active bartender profile, if any
+    club_id: Optional[UUID]  # Club of that profile
+    loaded_at: float
+
+
+class AuthCache:
+    """Bounded LRU of user identities; loads racing an invalidation are not stored."""
+
+    def __init__(self, max_users: int, ttl_seconds: int):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._identities: "OrderedDict[str, CachedIdentity]" = OrderedDict()
+        # [loads in flight, invalidations since the first of them started] per
+        # user being loaded. A load that raced an invalidation carries an old
+        # version and is not stored. Kept only while loads are in flight, so
+        # it stays as small as the number of concurrent requests
+        self._loads: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id) -> Optional[CachedIdentity]:
+        key = str(user_id)
+        with self._lock:
+            identity = self._identities.get(key)
+            if identity is not None and time.monotonic() - identity.loaded_at < self.ttl_seconds:
+                self._identities.move_to_end(key)
+                self.hits += 1
+                return identity
+            self.misses += 1
+            return None
+
+    @contextmanager
+    def loading(self, user_id):
+        """Wrap loading a user from the database; yields the version to pass to put()."""
+        key = str(user_id)
+        with self._lock:
+            load = self._loads.setdefault(key, [0, 0])
+            load[0] += 1
+            version = load[1]
+        try:
+            yield version
+        finally:
+            with self._lock:
+                load[0] -= 1
+                if load[0] == 0:
+                    del self._loads[key]
+
+    def put(self, identity: CachedIdentity, version: int) -> None:
+        key = str(identity.user_id)
+        with self._lock:
+            load = self._loads.get(key)
+            if load is not None and load[1] != version:
+                return
+            self._identities[key] = identity
+            self._identities.move_to_end(key)
+            while len(self._identities) > self.max_users:
+                self._identities.popitem(last=False)
+
+    def invalidate(self, user_id) -> None:
+        """Drop a user in this worker."""
+        key = str(user_id)
+        with self._lock:
+            if key in self._loads:
+                self._loads[key][1] += 1
+            self._identities.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every user in this worker."""
+        with self._lock:
+            for load in self._loads.values():
+                load[1] += 1
+            self._identities.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": len(self._identities),
+                "loading": len(self._loads),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Singleton instance
+auth_cache = AuthCache(settings.AUTH_CACHE_MAX_USERS, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_cached_user(db: Session, user_id) -> None:
+    """
+    Invalidate a user in every worker once the session commits.
+
+    Call before db.commit(). Nothing happens if the transaction rolls back.
+    """
+    key = str(user_id)
+    notify(db, USER_CHANNEL, key)
+    event.listen(db, "after_commit", lambda session: auth_cache.invalidate(key), once=True)
+
+
+def _on_user_notification(payload: str) -> None:
+    auth_cache.invalidate(payload)
+
+
+notification_listener.add_handler(USER_CHANNEL, _on_user_notification)
+# Invalidations sent while the listener was disconnected are lost
+notification_listener.add_reconnect_handler(auth_cache.clear)
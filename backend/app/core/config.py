@@ -6,16 +6,44 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
     SUPABASE_DB_URL: Optional[str] = None
+    DB_LISTEN_URL: Optional[str] = None  # Session-mode connection for LISTEN (the transaction pooler does not support it)
+    DB_SLOW_HOLD_WARNING_SECONDS: float = 1.0  # Log connections kept checked out longer than this
+    DB_ASYNC_ENABLED: bool = False  # Serve async endpoints from an asyncpg engine (requires asyncpg)
+    ASYNC_DATABASE_URL: Optional[str] = None  # Defaults to the database URL with the asyncpg driver
+    DB_ASYNC_POOL_SIZE: Optional[int] = None  # Taken out of the pool size below; defaults to half of it
+    DB_ASYNC_MAX_OVERFLOW: Optional[int] = None  # Taken out of the overflow below; defaults to half of it
+    # Pool sizing; unset values use defaults for the connection type (Supabase transaction/session pooler or direct)
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT_SECONDS: Optional[int] = None  # Checkout wait before giving up
+    DB_POOL_RECYCLE_SECONDS: Optional[int] = None
+    DB_READY_TIMEOUT_WINDOW_SECONDS: int = 30  # /health/ready fails while a pool checkout timed out this recently
+    DB_POOL_WARMUP_CONNECTIONS: int = 0  # Opened at startup before /health/ready passes (capped at the pool size)
+    
+    # Admission control for database-using requests (per worker)
+    DB_ADMISSION_ENABLED: bool = True
+    DB_ADMISSION_MAX_IN_FLIGHT: Optional[int] = None  # Defaults to the pool's size + overflow
+    DB_ADMISSION_RESERVED_SLOTS: int = 1  # Kept for bartender order writes
+    DB_ADMISSION_MAX_QUEUE: int = 50
+    DB_ADMISSION_QUEUE_TIMEOUT_MS: int = 500  # Longer waits get 503 instead
+    DB_ADMISSION_RETRY_AFTER_SECONDS: int = 2
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours (24 * 60 minutes)
+    QR_SIGNING_KEY: Optional[str] = None  # Defaults to a key derived from SECRET_KEY
     
     # Stripe
     STRIPE_SECRET_KEY: str
     STRIPE_PUBLISHABLE_KEY: str
     STRIPE_WEBHOOK_SECRET: Optional[str] = None
+    STRIPE_TIMEOUT_SECONDS: int = 20
+    STRIPE_MAX_NETWORK_RETRIES: int = 2  # Retries reuse the SDK's idempotency key
+    WEBHOOK_BATCH_SIZE: int = 100
+    WEBHOOK_POLL_INTERVAL_SECONDS: int = 2
+    WEBHOOK_MAX_ATTEMPTS: int = 10
+    WEBHOOK_EVENT_RETENTION_DAYS: int = 30  # Stripe redelivers for up to 3 days
     
     # OpenRouter
     OPENROUTER_KEY: Optional[str] = None
@@ -26,6 +54,42 @@ class Settings(BaseSettings):
     # Google Maps
     GOOGLE_MAPS_KEY: Optional[str] = None
     
+    # Bartender order feed
+    BARTENDER_READY_ORDER_TTL_MINUTES: int = 90  # READY orders untouched this long leave the hot feed
+    OFFLINE_SNAPSHOT_TTL_MINUTES: int = 15  # How long a device may scan against a snapshot before refreshing
+    OFFLINE_SNAPSHOT_SYNC_GRACE_MINUTES: int = 60  # Operations recorded offline may still be synced this long after the snapshot expired
+    
+    # Menu cache
+    MENU_CACHE_MAX_CLUBS: int = 512
+    MENU_CACHE_TTL_SECONDS: int = 300  # Safety net if a cross-worker invalidation is missed
+    
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # Work factor for new hashes; older hashes are upgraded on login
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # "thread" or "process"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16  # Running + queued; more fail fast with 503
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 2
+    
+    # Authenticated-user cache
+    AUTH_CACHE_MAX_USERS: int = 10000
+    AUTH_CACHE_TTL_SECONDS: int = 30  # Upper bound on how stale a role or deactivation can be
+    
+    # Idempotency keys (POST /orders)
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_RETRY_AFTER_SECONDS: int = 1  # Retry-After of a 409 for a key whose request is still in flight
+    IDEMPOTENCY_LOCK_SECONDS: int = 60  # After this an unfinished key is considered abandoned and can be taken over
+    
+    # Event-loop lag monitor
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_LAG_SAMPLE_INTERVAL_MS: int = 50
+    LOOP_LAG_THRESHOLD_MS: int = 100  # Stalls longer than this are logged with the blocking stack
+    LOOP_MONITOR_EXPOSE_STACKS: bool = False  # Show blocking stacks in /health/loop; they reveal code paths
+    
+    # Query budgets and N+1 detection (see app/core/query_budget.py)
+    QUERY_BUDGET_MODE: Optional[str] = None  # "off", "log" or "raise"; defaults to "log" in development
+    QUERY_BUDGET_DEFAULT: Optional[int] = None  # For endpoints without @query_budget; unset means no limit
+    QUERY_REPEAT_THRESHOLD: int = 3  # The same statement this many times in one request is an N+1 suspect
+    
     # App
     ENVIRONMENT: str = "development"
     API_V1_PREFIX: str = "/api/v1"
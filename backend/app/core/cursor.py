@@ -0,0 +1,21 @@
+import base64
+import json
+from typing import Any, Dict
+
+
+def encode_cursor(data: Dict[str, Any]) -> str:
+    """Encode cursor state as an opaque, URL-safe token."""
+    raw = json.dumps(data, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """Decode a token produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(data, dict):
+        raise ValueError("Invalid cursor")
+    return data
@@ -1,21 +1,104 @@
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from dataclasses import dataclass, field
 from typing import Optional
+from uuid import UUID
+import time
 from app.db.base import get_db
+from app.db.async_session import get_async_db
 from app.models.user import User, UserRole
+from app.models.bartender import Bartender
+from app.core.auth_cache import auth_cache, CachedIdentity
 from app.core.security import decode_access_token
 
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token."""
-    token = credentials.credentials
-    payload = decode_access_token(token)
+@dataclass
+class Principal:
+    """
+    The authenticated caller, resolved once per request.
+    
+    Built from the auth cache when possible; the full User row is only
+    loaded if an endpoint asks for principal.user.
+    """
+    id: UUID
+    role: UserRole
+    is_active: bool
+    bartender_id: Optional[UUID] = None  # Active bartender profile, if any
+    club_id: Optional[UUID] = None  # Club the caller works at as a bartender
+    _db: Optional[Session] = field(default=None, repr=False, compare=False)
+    _user: Optional[User] = field(default=None, repr=False, compare=False)
+
+    @property
+    def user(self) -> User:
+        if self._user is None:
+            self._user = self._db.get(User, self.id)
+        return self._user
+
+
+def _cached_principal(db: Session, user_id) -> Optional[Principal]:
+    identity = auth_cache.get(user_id)
+    if identity is None:
+        return None
+    return Principal(
+        id=identity.user_id,
+        role=identity.role,
+        is_active=identity.is_active,
+        bartender_id=identity.bartender_id,
+        club_id=identity.club_id,
+        _db=db,
+    )
+
+
+def _principal_query(user_id):
+    return select(User, Bartender).outerjoin(
+        Bartender,
+        (Bartender.user_id == User.id) & (Bartender.is_active == True),
+    ).where(User.id == user_id)
+
+
+def _principal_from_row(row, version: int, db: Optional[Session]) -> Optional[Principal]:
+    if row is None:
+        return None
+    
+    user, bartender = row.User, row.Bartender
+    identity = CachedIdentity(
+        user_id=user.id,
+        role=user.role,
+        is_active=user.is_active,
+        bartender_id=bartender.id if bartender else None,
+        club_id=bartender.club_id if bartender else None,
+        loaded_at=time.monotonic(),
+    )
+    auth_cache.put(identity, version)
+    return Principal(
+        id=user.id,
+        role=user.role,
+        is_active=user.is_active,
+        bartender_id=identity.bartender_id,
+        club_id=identity.club_id,
+        _db=db,
+        _user=user if db is not None else None,
+    )
+
+
+def _query_principal(db: Session, user_id) -> Optional[Principal]:
+    with auth_cache.loading(user_id) as version:
+        row = db.execute(_principal_query(user_id)).first()
+        return _principal_from_row(row, version, db)
+
+
+def load_principal(db: Session, user_id) -> Optional[Principal]:
+    """Resolve a user from the auth cache, or load them and their active bartender profile in one query."""
+    return _cached_principal(db, user_id) or _query_principal(db, user_id)
+
+
+def _token_user_id(credentials: HTTPAuthorizationCredentials) -> str:
+    payload = decode_access_token(credentials.credentials)
     
     if payload is None:
         raise HTTPException(
@@ -30,55 +113,123 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
-    
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+    return user_id
+
+
+def _check_principal(principal: Optional[Principal]) -> Principal:
+    if principal is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
     
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user",
         )
     
-    return user
+    return principal
 
 
-async def get_current_club_owner(
-    current_user: User = Depends(get_current_user)
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """
+    Get the authenticated principal from the JWT token.
+    
+    FastAPI caches dependencies per request, so every dependency below
+    shares this single lookup.
+    """
+    user_id = _token_user_id(credentials)
+    
+    # A cache hit needs no I/O; a miss queries off the event loop
+    principal = _cached_principal(db, user_id)
+    if principal is None:
+        principal = await run_in_threadpool(_query_principal, db, user_id)
+    return _check_principal(principal)
+
+
+async def get_current_principal_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db=Depends(get_async_db)
+) -> Principal:
+    """
+    get_current_principal for async endpoints, on the request's async session.
+    
+    Resolving the caller through get_db would check out a second connection
+    next to the one the endpoint uses. principal.user is not available here.
+    """
+    user_id = _token_user_id(credentials)
+    
+    principal = _cached_principal(None, user_id)
+    if principal is None:
+        try:
+            user_uuid = UUID(user_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+            )
+        with auth_cache.loading(user_id) as version:
+            row = (await db.execute(_principal_query(user_uuid))).first()
+            principal = _principal_from_row(row, version, None)
+        # End the read transaction so the connection goes back to the pool
+        # until the endpoint needs it (e.g. not while it waits on an API)
+        await db.rollback()
+    return _check_principal(principal)
+
+
+def get_current_user(
+    principal: Principal = Depends(get_current_principal)
 ) -> User:
-    """Ensure current user is a club owner."""
-    if current_user.role != UserRole.CLUB_OWNER:
+    """Get current authenticated user from JWT token (loads the full row)."""
+    # Sync so that loading the row runs in the threadpool
+    return principal.user
+
+
+async def get_club_owner_principal(
+    principal: Principal = Depends(get_current_principal)
+) -> Principal:
+    """Ensure current user is a club owner, without loading the user row."""
+    if principal.role != UserRole.CLUB_OWNER:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions. Club owner access required.",
         )
-    return current_user
+    return principal
 
 
-async def get_current_bartender(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_club_owner_principal_async(
+    principal: Principal = Depends(get_current_principal_async)
+) -> Principal:
+    """get_club_owner_principal for async endpoints (see get_current_principal_async)."""
+    return await get_club_owner_principal(principal)
+
+
+def get_current_club_owner(
+    principal: Principal = Depends(get_club_owner_principal)
 ) -> User:
-    """Ensure current user is a bartender."""
-    from app.models.bartender import Bartender
-    
-    if current_user.role != UserRole.BARTENDER:
+    """Ensure current user is a club owner (loads the full row)."""
+    return principal.user
+
+
+async def get_current_bartender(
+    principal: Principal = Depends(get_current_principal)
+) -> Principal:
+    """Ensure current user is a bartender with an active profile (principal.club_id is set)."""
+    if principal.role != UserRole.BARTENDER:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions. Bartender access required.",
         )
     
-    # Verify bartender profile exists
-    bartender = db.query(Bartender).filter(Bartender.user_id == current_user.id).first()
-    if not bartender or not bartender.is_active:
+    if principal.club_id is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Bartender profile not found or inactive.",
         )
     
-    return current_user
+    return principal
 
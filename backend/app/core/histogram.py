@@ -0,0 +1,58 @@
+"""
+Fixed-bucket histogram for in-process latency metrics.
+
+Buckets are cumulative upper bounds, as in Prometheus: an observation is
+counted in every bucket whose bound is >= the value.
+"""
+import bisect
+import threading
+from typing import Sequence
+
+# Milliseconds, from a fast query up to a request timeout
+DEFAULT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = 0.0
+            self.max = 0.0
+
+    def cumulative(self) -> list:
+        """(upper bound, cumulative count) pairs, ending with ("+Inf", count)."""
+        with self._lock:
+            counts = list(self._counts)
+        pairs = []
+        total = 0
+        for bound, bucket_count in zip(list(self.buckets) + ["+Inf"], counts):
+            total += bucket_count
+            pairs.append((bound, total))
+        return pairs
+
+    def snapshot(self) -> dict:
+        buckets = {str(bound): count for bound, count in self.cumulative()}
+        with self._lock:
+            return {
+                "count": self.count,
+                "sum": round(self.sum, 3),
+                "max": round(self.max, 3),
+                "buckets": buckets,
+            }
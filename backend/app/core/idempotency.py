@@ -0,0 +1,208 @@
+"""
+Idempotency-Key support for POST /orders.
+
+A client retrying a request with the same key gets the stored response back
+instead of creating another order (and another Stripe PaymentIntent). Keys
+are scoped per user, tied to a hash of the request body and expire after
+IDEMPOTENCY_KEY_TTL_HOURS.
+
+The first request claims the key by inserting its row. A concurrent request
+with the same key gets 409 with Retry-After straight away rather than
+waiting for the first one (and holding a worker thread while it does). The
+order is attached to the key before Stripe is called, so an order on its own
+does not mean the request finished: only once the lock is abandoned is the
+response rebuilt from the order, fetching the client secret of a card
+payment from Stripe again. A key is only released for a new attempt when
+its request failed without leaving an order behind.
+"""
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import stripe
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.order_serialization import load_order_response
+from app.core.stripe_service import retrieve_payment_intent
+from app.models.club import Club
+from app.models.idempotency_key import IdempotencyKey
+from app.models.order import OrderStatus, PaymentMethod
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def request_fingerprint(body: str) -> str:
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _get_record(db: Session, user_id, key: str) -> Optional[IdempotencyKey]:
+    return db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+    ).populate_existing().first()
+
+
+def _try_insert(db: Session, user_id, key: str, fingerprint: str, now: datetime) -> bool:
+    # Expired keys of this user are purged whenever they claim a new one
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.expires_at < now,
+    ).delete(synchronize_session=False)
+    db.add(IdempotencyKey(
+        user_id=user_id,
+        key=key,
+        request_hash=fingerprint,
+        locked_at=now,
+        expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+    ))
+    try:
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+
+def _try_take_over(db: Session, record: IdempotencyKey, now: datetime) -> bool:
+    # Only one waiter wins: the update matches the lock timestamp it saw
+    taken = db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == record.user_id,
+        IdempotencyKey.key == record.key,
+        IdempotencyKey.locked_at == record.locked_at,
+        IdempotencyKey.order_id.is_(None),
+    ).update({IdempotencyKey.locked_at: now}, synchronize_session=False)
+    db.commit()
+    return taken == 1
+
+
+def _unrecoverable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="The request with this Idempotency-Key did not finish; retry with a new key",
+    )
+
+
+def _recover_response(db: Session, record: IdempotencyKey) -> dict:
+    """Rebuild the response of an abandoned request whose order was committed."""
+    order = load_order_response(db, record.order_id)
+    if order is None:
+        raise _unrecoverable()
+    
+    if order.payment_method == PaymentMethod.CARD and order.status == OrderStatus.PENDING_PAYMENT:
+        # The client needs the client secret to pay, not the PaymentIntent id
+        if order.payment_intent_id is None:
+            raise _unrecoverable()
+        stripe_account_id = db.query(Club).filter(Club.id == order.club_id).one().owner.stripe_account_id
+        try:
+            payment_intent = retrieve_payment_intent(order.payment_intent_id, stripe_account_id)
+        except stripe.error.StripeError as e:
+            logger.error(f"Failed to retrieve payment intent for order {order.id}: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Payment provider is unavailable. Please try again.",
+            )
+        order = order.model_copy(update={"payment_intent_id": payment_intent.client_secret})
+    
+    response_body = order.model_dump(mode="json")
+    complete_idempotency_key(db, record.user_id, record.key, response_body)
+    return response_body
+
+
+def claim_idempotency_key(db: Session, user_id, key: str, fingerprint: str) -> Optional[dict]:
+    """
+    Claim an idempotency key for the current request.
+
+    Returns None when the caller owns the key and should process the request,
+    or the stored response body when the request was already processed.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be between 1 and {MAX_KEY_LENGTH} characters",
+        )
+
+    while True:
+        now = datetime.now(timezone.utc)
+        record = _get_record(db, user_id, key)
+
+        if record is None or _as_utc(record.expires_at) < now:
+            if record is not None:
+                db.delete(record)
+                db.flush()
+            if _try_insert(db, user_id, key, fingerprint, now):
+                return None
+            continue
+
+        if record.request_hash != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request",
+            )
+
+        if record.response_body is not None:
+            return record.response_body
+
+        # While the lock is fresh the first request may still be talking to
+        # Stripe, even when its order is already committed
+        lock_age = (now - _as_utc(record.locked_at)).total_seconds()
+        if lock_age > settings.IDEMPOTENCY_LOCK_SECONDS:
+            if record.order_id is not None:
+                # The order committed but its response was never stored
+                return _recover_response(db, record)
+            if _try_take_over(db, record, now):
+                return None
+
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed",
+            headers={"Retry-After": str(settings.IDEMPOTENCY_RETRY_AFTER_SECONDS)},
+        )
+
+
+def attach_order(db: Session, user_id, key: str, order_id) -> None:
+    """Record the created order in the same transaction that inserts it."""
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+    ).update({IdempotencyKey.order_id: order_id}, synchronize_session=False)
+
+
+def detach_order(db: Session, user_id, key: str) -> None:
+    """Unlink an order that was cancelled before the client got it, so the key can be released."""
+    attach_order(db, user_id, key, None)
+
+
+def complete_idempotency_key(db: Session, user_id, key: str, response_body: dict) -> None:
+    """Store the response to replay for later requests with the same key."""
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+    ).update({IdempotencyKey.response_body: response_body}, synchronize_session=False)
+    db.commit()
+
+
+def release_idempotency_key(db: Session, user_id, key: str) -> None:
+    """
+    Forget a key whose request failed so that a retry is processed again.
+
+    A key with an order attached is kept locked: the order was committed,
+    so a retry must get that order back (once the lock is abandoned) rather
+    than create a second one.
+    """
+    db.rollback()
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.order_id.is_(None),
+    ).delete(synchronize_session=False)
+    db.commit()
@@ -0,0 +1,176 @@
+"""
+Event-loop lag monitor.
+
+Synchronous work inside an `async def` endpoint or dependency (a query,
+bcrypt, a blocking HTTP call) stalls the event loop, and every other request
+on the worker waits behind it. The access log only shows the victims, so
+the culprit is found here:
+
+- A sampler task sleeps LOOP_LAG_SAMPLE_INTERVAL_MS at a time and records
+  how late it wakes up (the loop lag) in a histogram.
+- A watchdog thread notices when the sampler has been held up for more
+  than LOOP_LAG_THRESHOLD_MS. It captures the event loop thread's stack and
+  the route of the request running on it, and logs both once per stall.
+  When the stall ends, its length is recorded in that route's histogram.
+
+LoopLagMiddleware tells the monitor which request each task is serving.
+Stacks only go to the log unless LOOP_MONITOR_EXPOSE_STACKS is set, since
+/health/loop is unauthenticated.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.histogram import Histogram
+from app.core.request_metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+STACK_DEPTH = 30  # Innermost frames kept per captured stall
+RECENT_STALLS = 20
+
+
+class LoopLagMonitor:
+    def __init__(self, sample_interval: float, threshold: float):
+        self.sample_interval = sample_interval
+        self.threshold = threshold
+        self.lag = Histogram()
+        self.route_lag: Dict[str, Histogram] = {}
+        self.recent_stalls = deque(maxlen=RECENT_STALLS)
+        self._lock = threading.Lock()
+        self._task_scopes: "weakref.WeakKeyDictionary[asyncio.Task, dict]" = weakref.WeakKeyDictionary()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        self._stall: Optional[dict] = None  # Captured by the watchdog, closed by the sampler
+        self._sampler: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def track(self, task: asyncio.Task, scope: dict) -> None:
+        self._task_scopes[task] = scope
+
+    def untrack(self, task: asyncio.Task) -> None:
+        self._task_scopes.pop(task, None)
+
+    def start(self) -> None:
+        """Start sampling the running loop. Must be called from the loop's thread."""
+        if self._sampler is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stop.clear()
+        self._sampler = self._loop.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.cancel()
+            self._sampler = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _sample(self) -> None:
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            now = time.perf_counter()
+            with self._lock:
+                lag = max(now - self._heartbeat - self.sample_interval, 0.0)
+                self._heartbeat = now
+                stall, self._stall = self._stall, None
+            lag_ms = lag * 1000
+            self.lag.observe(lag_ms)
+            if stall is not None:
+                stall["lag_ms"] = round(lag_ms, 1)
+                self._route_histogram(stall["route"]).observe(lag_ms)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.threshold / 2):
+            with self._lock:
+                blocked = time.perf_counter() - self._heartbeat - self.sample_interval
+                if blocked < self.threshold or self._stall is not None:
+                    continue
+                self._stall = stall = self._capture(blocked)
+            self.recent_stalls.append(stall)
+            logger.warning(
+                f"Event loop blocked for {stall['blocked_ms']:.0f}ms+ in {stall['route']}\n"
+                + "".join(stall["stack"])
+            )
+
+    def _capture(self, blocked: float) -> dict:
+        # Reading another thread's frame and current task is a snapshot; the
+        # loop thread is stuck in the blocking call while we look
+        frame = sys._current_frames().get(self._loop_thread_id)
+        task = asyncio.current_task(self._loop)
+        scope = self._task_scopes.get(task) if task is not None else None
+        return {
+            "route": route_label(scope) if scope is not None else "background",
+            "blocked_ms": round(blocked * 1000, 1),
+            "lag_ms": None,
+            "at": time.time(),
+            "stack": traceback.format_stack(frame, limit=STACK_DEPTH) if frame is not None else [],
+        }
+
+    def _route_histogram(self, route: str) -> Histogram:
+        with self._lock:
+            histogram = self.route_lag.get(route)
+            if histogram is None:
+                histogram = self.route_lag[route] = Histogram()
+            return histogram
+
+    def route_stalls(self) -> Dict[str, Histogram]:
+        """Stall length histograms by route label."""
+        with self._lock:
+            return dict(self.route_lag)
+
+    def stats(self, include_stacks: bool = False) -> dict:
+        routes = self.route_stalls()
+        stalls = list(self.recent_stalls)
+        if not include_stacks:
+            stalls = [{key: value for key, value in stall.items() if key != "stack"} for stall in stalls]
+        return {
+            "running": self._sampler is not None,
+            "sample_interval_ms": self.sample_interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": self.lag.snapshot(),
+            "stalls_by_route_ms": {route: histogram.snapshot() for route, histogram in routes.items()},
+            "recent_stalls": stalls,
+        }
+
+
+class LoopLagMiddleware:
+    """ASGI middleware that registers each request's task with the loop monitor."""
+
+    def __init__(self, app, monitor: "LoopLagMonitor" = None):
+        self.app = app
+        self.monitor = monitor or loop_monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        # The router adds the matched route to this same scope dict later on
+        task = asyncio.current_task()
+        self.monitor.track(task, scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.untrack(task)
+
+
+# Singleton instance
+loop_monitor = LoopLagMonitor(
+    settings.LOOP_LAG_SAMPLE_INTERVAL_MS / 1000,
+    settings.LOOP_LAG_THRESHOLD_MS / 1000,
+)
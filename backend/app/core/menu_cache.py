@@ -0,0 +1,147 @@
+"""
+Per-club menu cache.
+
+A club's menu rarely changes during a night, so list_drinks and cart pricing
+read it from an in-process LRU instead of the drinks table. Every write path
+calls invalidate_club_menu() before committing: the local entry is dropped
+once the transaction commits and a Postgres NOTIFY tells the other workers
+to drop theirs. Entries also expire after MENU_CACHE_TTL_SECONDS in case a
+notification is missed.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.notify import notify, notify_async, notification_listener
+from app.models.drink import Drink
+from app.schemas.drink import DrinkResponse
+
+logger = logging.getLogger(__name__)
+
+MENU_CHANNEL = "menu_invalidated"
+
+
+@dataclass(frozen=True)
+class ClubMenu:
+    """Snapshot of every drink of a club, available or not."""
+    version: int
+    loaded_at: float
+    drinks: Dict[UUID, DrinkResponse]
+
+    def available_drinks(self) -> List[DrinkResponse]:
+        return [drink for drink in self.drinks.values() if drink.is_available]
+
+
+class MenuCache:
+    """Bounded LRU of club menus; loads racing an invalidation are not stored."""
+
+    def __init__(self, max_clubs: int, ttl_seconds: int):
+        self.max_clubs = max_clubs
+        self.ttl_seconds = ttl_seconds
+        self._menus: "OrderedDict[str, ClubMenu]" = OrderedDict()
+        # [loads in flight, invalidations since the first of them started] per
+        # club being loaded. A load that raced an invalidation carries an old
+        # version and is not stored. Kept only while loads are in flight
+        self._loads: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, club_id) -> ClubMenu:
+        """Return the club's menu, loading it from the database on a miss."""
+        key = str(club_id)
+        now = time.monotonic()
+        with self._lock:
+            menu = self._menus.get(key)
+            if menu is not None and now - menu.loaded_at < self.ttl_seconds:
+                self._menus.move_to_end(key)
+                self.hits += 1
+                return menu
+            self.misses += 1
+            load = self._loads.setdefault(key, [0, 0])
+            load[0] += 1
+            version = load[1]
+
+        menu = None
+        try:
+            drinks = db.query(Drink).filter(Drink.club_id == UUID(key)).all()
+            menu = ClubMenu(
+                version=version,
+                loaded_at=now,
+                drinks={drink.id: DrinkResponse.model_validate(drink) for drink in drinks},
+            )
+        finally:
+            # Stored while the load still counts as in flight, so an
+            # invalidation cannot slip in between the check and the store
+            with self._lock:
+                if menu is not None and load[1] == version:
+                    self._menus[key] = menu
+                    self._menus.move_to_end(key)
+                    while len(self._menus) > self.max_clubs:
+                        self._menus.popitem(last=False)
+                load[0] -= 1
+                if load[0] == 0:
+                    del self._loads[key]
+        return menu
+
+    def invalidate(self, club_id) -> None:
+        """Drop a club's menu in this worker."""
+        key = str(club_id)
+        with self._lock:
+            if key in self._loads:
+                self._loads[key][1] += 1
+            self._menus.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every menu in this worker."""
+        with self._lock:
+            for load in self._loads.values():
+                load[1] += 1
+            self._menus.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"clubs": len(self._menus), "loading": len(self._loads), "hits": self.hits, "misses": self.misses}
+
+
+# Singleton instance
+menu_cache = MenuCache(settings.MENU_CACHE_MAX_CLUBS, settings.MENU_CACHE_TTL_SECONDS)
+
+
+def get_club_menu(db: Session, club_id) -> ClubMenu:
+    return menu_cache.get(db, club_id)
+
+
+def invalidate_club_menu(db: Session, club_id) -> None:
+    """
+    Invalidate a club's menu in every worker once the session commits.
+
+    Call before db.commit(). Nothing happens if the transaction rolls back.
+    """
+    key = str(club_id)
+    notify(db, MENU_CHANNEL, key)
+    event.listen(db, "after_commit", lambda session: menu_cache.invalidate(key), once=True)
+
+
+async def invalidate_club_menu_async(db, club_id) -> None:
+    """invalidate_club_menu() for an AsyncSession (or ThreadedSession)."""
+    key = str(club_id)
+    await notify_async(db, MENU_CHANNEL, key)
+    event.listen(db.sync_session, "after_commit", lambda session: menu_cache.invalidate(key), once=True)
+
+
+def _on_menu_notification(payload: str) -> None:
+    menu_cache.invalidate(payload)
+
+
+notification_listener.add_handler(MENU_CHANNEL, _on_menu_notification)
+# Invalidations sent while the listener was disconnected are lost
+notification_listener.add_reconnect_handler(menu_cache.clear)
@@ -0,0 +1,215 @@
+"""
+Offline bartender scanning.
+
+A bartender device downloads a snapshot of the club's scannable orders
+while it is online. Each order is listed under a short hash of its QR code,
+sorted, so the device can recognise a scanned code with a binary search and
+show the order without a network round trip. Raw QR codes are not shipped:
+a leaked snapshot does not hand out redeemable codes.
+
+Scans and status changes made while offline are queued on the device and
+sent back in one sync. The server replays them in the order they happened
+against the current state of the orders (locked for the duration), so
+conflicts - an order cancelled online meanwhile, or prepared by another
+bartender - are resolved here with the same state machine as online
+updates, and all resulting changes are written with one UPDATE per target
+status.
+"""
+import hashlib
+import time
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.order_state_machine import (
+    BARTENDER_TRANSITIONS,
+    PAYMENT_TRANSITIONS,
+    can_transition,
+    sources_for,
+    transition_orders,
+    rows_to_responses,
+)
+from app.core.qr_service import sign_snapshot, verify_qr_token, validate_qr_code
+from app.models.order import Order, OrderStatus, PaymentMethod
+from app.schemas.order import (
+    OrderResponse,
+    OfflineOrder,
+    OfflineOrderItem,
+    OfflineSnapshot,
+    OfflineOperation,
+    OfflineOperationResult,
+)
+
+CODE_HASH_LENGTH = 16  # Hex chars (64 bits) - plenty to tell a club's open orders apart
+
+
+def code_hash(qr_code: str) -> str:
+    """Short hash a device computes from a scanned code to look it up in the snapshot."""
+    return hashlib.sha256(qr_code.encode()).hexdigest()[:CODE_HASH_LENGTH]
+
+
+def snapshot_too_old(generated_at: int) -> bool:
+    """Whether operations recorded against this snapshot are too late to sync."""
+    max_age = (settings.OFFLINE_SNAPSHOT_TTL_MINUTES + settings.OFFLINE_SNAPSHOT_SYNC_GRACE_MINUTES) * 60
+    return time.time() - generated_at > max_age
+
+
+def build_snapshot(club_id: UUID, orders: List[OrderResponse]) -> OfflineSnapshot:
+    """Build a signed snapshot of the given (active) orders."""
+    generated_at = int(time.time())
+    entries = [
+        OfflineOrder(
+            code_hash=code_hash(order.qr_code) if order.qr_code else None,
+            order_id=order.id,
+            status=order.status,
+            payment_method=order.payment_method,
+            total_amount=order.total_amount,
+            items=[OfflineOrderItem(drink_name=item.drink_name, quantity=item.quantity) for item in order.items],
+        )
+        for order in orders
+    ]
+    # Orders without a code (never scannable) go last
+    entries.sort(key=lambda entry: (entry.code_hash is None, entry.code_hash or ""))
+    return OfflineSnapshot(
+        club_id=str(club_id),
+        generated_at=generated_at,
+        expires_at=generated_at + settings.OFFLINE_SNAPSHOT_TTL_MINUTES * 60,
+        signature=sign_snapshot(club_id, generated_at),
+        orders=entries,
+    )
+
+
+def _resolve(op: OfflineOperation, club_id: UUID):
+    """
+    Work out which order an operation refers to, without the database.
+
+    Returns (key, None) where key is ("id", UUID) or ("code", str), or
+    (None, error) if the operation is rejected outright.
+    """
+    if op.kind == "scan":
+        if not op.qr_code:
+            return None, "qr_code is required for a scan"
+        token = verify_qr_token(op.qr_code)
+        if token is not None:
+            if token.club_id != club_id:
+                return None, "Order not found or QR code invalid"
+            return ("id", token.order_id), None
+        if validate_qr_code(op.qr_code):
+            return ("code", op.qr_code), None
+        return None, "Order not found or QR code invalid"
+
+    if not op.order_id:
+        return None, "order_id is required"
+    try:
+        order_uuid = UUID(op.order_id)
+    except ValueError:
+        return None, "Invalid order ID format"
+    if op.kind == "status":
+        if op.status is None:
+            return None, "status is required for a status change"
+        if not sources_for(op.status, BARTENDER_TRANSITIONS):
+            return None, f"Cannot transition to {op.status.value}"
+    return ("id", order_uuid), None
+
+
+def apply_offline_operations(
+    db: Session,
+    club_id: UUID,
+    operations: List[OfflineOperation],
+) -> Tuple[List[OfflineOperationResult], List[OrderResponse]]:
+    """
+    Replay offline operations against the club's orders.
+
+    Returns one result per operation (in request order) and the orders that
+    changed. Does not commit.
+    """
+    results: Dict[int, OfflineOperationResult] = {}
+    keys: Dict[int, tuple] = {}
+    for index, op in enumerate(operations):
+        key, error = _resolve(op, club_id)
+        if error:
+            results[index] = OfflineOperationResult(op_id=op.op_id, outcome="rejected", order_id=op.order_id, error=error)
+        else:
+            keys[index] = key
+
+    order_ids = [value for kind, value in keys.values() if kind == "id"]
+    codes = [value for kind, value in keys.values() if kind == "code"]
+    rows = []
+    if keys:
+        # Locked so that online updates wait for the replay instead of racing it
+        rows = db.query(Order.id, Order.qr_code, Order.status, Order.payment_method).filter(
+            Order.club_id == club_id,
+            or_(Order.id.in_(order_ids), Order.qr_code.in_(codes)),
+        ).with_for_update().all()
+    by_id = {row.id: row for row in rows}
+    by_code = {row.qr_code: row for row in rows if row.qr_code}
+
+    original = {row.id: row.status for row in rows}
+    current = dict(original)
+    touched: Dict[int, UUID] = {}
+    # Replay in the order things happened on the bar; ties keep request order
+    for index in sorted(keys, key=lambda i: operations[i].performed_at):
+        op = operations[index]
+        kind, value = keys[index]
+        row = by_id.get(value) if kind == "id" else by_code.get(value)
+        if row is None or (op.kind == "scan" and row.qr_code != op.qr_code):
+            results[index] = OfflineOperationResult(
+                op_id=op.op_id, outcome="rejected", order_id=op.order_id, error="Order not found or QR code invalid",
+            )
+            continue
+
+        status_now = current[row.id]
+        touched[index] = row.id
+        if op.kind == "scan":
+            target, transitions = OrderStatus.PREPARING, BARTENDER_TRANSITIONS
+            if row.payment_method == PaymentMethod.CASH and status_now == OrderStatus.PENDING_PAYMENT:
+                results[index] = OfflineOperationResult(
+                    op_id=op.op_id, outcome="conflict", error="Cash payment has not been confirmed",
+                )
+                continue
+        elif op.kind == "confirm_payment":
+            target, transitions = OrderStatus.PAID, PAYMENT_TRANSITIONS
+            if row.payment_method != PaymentMethod.CASH:
+                results[index] = OfflineOperationResult(
+                    op_id=op.op_id, outcome="rejected", error="Not a cash payment",
+                )
+                continue
+        else:
+            target, transitions = op.status, BARTENDER_TRANSITIONS
+
+        if can_transition(status_now, target, transitions):
+            current[row.id] = target
+            results[index] = OfflineOperationResult(op_id=op.op_id, outcome="applied")
+        elif status_now == target:
+            # Already done - by another device, or this sync is a retry
+            results[index] = OfflineOperationResult(op_id=op.op_id, outcome="unchanged")
+        else:
+            results[index] = OfflineOperationResult(
+                op_id=op.op_id,
+                outcome="conflict",
+                error=f"Order status is {status_now.value}, cannot move to {target.value}",
+            )
+
+    # Only each order's final status is written, one UPDATE per target status
+    order_ids_by_target: Dict[OrderStatus, List[UUID]] = {}
+    for order_id, status in current.items():
+        if status != original[order_id]:
+            order_ids_by_target.setdefault(status, []).append(order_id)
+    updated = []
+    for target, ids in order_ids_by_target.items():
+        updated.extend(transition_orders(
+            db,
+            target,
+            {original[order_id] for order_id in ids},
+            Order.id.in_(ids),
+            Order.club_id == club_id,
+        ))
+    changed = rows_to_responses(db, updated)
+
+    for index, order_id in touched.items():
+        results[index].order_id = str(order_id)
+        results[index].status = current[order_id]
+    return [results[index] for index in range(len(operations))], changed
@@ -0,0 +1,125 @@
+"""
+Live order events for bartender devices.
+
+Endpoints publish order-created, paid and status-changed events after they
+commit; every bartender device connected to the club's live channel receives
+the changed order instead of re-downloading the whole queue.
+"""
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from app.schemas.order import OrderResponse
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order.created"
+ORDER_PAID = "order.paid"
+ORDER_STATUS_CHANGED = "order.status_changed"
+# Several orders changed at once - carries "orders" instead of "order"
+ORDERS_STATUS_CHANGED = "orders.status_changed"
+
+# Sent to a subscriber whose queue overflowed - it must reload a fresh snapshot
+RESYNC = "resync"
+
+
+class OrderEventBroker:
+    """In-process publish/subscribe hub with one channel per club."""
+
+    def __init__(self, max_queue_size: int = 256):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, club_id) -> asyncio.Queue:
+        """Register a subscriber for a club. Must be called from the event loop."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.setdefault(str(club_id), set()).add(queue)
+        return queue
+
+    def unsubscribe(self, club_id, queue: asyncio.Queue) -> None:
+        """Remove a subscriber registered with subscribe()."""
+        with self._lock:
+            queues = self._subscribers.get(str(club_id))
+            if queues is None:
+                return
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[str(club_id)]
+
+    def subscriber_count(self, club_id) -> int:
+        with self._lock:
+            return len(self._subscribers.get(str(club_id), ()))
+
+    def publish(self, club_id, event: Dict[str, Any]) -> None:
+        """
+        Deliver an event to every subscriber of a club.
+
+        Safe to call from sync endpoints running in the threadpool as well as
+        from coroutines on the event loop.
+        """
+        with self._lock:
+            queues = list(self._subscribers.get(str(club_id), ()))
+            loop = self._loop
+
+        if not queues or loop is None:
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is loop:
+            self._deliver(queues, event)
+            return
+
+        try:
+            loop.call_soon_threadsafe(self._deliver, queues, event)
+        except RuntimeError:
+            # Event loop already closed (shutdown) - nobody is listening anymore
+            logger.debug("Dropping order event, event loop is closed")
+
+    @staticmethod
+    def _deliver(queues, event: Dict[str, Any]) -> None:
+        for queue in queues:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Device is not keeping up: drop its backlog and make it resync
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": RESYNC})
+
+
+# Singleton instance
+order_event_broker = OrderEventBroker()
+
+
+def publish_order_event(event_type: str, order: OrderResponse) -> None:
+    """Publish an order event to the order's club channel."""
+    try:
+        order_event_broker.publish(
+            order.club_id,
+            {"type": event_type, "order": order.model_dump(mode="json")},
+        )
+    except Exception as e:
+        # Live updates are best effort - never fail the request that committed
+        logger.error(f"Failed to publish {event_type} for order {order.id}: {e}")
+
+
+def publish_orders_event(event_type: str, club_id, orders: List[OrderResponse]) -> None:
+    """Publish one event carrying several orders of the same club."""
+    if not orders:
+        return
+    try:
+        order_event_broker.publish(
+            club_id,
+            {"type": event_type, "orders": [order.model_dump(mode="json") for order in orders]},
+        )
+    except Exception as e:
+        logger.error(f"Failed to publish {event_type} for {len(orders)} orders: {e}")
@@ -0,0 +1,68 @@
+"""
+Order serialization shared by the order, bartender and payment endpoints.
+
+Orders are loaded with their club name, items and drink names in a fixed
+number of queries (one for orders + club, one for items + drinks) no matter
+how many orders or items are involved.
+"""
+from typing import Iterable, List, Optional
+from sqlalchemy.orm import Session, Query, joinedload, selectinload
+from app.models.club import Club
+from app.models.drink import Drink
+from app.models.order import Order, OrderItem
+from app.schemas.order import OrderResponse
+
+# Loader options that make order_to_response() run without lazy loads
+ORDER_DETAIL_OPTIONS = (
+    joinedload(Order.club).load_only(Club.name),
+    selectinload(Order.items).joinedload(OrderItem.drink).load_only(Drink.name),
+)
+
+
+def with_order_details(query: Query) -> Query:
+    """Apply the eager-loading options needed to serialize the queried orders."""
+    return query.options(*ORDER_DETAIL_OPTIONS)
+
+
+def build_order_response(order: Order, items: List[dict], club_name: Optional[str]) -> OrderResponse:
+    """Build an OrderResponse from an order row and already serialized items."""
+    return OrderResponse(
+        id=str(order.id),
+        customer_id=str(order.customer_id),
+        club_id=str(order.club_id),
+        club_name=club_name,
+        total_amount=order.total_amount,
+        payment_method=order.payment_method,
+        status=order.status,
+        qr_code=order.qr_code,
+        payment_intent_id=order.payment_intent_id,
+        items=items,
+        created_at=order.created_at,
+        updated_at=order.updated_at,
+        completed_at=order.completed_at,
+    )
+
+
+def order_to_response(order: Order) -> OrderResponse:
+    """Build an OrderResponse from an order loaded with with_order_details()."""
+    items = [
+        {
+            'id': str(item.id),
+            'drink_id': str(item.drink_id),
+            'quantity': item.quantity,
+            'price_at_purchase': item.price_at_purchase,
+            'drink_name': item.drink.name if item.drink else None,
+        }
+        for item in order.items
+    ]
+    return build_order_response(order, items, order.club.name if order.club else None)
+
+
+def orders_to_responses(orders: Iterable[Order]) -> List[OrderResponse]:
+    return [order_to_response(order) for order in orders]
+
+
+def load_order_response(db: Session, order_id) -> Optional[OrderResponse]:
+    """Load a single order with its details and serialize it."""
+    order = with_order_details(db.query(Order).filter(Order.id == order_id)).first()
+    return order_to_response(order) if order else None
@@ -0,0 +1,113 @@
+"""
+Order state machine.
+
+Single source of the allowed order status transitions. Every transition is
+applied as one conditional UPDATE ... WHERE status IN (<allowed sources>)
+RETURNING, so two bartenders acting on the same order cannot both succeed:
+the loser's UPDATE matches no row. Endpoints only read the order then, to
+tell the client why it did not move.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.models.club import Club
+from app.models.drink import Drink
+from app.models.order import Order, OrderItem, OrderStatus
+from app.schemas.order import OrderResponse
+from app.core.order_serialization import build_order_response
+
+# Status changes a bartender makes by hand (and by scanning a QR code)
+BARTENDER_TRANSITIONS: Dict[OrderStatus, Set[OrderStatus]] = {
+    OrderStatus.PAID: {OrderStatus.PREPARING, OrderStatus.CANCELLED},
+    OrderStatus.PREPARING: {OrderStatus.READY, OrderStatus.CANCELLED},
+    OrderStatus.READY: {OrderStatus.COMPLETED, OrderStatus.CANCELLED},
+}
+
+# Payment outcomes: cash confirmation, Stripe webhooks, failed intent creation
+PAYMENT_TRANSITIONS: Dict[OrderStatus, Set[OrderStatus]] = {
+    OrderStatus.PENDING_PAYMENT: {OrderStatus.PAID, OrderStatus.CANCELLED},
+}
+
+
+def sources_for(target: OrderStatus, transitions: Dict[OrderStatus, Set[OrderStatus]]) -> Set[OrderStatus]:
+    """Statuses an order may be in to move to target."""
+    return {source for source, targets in transitions.items() if target in targets}
+
+
+def can_transition(current: OrderStatus, target: OrderStatus, transitions: Dict[OrderStatus, Set[OrderStatus]]) -> bool:
+    return target in transitions.get(current, set())
+
+
+def payment_succeeded_applies(current: OrderStatus, qr_code: Optional[str]) -> bool:
+    """Whether a successful card payment moves the order to PAID."""
+    # A failed attempt cancels the order without a QR code, but the customer
+    # may still pay the same intent afterwards. Orders cancelled after payment
+    # (they have a QR code) are left alone.
+    if current == OrderStatus.CANCELLED and qr_code is None:
+        return True
+    return can_transition(current, OrderStatus.PAID, PAYMENT_TRANSITIONS)
+
+
+def payment_failed_applies(current: OrderStatus) -> bool:
+    """Whether a failed card payment cancels the order - never after it was paid."""
+    return can_transition(current, OrderStatus.CANCELLED, PAYMENT_TRANSITIONS)
+
+
+def _club_name():
+    return select(Club.name).where(Club.id == Order.club_id).scalar_subquery()
+
+
+def transition_orders(
+    db: Session,
+    target: OrderStatus,
+    from_statuses: Iterable[OrderStatus],
+    *conditions,
+    values: Optional[dict] = None,
+) -> List:
+    """
+    Move every order matching conditions from one of from_statuses to target.
+
+    Runs a single UPDATE ... RETURNING and returns the updated rows (order
+    columns plus club_name). Orders that did not match are simply absent.
+    Does not commit.
+    """
+    changes = {Order.status: target}
+    if target == OrderStatus.COMPLETED:
+        changes[Order.completed_at] = func.now()
+    if values:
+        changes.update(values)
+
+    statement = (
+        update(Order)
+        .where(Order.status.in_(list(from_statuses)), *conditions)
+        .values(changes)
+        .returning(*Order.__table__.c, _club_name().label("club_name"))
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(statement).all()
+
+
+def rows_to_responses(db: Session, rows: List) -> List[OrderResponse]:
+    """Serialize rows returned by transition_orders(), loading all their items in one query."""
+    if not rows:
+        return []
+    items_by_order: Dict = {row.id: [] for row in rows}
+    item_rows = db.query(
+        OrderItem.id,
+        OrderItem.order_id,
+        OrderItem.drink_id,
+        OrderItem.quantity,
+        OrderItem.price_at_purchase,
+        Drink.name,
+    ).outerjoin(Drink, Drink.id == OrderItem.drink_id).filter(OrderItem.order_id.in_(list(items_by_order)))
+    for item in item_rows:
+        items_by_order[item.order_id].append({
+            'id': str(item.id),
+            'drink_id': str(item.drink_id),
+            'quantity': item.quantity,
+            'price_at_purchase': item.price_at_purchase,
+            'drink_name': item.name,
+        })
+    return [build_order_response(row, items_by_order[row.id], row.club_name) for row in rows]
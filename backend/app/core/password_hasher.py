@@ -0,0 +1,100 @@
+"""
+Bounded executor for bcrypt.
+
+bcrypt is deliberately slow (~250 ms per hash at cost 12). Run on the
+request threads, a burst of logins at doors-open takes every worker thread
+and the CPU with it, and unrelated requests queue behind them. Here hashing
+runs on PASSWORD_HASH_WORKERS dedicated threads (bcrypt releases the GIL) or
+processes. At most PASSWORD_HASH_MAX_PENDING hashes may be running or queued;
+beyond that PasswordHasherBusy is raised straight away so the endpoint can
+answer 503 with Retry-After instead of letting the backlog grow.
+"""
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hashes are already running or queued."""
+
+
+class PasswordHasher:
+    def __init__(self, kind: str, workers: int, max_pending: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        # Created on first use so that importing the app never forks
+        with self._executor_lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    def _release(self, _future) -> None:
+        with self._executor_lock:
+            self._pending -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._executor_lock:
+                self.rejected += 1
+            raise PasswordHasherBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._executor_lock:
+            self._pending += 1
+        future.add_done_callback(self._release)
+        return future.result()
+
+    def hash(self, password: str) -> str:
+        """Hash a password with BCRYPT_ROUNDS. Raises PasswordHasherBusy when saturated."""
+        return self._run(get_password_hash, password, settings.BCRYPT_ROUNDS)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        """Check a password. Raises PasswordHasherBusy when saturated."""
+        return self._run(verify_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> dict:
+        with self._executor_lock:
+            return {
+                "executor": self.kind,
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+# Singleton instance
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_EXECUTOR,
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_MAX_PENDING,
+)
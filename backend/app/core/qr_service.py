@@ -1,16 +1,92 @@
+"""
+Order QR codes.
+
+New codes are self-verifying tokens: order ID, club ID and issue time,
+signed with HMAC-SHA256 (truncated to 128 bits) and base64url encoded. A
+scan can reject malformed, forged or foreign-club codes without touching
+the database and find a valid order by primary key.
+
+Codes issued before signed tokens existed are plain UUIDs; they are still
+accepted and looked up by value.
+"""
+import base64
+import hashlib
+import hmac
+import struct
+import time
 import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+
+TOKEN_VERSION = 1
+SIGNATURE_BYTES = 16
+# version (1) + order id (16) + club id (16) + issued at (4)
+_PAYLOAD = struct.Struct(">B16s16sI")
+TOKEN_BYTES = _PAYLOAD.size + SIGNATURE_BYTES
+
+
+def _signing_key() -> bytes:
+    if settings.QR_SIGNING_KEY:
+        return settings.QR_SIGNING_KEY.encode()
+    # Derived so that QR tokens never share a key with JWTs
+    return hmac.new(settings.SECRET_KEY.encode(), b"clubverse-qr-token", hashlib.sha256).digest()
+
+
+_KEY = _signing_key()
+
+
+@dataclass(frozen=True)
+class QRToken:
+    order_id: uuid.UUID
+    club_id: uuid.UUID
+    issued_at: int  # Unix seconds
+
 
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(_KEY, payload, hashlib.sha256).digest()[:SIGNATURE_BYTES]
 
-def generate_qr_code() -> str:
-    """Generate a unique QR code (UUID as string)."""
-    return str(uuid.uuid4())
+
+def generate_qr_code(order_id: uuid.UUID, club_id: uuid.UUID) -> str:
+    """Generate a signed QR token for an order."""
+    payload = _PAYLOAD.pack(TOKEN_VERSION, order_id.bytes, club_id.bytes, int(time.time()))
+    return base64.urlsafe_b64encode(payload + _sign(payload)).rstrip(b"=").decode()
+
+
+def verify_qr_token(qr_code: str) -> Optional[QRToken]:
+    """Decode and verify a signed QR token. Returns None if it is malformed or forged."""
+    try:
+        raw = base64.urlsafe_b64decode(qr_code + "=" * (-len(qr_code) % 4))
+    except (ValueError, TypeError):
+        return None
+    if len(raw) != TOKEN_BYTES:
+        return None
+
+    payload, signature = raw[:_PAYLOAD.size], raw[_PAYLOAD.size:]
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    version, order_id, club_id, issued_at = _PAYLOAD.unpack(payload)
+    if version != TOKEN_VERSION:
+        return None
+    return QRToken(order_id=uuid.UUID(bytes=order_id), club_id=uuid.UUID(bytes=club_id), issued_at=issued_at)
+
+
+def sign_snapshot(club_id: uuid.UUID, generated_at: int) -> str:
+    """Sign an offline scanning snapshot header (club and generation time)."""
+    signature = _sign(b"snapshot:" + club_id.bytes + struct.pack(">I", generated_at))
+    return base64.urlsafe_b64encode(signature).rstrip(b"=").decode()
+
+
+def verify_snapshot_signature(club_id: uuid.UUID, generated_at: int, signature: str) -> bool:
+    # Compared as bytes: compare_digest rejects str with non-ASCII characters
+    return hmac.compare_digest(sign_snapshot(club_id, generated_at).encode(), signature.encode())
 
 
 def validate_qr_code(qr_code: str) -> bool:
-    """Validate QR code format (should be UUID)."""
+    """Validate a legacy QR code (plain UUID)."""
     try:
         uuid.UUID(qr_code)
         return True
     except (ValueError, AttributeError):
         return False
-
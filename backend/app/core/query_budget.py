@@ -0,0 +1,102 @@
+"""
+Per-request SQL statement budgets and N+1 detection.
+
+For development and tests. Endpoints declare how many statements a request
+may run:
+
+    @router.get("")
+    @query_budget(2)
+    def list_drink_lists(...):
+
+Endpoints without a declaration get QUERY_BUDGET_DEFAULT (no limit if
+unset). The statements of each request are counted together with their
+shape, which is the SQL text with bound parameters collapsed. A shape that
+runs QUERY_REPEAT_THRESHOLD or more times in one request is an N+1
+suspect: one query per row of an earlier result.
+
+QUERY_BUDGET_MODE:
+
+- "log": over-budget requests and N+1 suspects are logged with the
+  repeated statements
+- "raise": additionally, the statement that goes over budget raises
+  QueryBudgetExceeded, so the request fails in tests. Only that statement
+  raises, so that error handling which runs SQL afterwards still works
+- "off": nothing is collected
+
+It defaults to "log" when ENVIRONMENT is development and "off" otherwise.
+"""
+import logging
+import re
+from collections import Counter
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Runs of placeholders in any DB-API paramstyle (?, %s, %(name)s, $1, :name);
+# expanding IN lists render one placeholder per value
+_PLACEHOLDERS = re.compile(r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+))*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more SQL statements than its endpoint's budget."""
+
+
+def query_budget(max_statements: int):
+    """Declare the most SQL statements one request to this endpoint may run."""
+
+    def decorator(endpoint):
+        endpoint.__query_budget__ = max_statements
+        return endpoint
+
+    return decorator
+
+
+def query_budget_mode() -> str:
+    if settings.QUERY_BUDGET_MODE:
+        return settings.QUERY_BUDGET_MODE
+    return "log" if settings.ENVIRONMENT == "development" else "off"
+
+
+def statement_shape(statement: str) -> str:
+    return _PLACEHOLDERS.sub("?", _WHITESPACE.sub(" ", statement).strip())
+
+
+def endpoint_budget(scope: dict) -> Optional[int]:
+    return getattr(scope.get("endpoint"), "__query_budget__", settings.QUERY_BUDGET_DEFAULT)
+
+
+def repeated_shapes(shapes: Counter) -> list:
+    """(count, shape) of the N+1 suspects, most repeated first."""
+    return [
+        (count, shape)
+        for shape, count in shapes.most_common()
+        if count >= settings.QUERY_REPEAT_THRESHOLD
+    ]
+
+
+def _describe(route: str, statements: int, budget: Optional[int], shapes: Counter) -> str:
+    limit = f" (budget {budget})" if budget is not None else ""
+    lines = [f"{route} ran {statements} SQL statements{limit}"]
+    for count, shape in repeated_shapes(shapes)[:5]:
+        lines.append(f"  {count}x {shape[:300]}")
+    return "\n".join(lines)
+
+
+def check_statement(route: str, scope: dict, statements: int, shapes: Counter) -> None:
+    """Called after each statement: raises QueryBudgetExceeded in raise mode when it goes over budget."""
+    if query_budget_mode() != "raise":
+        return
+    budget = endpoint_budget(scope)
+    if budget is not None and statements == budget + 1:
+        raise QueryBudgetExceeded(_describe(route, statements, budget, shapes))
+
+
+def report_request(route: str, scope: dict, statements: int, shapes: Counter) -> None:
+    """Called when a request finishes: logs an overrun budget and N+1 suspects."""
+    budget = endpoint_budget(scope)
+    over_budget = budget is not None and statements > budget
+    if over_budget or repeated_shapes(shapes):
+        logger.warning(_describe(route, statements, budget, shapes))
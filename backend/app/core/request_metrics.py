@@ -0,0 +1,226 @@
+"""
+Per-route request metrics in Prometheus text format.
+
+RequestMetricsMiddleware records, for every request and labelled by the
+route's path template:
+
+- latency histogram and request count by status code
+- number of SQL statements and total time spent in them, counted with
+  SQLAlchemy cursor events. Each request gets its own counter in a
+  contextvar, which carries over into the threadpool that runs sync
+  endpoints and dependencies.
+- with query budgets on (app/core/query_budget.py), the shape of each
+  statement, to check the endpoint's budget and spot N+1 patterns
+
+GET /metrics renders these together with the connection pool and event-loop
+lag figures.
+"""
+import contextvars
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.histogram import Histogram
+from app.core.query_budget import check_statement, query_budget_mode, report_request, statement_shape
+
+LATENCY_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+@dataclass
+class RequestDbStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+    scope: Optional[dict] = None
+    shapes: Optional[Counter] = None  # Only collected with query budgets on
+
+
+_request_db_stats: contextvars.ContextVar[Optional[RequestDbStats]] = contextvars.ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def current_request_db_stats() -> Optional[RequestDbStats]:
+    """Statement count and DB time of the request being served, if any."""
+    return _request_db_stats.get()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count statements and their time against the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started_at"].pop()
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += time.perf_counter() - started
+            if stats.shapes is not None:
+                stats.shapes[statement_shape(statement)] += 1
+                check_statement(route_label(stats.scope), stats.scope, stats.statements, stats.shapes)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started_at"):
+            connection.info["query_started_at"].pop()
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS_SECONDS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.db_seconds = Histogram(LATENCY_BUCKETS_SECONDS)
+        self.status_counts: Dict[int, int] = {}
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes: Dict[Tuple[str, str], RouteMetrics] = {}
+
+    def record(self, method: str, route: str, status_code: int, seconds: float, db: RequestDbStats) -> None:
+        with self._lock:
+            metrics = self.routes.get((method, route))
+            if metrics is None:
+                metrics = self.routes[(method, route)] = RouteMetrics()
+            metrics.status_counts[status_code] = metrics.status_counts.get(status_code, 0) + 1
+        metrics.latency.observe(seconds)
+        metrics.statements.observe(db.statements)
+        metrics.db_seconds.observe(db.db_seconds)
+
+    def snapshot(self) -> Dict[Tuple[str, str], RouteMetrics]:
+        with self._lock:
+            return dict(self.routes)
+
+
+# Singleton instance
+request_metrics = RequestMetrics()
+
+
+def route_path(scope: dict) -> str:
+    """Path template of the matched route, so /orders/{order_id} is one series."""
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+
+def route_label(scope: dict) -> str:
+    """METHOD /path/{template} of a request scope, once routing has matched it."""
+    return f"{scope.get('method', 'WEBSOCKET')} {route_path(scope)}"
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording latency, status and DB usage per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500  # If the app fails before starting a response
+        db_stats = RequestDbStats(scope=scope, shapes=Counter() if query_budget_mode() != "off" else None)
+        token = _request_db_stats.set(db_stats)
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_db_stats.reset(token)
+            request_metrics.record(
+                scope["method"], route_path(scope), status_code, time.perf_counter() - start, db_stats
+            )
+            if db_stats.shapes is not None:
+                report_request(route_label(scope), scope, db_stats.statements, db_stats.shapes)
+
+
+def _labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+def _render_histogram(lines: list, name: str, histogram: Histogram, **labels) -> None:
+    prefix = _labels(**labels)
+    separator = "," if prefix else ""
+    for bound, count in histogram.cumulative():
+        lines.append(f'{name}_bucket{{{prefix}{separator}le="{bound}"}} {count}')
+    suffix = f"{{{prefix}}}" if prefix else ""
+    lines.append(f"{name}_sum{suffix} {histogram.sum}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+
+
+def _render_header(lines: list, name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def render_prometheus(
+    pool: Optional[dict] = None,
+    pool_wait_ms: Optional[Histogram] = None,
+    loop_lag_ms: Optional[Histogram] = None,
+    loop_stalls_ms: Optional[Dict[str, Histogram]] = None,
+) -> str:
+    """All metrics in the Prometheus text exposition format."""
+    routes = sorted(request_metrics.snapshot().items())
+    lines = []
+
+    _render_header(lines, "http_requests_total", "counter", "Requests by route and status code.")
+    for (method, route), metrics in routes:
+        for status_code, count in sorted(metrics.status_counts.items()):
+            lines.append(f"http_requests_total{{{_labels(method=method, route=route, status=status_code)}}} {count}")
+
+    for name, attribute, help_text in (
+        ("http_request_duration_seconds", "latency", "Request latency by route."),
+        ("http_request_db_statements", "statements", "SQL statements executed per request."),
+        ("http_request_db_seconds", "db_seconds", "Time spent in SQL statements per request."),
+    ):
+        _render_header(lines, name, "histogram", help_text)
+        for (method, route), metrics in routes:
+            _render_histogram(lines, name, getattr(metrics, attribute), method=method, route=route)
+
+    if pool is not None:
+        for key, help_text in (
+            ("checked_out", "Connections currently checked out of the pool."),
+            ("overflow", "Overflow connections currently open."),
+            ("size", "Configured pool size."),
+        ):
+            if key in pool:
+                _render_header(lines, f"db_pool_{key}", "gauge", help_text)
+                lines.append(f"db_pool_{key} {pool[key]}")
+        _render_header(lines, "db_pool_checkout_timeouts_total", "counter", "Checkouts that hit pool_timeout.")
+        lines.append(f"db_pool_checkout_timeouts_total {pool['checkout']['timeouts']}")
+
+    if pool_wait_ms is not None:
+        _render_header(lines, "db_pool_checkout_wait_milliseconds", "histogram", "Time waited for a pool connection.")
+        _render_histogram(lines, "db_pool_checkout_wait_milliseconds", pool_wait_ms)
+
+    if loop_lag_ms is not None:
+        _render_header(lines, "event_loop_lag_milliseconds", "histogram", "How late the event loop sampler woke up.")
+        _render_histogram(lines, "event_loop_lag_milliseconds", loop_lag_ms)
+
+    if loop_stalls_ms is not None:
+        _render_header(lines, "event_loop_stall_milliseconds", "histogram", "Event loop stalls by the route that caused them.")
+        for label, histogram in sorted(loop_stalls_ms.items()):
+            # Labels are "METHOD /path", or "background" for work outside a request
+            method, _, route = label.rpartition(" ")
+            _render_histogram(lines, "event_loop_stall_milliseconds", histogram, method=method, route=route)
+
+    return "\n".join(lines) + "\n"
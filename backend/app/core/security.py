@@ -28,7 +28,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
     """Hash a password - always pre-hashes with SHA256 to handle any length."""
     if not password:
         raise ValueError("Password cannot be empty")
@@ -40,11 +40,20 @@ def get_password_hash(password: str) -> str:
     
     # Always pre-hash with SHA256, then hash with bcrypt
     pre_hashed = hashlib.sha256(password_bytes).hexdigest()
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds or settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(pre_hashed.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a stored hash was made with a different work factor than BCRYPT_ROUNDS."""
+    try:
+        # $2b$<rounds>$<salt+hash>
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError, AttributeError):
+        return False
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -3,13 +3,17 @@ from app.core.config import settings
 from typing import Dict, Any, Optional
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
+stripe.max_network_retries = settings.STRIPE_MAX_NETWORK_RETRIES
+# Keep-alive sessions (one per worker thread) instead of a new TLS handshake per call
+stripe.default_http_client = stripe.http_client.RequestsClient(timeout=settings.STRIPE_TIMEOUT_SECONDS)
 
 
 def create_payment_intent(
     amount: int,
     currency: str = "usd",
     metadata: Dict[str, Any] = None,
-    stripe_account_id: Optional[str] = None
+    stripe_account_id: Optional[str] = None,
+    idempotency_key: Optional[str] = None
 ) -> stripe.PaymentIntent:
     """Create a Stripe Payment Intent with optional Connect passthrough."""
     intent_data = {
@@ -27,14 +31,22 @@ def create_payment_intent(
         # Use direct charges - payment goes directly to connected account
         payment_intent = stripe.PaymentIntent.create(
             **intent_data,
-            stripe_account=stripe_account_id
+            stripe_account=stripe_account_id,
+            idempotency_key=idempotency_key
         )
     else:
-        payment_intent = stripe.PaymentIntent.create(**intent_data)
+        payment_intent = stripe.PaymentIntent.create(**intent_data, idempotency_key=idempotency_key)
     
     return payment_intent
 
 
+def retrieve_payment_intent(payment_intent_id: str, stripe_account_id: Optional[str] = None) -> stripe.PaymentIntent:
+    """Retrieve a Payment Intent, from the connected account it was created on if any."""
+    if stripe_account_id:
+        return stripe.PaymentIntent.retrieve(payment_intent_id, stripe_account=stripe_account_id)
+    return stripe.PaymentIntent.retrieve(payment_intent_id)
+
+
 def confirm_payment_intent(payment_intent_id: str) -> stripe.PaymentIntent:
     """Confirm a payment intent (called after successful payment)."""
     return stripe.PaymentIntent.retrieve(payment_intent_id)
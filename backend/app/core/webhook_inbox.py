@@ -0,0 +1,305 @@
+"""
+Stripe webhook inbox.
+
+The webhook endpoint only verifies the signature and stores the event, so
+Stripe gets its 200 right away. WebhookInboxWorker applies stored events in
+batches: one query loads every order the batch refers to, one bulk UPDATE
+by primary key applies the changes, and the events are marked processed in
+the same transaction. Failed events are retried with exponential backoff
+until WEBHOOK_MAX_ATTEMPTS.
+
+The inbox doubles as the processed-events ledger: an event ID that was ever
+stored is never applied twice. Recently seen IDs are also remembered in
+memory so that redeliveries are dropped without a database round trip.
+Events may arrive out of order, so they only move an order forward: a late
+payment_failed never undoes PAID, and a paid order keeps its QR code.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.order_events import publish_order_event, ORDER_PAID, ORDER_STATUS_CHANGED
+from app.core.order_serialization import with_order_details, orders_to_responses
+from app.core.order_state_machine import payment_succeeded_applies, payment_failed_applies
+from app.core.qr_service import generate_qr_code
+from app.db.base import SessionLocal
+from app.models.order import Order, OrderStatus
+from app.models.stripe_webhook_event import StripeWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_SUCCEEDED = "payment_intent.succeeded"
+PAYMENT_FAILED = "payment_intent.payment_failed"
+HANDLED_EVENT_TYPES = {PAYMENT_SUCCEEDED, PAYMENT_FAILED}
+
+MAX_RETRY_DELAY_SECONDS = 600
+RECENT_EVENT_IDS_SIZE = 10000
+PURGE_INTERVAL_SECONDS = 3600
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class RecentEventIds:
+    """Bounded set of event IDs this worker has already stored."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._ids: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def __contains__(self, event_id: str) -> bool:
+        with self._lock:
+            if event_id in self._ids:
+                self.hits += 1
+                return True
+            return False
+
+    def add(self, event_id: str) -> None:
+        with self._lock:
+            self._ids[event_id] = None
+            self._ids.move_to_end(event_id)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+
+recent_event_ids = RecentEventIds(RECENT_EVENT_IDS_SIZE)
+
+
+def is_duplicate_event(event_id: str) -> bool:
+    """Cheap in-memory check for a redelivered event, before touching the database."""
+    return event_id in recent_event_ids
+
+
+def store_webhook_event(event: dict) -> bool:
+    """
+    Store a verified event in the inbox.
+
+    Returns False if the event type is not handled or the event is already stored.
+    """
+    if event["type"] not in HANDLED_EVENT_TYPES:
+        return False
+
+    db = SessionLocal()
+    try:
+        # A redelivered event hits the primary key and inserts nothing
+        result = db.execute(
+            insert(StripeWebhookEvent).values(
+                id=event["id"],
+                type=event["type"],
+                payment_intent_id=event["data"]["object"].get("id"),
+                payload=event,
+            ).on_conflict_do_nothing(index_elements=[StripeWebhookEvent.id])
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    recent_event_ids.add(event["id"])
+    return result.rowcount == 1
+
+
+def _claim_events(db: Session, batch_size: int, event_ids: Optional[List[str]] = None) -> List[StripeWebhookEvent]:
+    now = datetime.now(timezone.utc)
+    query = db.query(StripeWebhookEvent).filter(
+        StripeWebhookEvent.processed_at.is_(None),
+        StripeWebhookEvent.next_attempt_at <= now,
+        StripeWebhookEvent.attempts < settings.WEBHOOK_MAX_ATTEMPTS,
+    )
+    if event_ids is not None:
+        query = query.filter(StripeWebhookEvent.id.in_(event_ids))
+    # SKIP LOCKED lets every uvicorn worker drain the inbox without overlapping
+    return query.order_by(StripeWebhookEvent.received_at).limit(batch_size).with_for_update(skip_locked=True).all()
+
+
+def _apply_events(db: Session, events: List[StripeWebhookEvent]) -> Dict:
+    """Apply events to their orders. Returns {order_id: live event type} for changed orders."""
+    intent_ids = {event.payment_intent_id for event in events if event.payment_intent_id}
+    # Locked so that two workers applying events of the same intent serialize
+    orders = {
+        row.payment_intent_id: row
+        for row in db.query(Order.id, Order.club_id, Order.payment_intent_id, Order.status, Order.qr_code).filter(
+            Order.payment_intent_id.in_(intent_ids)
+        ).with_for_update()
+    }
+
+    # Current state of each order as the batch is applied
+    states = {order.id: (order.status, order.qr_code) for order in orders.values()}
+    changes: Dict = {}
+    order_events: Dict = {}
+    # Stripe does not deliver in order - apply in the order the events were created
+    for event in sorted(events, key=lambda e: e.payload.get("created", 0)):
+        order = orders.get(event.payment_intent_id)
+        if order is None:
+            logger.warning(f"No order for payment intent {event.payment_intent_id} (event {event.id})")
+            continue
+
+        order_status, qr_code = states[order.id]
+        if event.type == PAYMENT_SUCCEEDED and payment_succeeded_applies(order_status, qr_code):
+            qr_code = qr_code or generate_qr_code(order.id, order.club_id)
+            states[order.id] = (OrderStatus.PAID, qr_code)
+            changes[order.id] = {"id": order.id, "status": OrderStatus.PAID, "qr_code": qr_code}
+            order_events[order.id] = ORDER_PAID
+        elif event.type == PAYMENT_FAILED and payment_failed_applies(order_status):
+            states[order.id] = (OrderStatus.CANCELLED, qr_code)
+            changes[order.id] = {"id": order.id, "status": OrderStatus.CANCELLED, "qr_code": qr_code}
+            order_events[order.id] = ORDER_STATUS_CHANGED
+        else:
+            logger.info(f"Skipping {event.type} (event {event.id}): order {order.id} is {order_status.value}")
+
+    if changes:
+        db.execute(update(Order), list(changes.values()))
+    return order_events
+
+
+def _schedule_retry(db: Session, event_id: str, error: Exception) -> None:
+    event = db.get(StripeWebhookEvent, event_id)
+    if event is None:
+        return
+    event.attempts += 1
+    event.last_error = str(error)
+    delay = min(2 ** event.attempts, MAX_RETRY_DELAY_SECONDS)
+    event.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+    if event.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+        logger.error(f"Giving up on Stripe event {event_id} after {event.attempts} attempts: {error}")
+    db.commit()
+
+
+def process_inbox_batch(db: Session, batch_size: int, event_ids: Optional[List[str]] = None) -> int:
+    """Apply one batch of pending events. Returns the number of events processed."""
+    events = _claim_events(db, batch_size, event_ids)
+    if not events:
+        db.rollback()
+        return 0
+    claimed_ids = [event.id for event in events]
+
+    try:
+        order_events = _apply_events(db, events)
+        now = datetime.now(timezone.utc)
+        for event in events:
+            event.processed_at = now
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        if len(claimed_ids) > 1:
+            # Apply the events one by one so a single bad event does not hold back the batch
+            logger.warning(f"Stripe event batch failed, retrying events individually: {e}")
+            return sum(process_inbox_batch(db, 1, [event_id]) for event_id in claimed_ids)
+        logger.error(f"Failed to apply Stripe event {claimed_ids[0]}: {e}")
+        _schedule_retry(db, claimed_ids[0], e)
+        return 0
+
+    if order_events:
+        orders = with_order_details(db.query(Order).filter(Order.id.in_(list(order_events)))).all()
+        event_types = {str(order_id): event_type for order_id, event_type in order_events.items()}
+        for response in orders_to_responses(orders):
+            publish_order_event(event_types[response.id], response)
+        db.rollback()
+    return len(claimed_ids)
+
+
+def purge_processed_events(db: Session) -> int:
+    """Delete processed events older than WEBHOOK_EVENT_RETENTION_DAYS."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.WEBHOOK_EVENT_RETENTION_DAYS)
+    deleted = db.query(StripeWebhookEvent).filter(
+        StripeWebhookEvent.processed_at < cutoff,
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def inbox_stats(db: Session) -> dict:
+    """Inbox depth and lag, for monitoring."""
+    pending_filter = (
+        StripeWebhookEvent.processed_at.is_(None),
+        StripeWebhookEvent.attempts < settings.WEBHOOK_MAX_ATTEMPTS,
+    )
+    pending, oldest = db.query(func.count(), func.min(StripeWebhookEvent.received_at)).filter(*pending_filter).one()
+    failed = db.query(func.count()).select_from(StripeWebhookEvent).filter(
+        StripeWebhookEvent.processed_at.is_(None),
+        StripeWebhookEvent.attempts >= settings.WEBHOOK_MAX_ATTEMPTS,
+    ).scalar()
+    lag = (datetime.now(timezone.utc) - _as_utc(oldest)).total_seconds() if oldest else 0.0
+    return {
+        "pending": pending,
+        "failed": failed,
+        "lag_seconds": round(max(lag, 0.0), 3),
+        **webhook_inbox_worker.stats(),
+    }
+
+
+class WebhookInboxWorker:
+    """Background thread that drains the webhook inbox."""
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.processed = 0
+        self.last_batch_at: Optional[float] = None
+        self._last_purge_at = 0.0
+
+    def wake(self) -> None:
+        """Process new events now instead of at the next poll."""
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stripe-webhook-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=settings.WEBHOOK_POLL_INTERVAL_SECONDS + 5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "processed": self.processed,
+            "seconds_since_last_batch": round(time.monotonic() - self.last_batch_at, 3) if self.last_batch_at else None,
+            "duplicates_dropped": recent_event_ids.hits,
+        }
+
+    def run_once(self) -> int:
+        db = SessionLocal()
+        try:
+            processed = process_inbox_batch(db, settings.WEBHOOK_BATCH_SIZE)
+            if time.monotonic() - self._last_purge_at > PURGE_INTERVAL_SECONDS:
+                purge_processed_events(db)
+                self._last_purge_at = time.monotonic()
+        finally:
+            db.close()
+        self.processed += processed
+        if processed:
+            self.last_batch_at = time.monotonic()
+        return processed
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                logger.error(f"Stripe webhook worker error: {e}")
+                processed = 0
+            if processed >= settings.WEBHOOK_BATCH_SIZE:
+                continue  # More events are waiting
+            self._wake.wait(settings.WEBHOOK_POLL_INTERVAL_SECONDS)
+            self._wake.clear()
+
+
+# Singleton instance
+webhook_inbox_worker = WebhookInboxWorker()
@@ -0,0 +1,162 @@
+"""
+Admission control for database-using requests.
+
+When the pool is exhausted, requests used to wait up to pool_timeout for a
+connection and then fail with a 500. Phones retry, and the pile-up grows.
+Instead, each worker admits at most DB_ADMISSION_MAX_IN_FLIGHT requests
+that use the database (by default the pool's capacity). Further requests
+wait in a short priority queue. After DB_ADMISSION_QUEUE_TIMEOUT_MS, or
+straight away when the queue is full, they get a 503 with Retry-After.
+
+Priorities:
+
+- HIGH: bartender writes (order status, scans, payments); they may use the
+  DB_ADMISSION_RESERVED_SLOTS kept back from everyone else and are never
+  turned away for a full queue
+- NORMAL: other writes, and the bartender feed
+- LOW: other reads (menus, club lists, order polling)
+
+Waiting happens on the event loop: a queued request holds a future, not one
+of the threadpool's threads, so a full queue cannot starve the requests
+that were admitted of threads to run on. The controller is only used from
+the worker's event loop and needs no lock.
+"""
+import asyncio
+import enum
+import heapq
+import itertools
+
+from fastapi import HTTPException, status
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+
+
+class Priority(enum.IntEnum):
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+class AdmissionRejected(Exception):
+    """The request was not admitted in time."""
+
+
+class AdmissionController:
+    def __init__(self, limit: int, reserved: int, max_queue: int, queue_timeout: float):
+        self.limit = limit
+        self.reserved = min(reserved, limit - 1)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._waiting = []  # Heap of (priority, arrival, future)
+        self._arrivals = itertools.count()
+        self.admitted = {priority.name: 0 for priority in Priority}
+        self.rejected = {priority.name: 0 for priority in Priority}
+
+    def _slots(self, priority: Priority) -> int:
+        return self.limit if priority == Priority.HIGH else self.limit - self.reserved
+
+    async def acquire(self, priority: Priority) -> None:
+        """Wait for a slot. Raises AdmissionRejected if the queue is full or the wait times out."""
+        if not self._waiting and self._in_flight < self._slots(priority):
+            self._admit(priority)
+            return
+        if len(self._waiting) >= self.max_queue and priority != Priority.HIGH:
+            self.rejected[priority.name] += 1
+            raise AdmissionRejected()
+
+        slot = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (priority, next(self._arrivals), slot))
+        try:
+            await asyncio.wait_for(asyncio.shield(slot), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if slot.done():
+                # The slot was handed over just as the wait ended
+                self.release()
+            else:
+                slot.cancel()
+                self._drop_cancelled()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected[priority.name] += 1
+            raise AdmissionRejected()
+
+    def _admit(self, priority: Priority) -> None:
+        self._in_flight += 1
+        self.admitted[priority.name] += 1
+
+    def _drop_cancelled(self) -> None:
+        self._waiting = [entry for entry in self._waiting if not entry[2].done()]
+        heapq.heapify(self._waiting)
+        # The waiter that left may have been the one holding the others back
+        self._wake()
+
+    def _wake(self) -> None:
+        # Only the best waiter may take a slot; a better priority has at
+        # least as many slots, so it never waits behind a worse one
+        while self._waiting and self._in_flight < self._slots(self._waiting[0][0]):
+            priority, _, slot = heapq.heappop(self._waiting)
+            if slot.done():
+                continue
+            self._admit(priority)
+            slot.set_result(None)
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._wake()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "reserved_for_high_priority": self.reserved,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiting),
+            "max_queue": self.max_queue,
+            "queue_timeout_ms": self.queue_timeout * 1000,
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+        }
+
+
+def request_priority(connection: HTTPConnection) -> Priority:
+    is_bartender = connection.url.path.startswith(f"{settings.API_V1_PREFIX}/bartender/")
+    if connection.scope.get("method", "GET") == "GET":
+        return Priority.NORMAL if is_bartender else Priority.LOW
+    return Priority.HIGH if is_bartender else Priority.NORMAL
+
+
+def service_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please try again shortly",
+        headers={"Retry-After": str(settings.DB_ADMISSION_RETRY_AFTER_SECONDS)},
+    )
+
+
+def build_admission_controller(pool_capacity: int) -> AdmissionController:
+    return AdmissionController(
+        settings.DB_ADMISSION_MAX_IN_FLIGHT or pool_capacity,
+        settings.DB_ADMISSION_RESERVED_SLOTS,
+        settings.DB_ADMISSION_MAX_QUEUE,
+        settings.DB_ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+    )
+
+
+def admission_dependency(controller: AdmissionController):
+    """FastAPI dependency holding an admission slot for the rest of the request."""
+
+    async def admit_db_request(connection: HTTPConnection):
+        if not settings.DB_ADMISSION_ENABLED:
+            yield
+            return
+        try:
+            await controller.acquire(request_priority(connection))
+        except AdmissionRejected:
+            raise service_unavailable()
+        try:
+            yield
+        finally:
+            controller.release()
+
+    return admit_db_request
@@ -0,0 +1,120 @@
+"""
+Database sessions for async endpoints.
+
+An `async def` endpoint that runs a query on a regular Session blocks the
+event loop, and with it every other request on the worker, for the whole
+round trip. Async endpoints take get_async_db instead:
+
+- With DB_ASYNC_ENABLED, it yields an AsyncSession on an asyncpg engine
+  (asyncpg is only needed then).
+- Otherwise it yields a ThreadedSession: the same awaitable API over a
+  regular session, with every database call run in the threadpool.
+
+Either way endpoints are written once against the AsyncSession API. Sessions
+do not expire objects on commit, and endpoints must not rely on lazy loads.
+The asyncpg engine's pool is carved out of the configured pool size (see
+split_pool_budget) and reported by /health/pool and /health/ready.
+"""
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.request_metrics import instrument_engine
+from app.db.base import SessionLocal, admit_db_request, async_pool_config, database_url, is_supabase_pooler
+from app.db.pool_stats import TimedAsyncQueuePool, instrument_pool
+
+# Pool settings that apply to asyncpg; connect_args are psycopg2-specific
+POOL_OPTIONS = ("pool_size", "max_overflow", "pool_recycle", "pool_timeout", "pool_pre_ping")
+
+
+class ThreadedSession:
+    """AsyncSession-compatible wrapper running a regular Session's I/O in the threadpool."""
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, params=None):
+        return await run_in_threadpool(self.sync_session.execute, statement, params)
+
+    async def scalar(self, statement, params=None):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params)
+
+    async def scalars(self, statement, params=None):
+        return await run_in_threadpool(self.sync_session.scalars, statement, params)
+
+    async def get(self, entity, ident):
+        return await run_in_threadpool(self.sync_session.get, entity, ident)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance, attribute_names=None) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+def _async_database_url():
+    if settings.ASYNC_DATABASE_URL:
+        return make_url(settings.ASYNC_DATABASE_URL)
+    url = make_url(database_url)
+    # asyncpg takes SSL as a connect argument, not a URL parameter
+    query = {key: value for key, value in url.query.items() if key != "sslmode"}
+    if is_supabase_pooler:
+        # The transaction pooler does not keep prepared statements across transactions
+        query["prepared_statement_cache_size"] = "0"
+    return url.set(drivername="postgresql+asyncpg", query=query)
+
+
+async_engine = None
+AsyncSessionLocal = None
+
+if settings.DB_ASYNC_ENABLED:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    connect_args = {"timeout": 10}
+    if is_supabase_pooler:
+        connect_args.update({"ssl": "require", "statement_cache_size": 0})
+    async_engine = create_async_engine(
+        _async_database_url(),
+        connect_args=connect_args,
+        poolclass=TimedAsyncQueuePool,
+        **{key: value for key, value in async_pool_config.items() if key in POOL_OPTIONS},
+    )
+    instrument_pool(async_engine.sync_engine, settings.DB_SLOW_HOLD_WARNING_SECONDS)
+    instrument_engine(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db(_admitted: None = Depends(admit_db_request)):
+    """Dependency for getting a database session in async endpoints."""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = ThreadedSession(SessionLocal(expire_on_commit=False))
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def dispose_async_engine() -> None:
+    if async_engine is not None:
+        await async_engine.dispose()
@@ -1,7 +1,11 @@
+from fastapi import Depends
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.request_metrics import instrument_engine
+from app.db.admission import admission_dependency, build_admission_controller
+from app.db.pool_stats import TimedQueuePool, instrument_pool, split_pool_budget
 
 # Use Supabase DB URL if provided, otherwise use DATABASE_URL
 database_url = settings.SUPABASE_DB_URL or settings.DATABASE_URL
@@ -30,6 +34,7 @@ pool_config = {
     }
 }
 
+# Pool defaults by connection type; each one can be overridden in settings
 if is_supabase_pooler:
     # Supabase pooler: use conservative pool settings
     # Check if using Transaction mode (port 6543) vs Session mode (port 5432)
@@ -37,35 +42,66 @@ if is_supabase_pooler:
     
     if is_transaction_mode:
         # Transaction mode: better for short-lived connections, more scalable
-        pool_config.update({
+        pool_defaults = {
             "pool_size": 5,
             "max_overflow": 2,  # Allow 2 overflow connections
             "pool_recycle": 300,  # Recycle after 5 minutes (shorter for transaction mode)
             "pool_timeout": 20,  # Wait up to 20 seconds for a connection
-        })
+        }
     else:
         # Session mode: limited connections but allow some overflow
-        pool_config.update({
+        pool_defaults = {
             "pool_size": 3,  # Increased from 2
             "max_overflow": 2,  # Allow 2 overflow connections
             "pool_recycle": 600,  # Recycle after 10 minutes (reduced from 30)
             "pool_timeout": 20,  # Wait up to 20 seconds for a connection
-        })
+        }
 else:
     # Standard PostgreSQL: can use larger pool
-    pool_config.update({
+    pool_defaults = {
         "pool_size": 10,
         "max_overflow": 5,
         "pool_recycle": 3600,
-    })
+        "pool_timeout": 30,
+    }
+
+pool_overrides = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+}
+pool_config.update({
+    key: default if pool_overrides[key] is None else pool_overrides[key]
+    for key, default in pool_defaults.items()
+})
 
-engine = create_engine(database_url, **pool_config)
+# Admission control covers every connection this worker may open
+connection_budget = pool_config["pool_size"] + pool_config["max_overflow"]
+
+# The asyncpg engine for async endpoints shares the budget instead of
+# opening as many connections again
+async_pool_config = None
+if settings.DB_ASYNC_ENABLED:
+    pool_config, async_pool_config = split_pool_budget(
+        pool_config, settings.DB_ASYNC_POOL_SIZE, settings.DB_ASYNC_MAX_OVERFLOW
+    )
+
+# TimedQueuePool records checkout waits and timeouts for /health/pool
+engine = create_engine(database_url, poolclass=TimedQueuePool, **pool_config)
+instrument_pool(engine, settings.DB_SLOW_HOLD_WARNING_SECONDS)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Singleton instance
+db_admission = build_admission_controller(connection_budget)
+# Shared by every session dependency, so a request holds at most one slot
+admit_db_request = admission_dependency(db_admission)
+
 
-def get_db():
+def get_db(_admitted: None = Depends(admit_db_request)):
     """Dependency for getting database session."""
     db = SessionLocal()
     try:
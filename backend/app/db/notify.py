@@ -0,0 +1,119 @@
+"""
+Cross-worker signals over Postgres LISTEN/NOTIFY.
+
+notify() queues a NOTIFY inside the caller's transaction, so Postgres only
+delivers it once that transaction commits. Each worker runs one
+NotificationListener thread on a dedicated connection (not a pooled one)
+and dispatches incoming notifications to the handlers registered for the
+channel.
+"""
+import logging
+import select
+import threading
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import URL
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for notifications before checking whether to stop
+POLL_INTERVAL_SECONDS = 5
+MAX_RECONNECT_DELAY_SECONDS = 60
+
+
+def notify(db: Session, channel: str, payload: str) -> None:
+    """Send a notification to every worker when the session's transaction commits."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+async def notify_async(db, channel: str, payload: str) -> None:
+    """notify() for an AsyncSession (or ThreadedSession)."""
+    if db.sync_session.get_bind().dialect.name != "postgresql":
+        return
+    await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+class NotificationListener:
+    """Background thread that LISTENs on registered channels and dispatches notifications."""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable[[str], None]]] = {}
+        self._reconnect_handlers: List[Callable[[], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.connected = False
+
+    def add_handler(self, channel: str, handler: Callable[[str], None]) -> None:
+        """Call handler(payload) for every notification on channel."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def add_reconnect_handler(self, handler: Callable[[], None]) -> None:
+        """Call handler() after (re)connecting, since notifications sent while disconnected are lost."""
+        self._reconnect_handlers.append(handler)
+
+    def start(self, url: URL) -> None:
+        if self._thread is not None or url.get_backend_name() != "postgresql":
+            return
+        dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(dsn,), name="pg-notify-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=POLL_INTERVAL_SECONDS + 1)
+            self._thread = None
+
+    def _run(self, dsn: str) -> None:
+        import psycopg2
+
+        delay = 1
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    for channel in self._handlers:
+                        cursor.execute(f'LISTEN "{channel}"')
+                self.connected = True
+                delay = 1
+                for handler in self._reconnect_handlers:
+                    handler()
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], POLL_INTERVAL_SECONDS) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notification = conn.notifies.pop(0)
+                        self._dispatch(notification.channel, notification.payload)
+            except Exception as e:
+                # The transaction pooler (port 6543) does not support LISTEN;
+                # point DB_LISTEN_URL at a session-mode or direct connection
+                logger.warning(f"Notification listener disconnected: {e}")
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self._stop.wait(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+
+    def _dispatch(self, channel: str, payload: str) -> None:
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception as e:
+                logger.error(f"Notification handler for {channel} failed: {e}")
+
+
+# Singleton instance
+notification_listener = NotificationListener()
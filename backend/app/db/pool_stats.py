@@ -0,0 +1,196 @@
+"""
+Connection pool statistics for the SQLAlchemy pool.
+
+Measures how long each pooled connection stays checked out (checkout to
+checkin). Long holds starve the small Supabase pooler pool, so holds above
+DB_SLOW_HOLD_WARNING_SECONDS are logged.
+
+TimedQueuePool (TimedAsyncQueuePool for the asyncpg engine) also records
+how long each checkout waited for a connection (for a free one, or to open
+a new one) and how many gave up after pool_timeout. Both pools of a worker
+record into the same statistics.
+"""
+import logging
+import threading
+import time
+from typing import Optional, Tuple
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.histogram import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionHoldStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.count = 0
+            self.total_seconds = 0.0
+            self.max_seconds = 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.count,
+                "avg_hold_ms": round(self.total_seconds / self.count * 1000, 2) if self.count else 0.0,
+                "max_hold_ms": round(self.max_seconds * 1000, 2),
+            }
+
+
+# Singleton instance
+connection_hold_stats = ConnectionHoldStats()
+
+
+class PoolWaitStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.wait_ms = Histogram()
+        self.timeouts = 0
+        self.last_timeout_at: Optional[float] = None  # time.monotonic()
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.last_timeout_at = time.monotonic()
+
+    def seconds_since_timeout(self) -> Optional[float]:
+        with self._lock:
+            if self.last_timeout_at is None:
+                return None
+            return time.monotonic() - self.last_timeout_at
+
+    def snapshot(self) -> dict:
+        since = self.seconds_since_timeout()
+        with self._lock:
+            timeouts = self.timeouts
+        return {
+            "wait_ms": self.wait_ms.snapshot(),
+            "timeouts": timeouts,
+            "seconds_since_last_timeout": round(since, 1) if since is not None else None,
+        }
+
+
+# Singleton instance
+pool_wait_stats = PoolWaitStats()
+
+
+class _TimedCheckout:
+    """Pool mixin recording checkout wait times and timeouts in pool_wait_stats."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_wait_stats.record_timeout()
+            raise
+        finally:
+            pool_wait_stats.wait_ms.observe((time.perf_counter() - start) * 1000)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def split_pool_budget(
+    pool_config: dict,
+    async_pool_size: Optional[int] = None,
+    async_max_overflow: Optional[int] = None,
+) -> Tuple[dict, dict]:
+    """
+    Share a pool configuration's connections between a sync and an async engine.
+
+    The async engine gets the given size and overflow (by default half of
+    each, at least one connection) and the sync engine keeps the rest, so
+    the two never open more connections than the configuration allows.
+    """
+    if pool_config["pool_size"] < 2:
+        # A pool_size of 0 would mean no limit at all
+        raise ValueError("A pool size of at least 2 is needed to share it with the async engine")
+    if async_pool_size is None:
+        async_pool_size = max(pool_config["pool_size"] // 2, 1)
+    if async_max_overflow is None:
+        async_max_overflow = pool_config["max_overflow"] // 2
+    async_pool_size = min(max(async_pool_size, 1), pool_config["pool_size"] - 1)
+    async_max_overflow = min(async_max_overflow, pool_config["max_overflow"])
+    sync_config = {
+        **pool_config,
+        "pool_size": pool_config["pool_size"] - async_pool_size,
+        "max_overflow": pool_config["max_overflow"] - async_max_overflow,
+    }
+    async_config = {**pool_config, "pool_size": async_pool_size, "max_overflow": async_max_overflow}
+    return sync_config, async_config
+
+
+def pool_status(engine: Engine, max_overflow: int) -> dict:
+    """Live occupancy of the engine's pool plus the wait and hold statistics."""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        checked_out = pool.checkedout()
+        capacity = pool.size() + max_overflow
+        status.update({
+            "size": pool.size(),
+            "max_overflow": max_overflow,
+            "checked_out": checked_out,
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "capacity": capacity,
+            "saturated": checked_out >= capacity,
+            "timeout_seconds": pool.timeout(),
+        })
+    status["checkout"] = pool_wait_stats.snapshot()
+    status["hold"] = connection_hold_stats.snapshot()
+    return status
+
+
+def instrument_pool(engine: Engine, slow_hold_seconds: float) -> None:
+    """Record the hold time of every connection checked out from the engine's pool."""
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return
+        held = time.perf_counter() - checked_out_at
+        connection_hold_stats.record(held)
+        if held > slow_hold_seconds:
+            logger.warning(f"Database connection held for {held:.2f}s")
+
+
+def pool_health_problem(engine: Engine, max_overflow: int, timeout_window: float) -> Optional[str]:
+    """Why the pool cannot serve requests right now, or None if it can."""
+    since = pool_wait_stats.seconds_since_timeout()
+    if since is not None and since < timeout_window:
+        return f"A connection checkout timed out {since:.0f}s ago"
+    if pool_status(engine, max_overflow).get("saturated"):
+        return "All pool connections are checked out"
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception as e:
+        return f"Database unreachable: {e}"
+    return None
@@ -0,0 +1,75 @@
+"""
+Connection pool warm-up.
+
+A fresh worker opens its pooled connections lazily, so the first requests
+after a deploy each pay for a TCP + TLS handshake and pooler login on top of
+their query. With DB_POOL_WARMUP_CONNECTIONS set, the worker opens that many
+connections in the background at startup and GET /health/ready answers 503
+until they are in the pool. A failed warm-up is logged and does not keep the
+worker unready; the pool falls back to opening connections on demand.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class PoolWarmup:
+    def __init__(self):
+        self.done = threading.Event()
+        self.connections = 0
+        self.seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, engine: Engine, connections: int) -> None:
+        """Open `connections` pooled connections in the background (capped at the pool size)."""
+        connections = min(connections, engine.pool.size()) if hasattr(engine.pool, "size") else connections
+        if connections <= 0:
+            self.done.set()
+            return
+        self._thread = threading.Thread(
+            target=self._run, args=(engine, connections), name="pool-warmup", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, engine: Engine, connections: int) -> None:
+        start = time.perf_counter()
+        opened = []
+        try:
+            # Open them all at once; one at a time each would wait for the previous handshake
+            with ThreadPoolExecutor(max_workers=connections) as executor:
+                futures = [executor.submit(engine.connect) for _ in range(connections)]
+                for future in futures:
+                    opened.append(future.result())
+            for connection in opened:
+                connection.execute(text("SELECT 1"))
+            self.connections = len(opened)
+        except Exception as e:
+            self.error = str(e)
+            logger.warning(f"Connection pool warm-up failed after {len(opened)} connections: {e}")
+        finally:
+            for connection in opened:
+                connection.close()
+            self.seconds = time.perf_counter() - start
+            self.done.set()
+        if self.error is None:
+            logger.info(f"Opened {self.connections} pooled connections in {self.seconds:.2f}s")
+
+    def stats(self) -> dict:
+        return {
+            "done": self.done.is_set(),
+            "connections": self.connections,
+            "seconds": round(self.seconds, 3) if self.seconds is not None else None,
+            "error": self.error,
+        }
+
+
+# Singleton instance
+pool_warmup = PoolWarmup()
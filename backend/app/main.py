@@ -1,12 +1,26 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
 from app.api.v1.router import api_router
-from app.db.base import Base, engine
+from app.db.admission import service_unavailable
+from app.db.base import async_pool_config, db_admission, engine, get_db, pool_config
+from app.db.pool_stats import pool_health_problem, pool_status, pool_wait_stats
+from app.db.async_session import async_engine, dispose_async_engine
+from app.db.notify import notification_listener
+from app.db.warmup import pool_warmup
+from app.core.webhook_inbox import webhook_inbox_worker, inbox_stats
+from app.core.auth_cache import auth_cache
+from app.core.menu_cache import menu_cache
+from app.core.password_hasher import password_hasher
+from app.core.loop_monitor import LoopLagMiddleware, loop_monitor
+from app.core.request_metrics import RequestMetricsMiddleware, render_prometheus
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed with Alembic migrations (alembic upgrade head);
+# startup runs no DDL
 
 app = FastAPI(
     title="Clubverse API",
@@ -25,6 +39,25 @@ app.add_middleware(
     max_age=3600,
 )
 
+# Attributes event-loop stalls to the request that caused them
+if settings.LOOP_MONITOR_ENABLED:
+    app.add_middleware(LoopLagMiddleware)
+
+# Per-route latency, status codes and SQL statements, served at /metrics
+app.add_middleware(RequestMetricsMiddleware)
+
+# The pool ran out of connections despite admission control (e.g. background
+# workers holding them): tell the client to retry instead of a generic 500
+@app.exception_handler(sa_exc.TimeoutError)
+async def pool_timeout_handler(request: Request, exc: sa_exc.TimeoutError):
+    busy = service_unavailable()
+    return JSONResponse(
+        status_code=busy.status_code,
+        content={"detail": busy.detail},
+        headers={**busy.headers, "Access-Control-Allow-Origin": "*"},
+    )
+
+
 # Exception handler for unhandled exceptions
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
@@ -34,6 +67,54 @@ async def general_exception_handler(request: Request, exc: Exception):
         headers={"Access-Control-Allow-Origin": "*"},
     )
 
+@app.on_event("startup")
+def start_pool_warmup():
+    pool_warmup.start(engine, settings.DB_POOL_WARMUP_CONNECTIONS)
+
+
+@app.on_event("startup")
+def start_notification_listener():
+    # Cross-worker cache invalidation (menu and auth caches)
+    listen_url = make_url(settings.DB_LISTEN_URL) if settings.DB_LISTEN_URL else engine.url
+    notification_listener.start(listen_url)
+
+
+@app.on_event("startup")
+def start_webhook_worker():
+    webhook_inbox_worker.start()
+
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+
+
+@app.on_event("shutdown")
+def stop_notification_listener():
+    notification_listener.stop()
+
+
+@app.on_event("shutdown")
+def stop_webhook_worker():
+    webhook_inbox_worker.stop()
+
+
+@app.on_event("shutdown")
+def stop_password_hasher():
+    password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await dispose_async_engine()
+
+
+@app.on_event("shutdown")
+def stop_loop_monitor():
+    loop_monitor.stop()
+
+
 @app.get("/")
 def root():
     return {"message": "Clubverse API", "version": "1.0.0"}
@@ -44,6 +125,74 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/ready")
+def readiness_check():
+    """
+    Readiness probe.
+    
+    503 while the pool is warming up, has every connection checked out, has
+    recently timed out a checkout, or cannot reach the database. /health stays
+    the liveness probe and does not touch the database.
+    """
+    if not pool_warmup.done.is_set():
+        problem = "Connection pool warm-up in progress"
+    else:
+        problem = pool_health_problem(engine, pool_config["max_overflow"], settings.DB_READY_TIMEOUT_WINDOW_SECONDS)
+        if problem is None and async_engine is not None:
+            if pool_status(async_engine, async_pool_config["max_overflow"]).get("saturated"):
+                problem = "All async pool connections are checked out"
+    
+    content = {
+        "status": "unavailable" if problem else "ready",
+        "detail": problem,
+        "pool_warmup": pool_warmup.stats(),
+    }
+    if problem:
+        return JSONResponse(status_code=503, content=content)
+    return content
+
+
+@app.get("/health/pool")
+def pool_health():
+    """Live connection pool occupancy, checkout wait histogram, timeouts, hold times and admission control."""
+    status = {**pool_status(engine, pool_config["max_overflow"]), "admission": db_admission.stats()}
+    if async_engine is not None:
+        status["async_pool"] = pool_status(async_engine, async_pool_config["max_overflow"])
+    return status
+
+
+@app.get("/health/webhooks")
+def webhook_inbox_health(db: Session = Depends(get_db)):
+    """Stripe webhook inbox depth and lag."""
+    return inbox_stats(db)
+
+
+@app.get("/health/caches")
+def cache_health():
+    """Size and hit/miss counters of this worker's in-process caches."""
+    return {"auth": auth_cache.stats(), "menu": menu_cache.stats()}
+
+
+@app.get("/health/loop")
+def loop_health():
+    """Event-loop lag histograms and the most recent stalls (with their blocking stacks if enabled)."""
+    return loop_monitor.stats(include_stacks=settings.LOOP_MONITOR_EXPOSE_STACKS)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Request, connection pool and event-loop metrics in Prometheus text format."""
+    return PlainTextResponse(
+        render_prometheus(
+            pool=pool_status(engine, pool_config["max_overflow"]),
+            pool_wait_ms=pool_wait_stats.wait_ms,
+            loop_lag_ms=loop_monitor.lag if settings.LOOP_MONITOR_ENABLED else None,
+            loop_stalls_ms=loop_monitor.route_stalls() if settings.LOOP_MONITOR_ENABLED else None,
+        ),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
@@ -4,6 +4,8 @@ from app.models.drink import Drink
 from app.models.drink_list import DrinkList
 from app.models.order import Order, OrderItem
 from app.models.bartender import Bartender
+from app.models.idempotency_key import IdempotencyKey
+from app.models.stripe_webhook_event import StripeWebhookEvent
 
-__all__ = ["User", "Club", "Drink", "DrinkList", "Order", "OrderItem", "Bartender"]
+__all__ = ["User", "Club", "Drink", "DrinkList", "Order", "OrderItem", "Bartender", "IdempotencyKey", "StripeWebhookEvent"]
 
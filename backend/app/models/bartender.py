@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -21,3 +21,6 @@ class Bartender(Base):
     user = relationship("User", back_populates="bartender_profiles")
     club = relationship("Club", back_populates="bartenders")
 
+
+# Bartender profile lookup on every bartender request
+Index("ix_bartenders_user_id_is_active", Bartender.user_id, Bartender.is_active)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Numeric, JSON
+from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Numeric, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -29,3 +29,6 @@ class Drink(Base):
     order_items = relationship("OrderItem", back_populates="drink")
     drink_lists = relationship("DrinkList", secondary="drink_list_drinks", back_populates="drinks")
 
+
+# Club menu and available drinks of a club
+Index("ix_drinks_club_id_is_available", Drink.club_id, Drink.is_available)
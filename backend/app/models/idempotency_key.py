@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of the request body
+    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=True)  # Set in the order's transaction
+    response_body = Column(JSON, nullable=True)  # Set once the response is built
+    locked_at = Column(DateTime(timezone=True), nullable=False)  # When the owning request claimed the key
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
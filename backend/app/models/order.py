@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Numeric, Enum
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Numeric, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -43,11 +43,49 @@ class Order(Base):
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
 
 
+# Keyset pagination for a customer's order history (newest first, id as tie-breaker)
+Index(
+    "ix_orders_customer_id_created_at_id",
+    Order.customer_id,
+    Order.created_at.desc(),
+    Order.id.desc(),
+)
+
+# Bar screen filtered by status (e.g. only READY orders), oldest first
+Index(
+    "ix_orders_club_id_status_created_at",
+    Order.club_id,
+    Order.status,
+    Order.created_at,
+)
+
+# Hot bartender feed. Open orders are a small slice of a club's history, so
+# the partial index stays small no matter how many orders were completed
+Index(
+    "ix_orders_club_id_created_at_active",
+    Order.club_id,
+    Order.created_at,
+    postgresql_where=Order.status.in_([
+        OrderStatus.PENDING_PAYMENT,
+        OrderStatus.PAID,
+        OrderStatus.PREPARING,
+        OrderStatus.READY,
+    ]),
+)
+
+# Incremental bartender feed: orders changed since a cursor
+Index(
+    "ix_orders_club_id_changed_at",
+    Order.club_id,
+    func.coalesce(Order.updated_at, Order.created_at),
+)
+
+
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False)
+    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False, index=True)
     drink_id = Column(UUID(as_uuid=True), ForeignKey("drinks.id"), nullable=False)
     quantity = Column(Numeric(10, 0), nullable=False)  # Integer stored as Numeric
     price_at_purchase = Column(Numeric(10, 2), nullable=False)  # Snapshot of price
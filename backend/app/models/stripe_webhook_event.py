@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, DateTime, Integer, Text, JSON, Index
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class StripeWebhookEvent(Base):
+    """Inbox of verified Stripe webhook events, applied by the webhook worker."""
+    __tablename__ = "stripe_webhook_events"
+
+    id = Column(String, primary_key=True)  # Stripe event ID (evt_...)
+    type = Column(String, nullable=False)
+    payment_intent_id = Column(String, nullable=True)
+    payload = Column(JSON, nullable=False)
+    received_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    attempts = Column(Integer, default=0, server_default="0", nullable=False)
+    last_error = Column(Text, nullable=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+# Worker scan: unprocessed events due for an attempt
+Index(
+    "ix_stripe_webhook_events_pending",
+    StripeWebhookEvent.next_attempt_at,
+    postgresql_where=StripeWebhookEvent.processed_at.is_(None),
+)
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, model_validator
-from typing import List, Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Literal, Optional
+from datetime import datetime, timezone
 from decimal import Decimal
 from uuid import UUID
 from app.models.order import OrderStatus, PaymentMethod
@@ -109,10 +109,105 @@ class Order(OrderResponse):
     pass
 
 
+class OrderTombstone(BaseModel):
+    """An order that left the bartender's active queue."""
+    id: str
+    status: OrderStatus
+
+
+class OrderFeedChanges(BaseModel):
+    """Incremental bartender feed: orders to upsert, orders to drop, and the next cursor."""
+    orders: List[OrderResponse]
+    removed: List[OrderTombstone]
+    cursor: str
+    full: bool = False  # True when `orders` is the whole queue rather than a delta
+
+
 class OrderStatusUpdate(BaseModel):
     status: OrderStatus
 
 
+class OrderStatusBatchItem(BaseModel):
+    order_id: str
+    status: OrderStatus
+
+
+class OrderStatusBatchRequest(BaseModel):
+    updates: List[OrderStatusBatchItem]
+
+
+class OrderStatusBatchResult(BaseModel):
+    """Outcome of one entry of a batch status update."""
+    order_id: str
+    ok: bool
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+
+class OrderStatusBatchResponse(BaseModel):
+    results: List[OrderStatusBatchResult]  # Same order as the request
+
+
 class QRScanRequest(BaseModel):
     qr_code: str
 
+
+
+class OfflineOrderItem(BaseModel):
+    drink_name: Optional[str] = None
+    quantity: int
+
+
+class OfflineOrder(BaseModel):
+    """Summary of an order a device can recognise while offline."""
+    code_hash: Optional[str] = None  # First 16 hex chars of SHA-256(qr_code)
+    order_id: str
+    status: OrderStatus
+    payment_method: PaymentMethod
+    total_amount: Decimal
+    items: List[OfflineOrderItem]
+
+
+class OfflineSnapshot(BaseModel):
+    club_id: str
+    generated_at: int  # Unix seconds
+    expires_at: int  # Devices should refresh the snapshot after this
+    signature: str  # Echoed back when syncing
+    orders: List[OfflineOrder]  # Sorted by code_hash for binary search
+
+
+class OfflineOperation(BaseModel):
+    """A scan or status change recorded by a device while offline."""
+    op_id: str  # Client-generated, echoed back in the result
+    kind: Literal["scan", "status", "confirm_payment"]
+    qr_code: Optional[str] = None  # For scans
+    order_id: Optional[str] = None  # For status changes and cash payment confirmations
+    status: Optional[OrderStatus] = None  # Target status for status changes
+    performed_at: datetime  # Device clock; operations are applied in this order
+
+    @field_validator('performed_at')
+    @classmethod
+    def assume_utc(cls, value: datetime) -> datetime:
+        """Read times without an offset as UTC, so a batch can always be sorted"""
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+
+class OfflineSyncRequest(BaseModel):
+    snapshot_generated_at: int = Field(ge=0, lt=2**32)  # Signed as an unsigned 32-bit value
+    snapshot_signature: str
+    operations: List[OfflineOperation]
+
+
+class OfflineOperationResult(BaseModel):
+    op_id: str
+    outcome: Literal["applied", "unchanged", "conflict", "rejected"]
+    order_id: Optional[str] = None
+    status: Optional[OrderStatus] = None  # Order status after the sync
+    error: Optional[str] = None
+
+
+class OfflineSyncResponse(BaseModel):
+    results: List[OfflineOperationResult]  # Same order as the request
+    orders: List[OrderResponse]  # Every order the sync changed
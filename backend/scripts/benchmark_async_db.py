@@ -0,0 +1,138 @@
+"""
+Benchmark async endpoints with a blocking session vs. the async session.
+
+In-process mode serves one query (pg_sleep(--delay) on Postgres, SELECT 1
+elsewhere) from three kinds of endpoint and fires concurrent requests at
+each through an in-process ASGI client:
+
+- blocking:   async def running the query on a regular Session (the old
+              pattern; every request waits for the one before it)
+- threadpool: plain def with a regular Session, run in the threadpool
+- async:      async def with get_async_db (an AsyncSession with
+              DB_ASYNC_ENABLED, the threaded fallback otherwise)
+
+HTTP mode fires concurrent GETs at a running server instead.
+
+Usage:
+    python scripts/benchmark_async_db.py --delay 0.02 --concurrency 50 --requests 500
+    DB_ASYNC_ENABLED=true python scripts/benchmark_async_db.py
+    python scripts/benchmark_async_db.py --url http://localhost:8000 --path /api/v1/clubs
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.db.async_session import AsyncSessionLocal, dispose_async_engine, get_async_db
+from app.db.base import engine, get_db
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[max(int(len(samples) * fraction) - 1, 0)]
+
+
+def build_app(delay: float) -> FastAPI:
+    if engine.dialect.name == "postgresql":
+        query, params = text("SELECT pg_sleep(:delay)"), {"delay": delay}
+    else:
+        query, params = text("SELECT 1"), {}
+
+    app = FastAPI()
+
+    @app.get("/blocking")
+    async def blocking(db: Session = Depends(get_db)):
+        db.execute(query, params)
+        return {}
+
+    @app.get("/threadpool")
+    def threadpool(db: Session = Depends(get_db)):
+        db.execute(query, params)
+        return {}
+
+    @app.get("/async")
+    async def async_session(db=Depends(get_async_db)):
+        await db.execute(query, params)
+        return {}
+
+    return app
+
+
+async def run(client: httpx.AsyncClient, path: str, concurrency: int, requests: int):
+    statuses = Counter()
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return statuses, requests / elapsed, latencies
+
+
+def report(label: str, statuses: Counter, throughput: float, latencies: list) -> None:
+    print(
+        f"  {label:<12} {throughput:>8.1f} {statistics.median(latencies):>8.1f} "
+        f"{percentile(latencies, 0.99):>8.1f}  {dict(statuses)}"
+    )
+
+
+async def benchmark_in_process(args):
+    app = build_app(args.delay)
+    mode = "AsyncSession" if AsyncSessionLocal is not None else "threaded fallback"
+    print(f"In-process, {engine.dialect.name}, delay {args.delay}s, async endpoint uses {mode}")
+    print(f"  concurrency {args.concurrency}, {args.requests} requests per endpoint")
+    print(f"  {'endpoint':<12} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}  status codes")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+        for path in ("/blocking", "/threadpool", "/async"):
+            await client.get(path)  # Open the pool outside the timing
+            report(path.lstrip("/"), *await run(client, path, args.concurrency, args.requests))
+    await dispose_async_engine()
+
+
+async def benchmark_http(args):
+    print(f"HTTP against {args.url}, concurrency {args.concurrency}, {args.requests} requests per path")
+    print(f"  {'path':<12} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}  status codes")
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, timeout=60) as client:
+        for path in args.path:
+            report(path, *await run(client, path, args.concurrency, args.requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay", type=float, default=0.02, help="simulated query time in seconds (Postgres only)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--url", help="benchmark a running server instead")
+    parser.add_argument("--path", nargs="+", default=["/api/v1/clubs"], help="paths to GET in HTTP mode")
+    parser.add_argument("--token", help="bearer token for authenticated paths")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(benchmark_http(args))
+    else:
+        asyncio.run(benchmark_in_process(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark password hashing and login throughput.
+
+In-process mode times bcrypt verification through PasswordHasher for each
+executor kind, worker count and work factor, as a burst of concurrent
+logins would use it.
+
+HTTP mode fires concurrent logins at a running server and, at the same
+time, probes GET /health to show how much unrelated requests slow down.
+503 answers are the hasher shedding load, not failures.
+
+Usage:
+    python scripts/benchmark_login.py                              # in-process, default settings
+    python scripts/benchmark_login.py --rounds 10 12 --workers 1 2 4
+    python scripts/benchmark_login.py --url http://localhost:8000 \\
+        --email someone@example.com --password secret --concurrency 100 --requests 1000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.password_hasher import PasswordHasher
+from app.core.security import get_password_hash
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[max(int(len(samples) * fraction) - 1, 0)]
+
+
+def benchmark_in_process(args):
+    print(f"In-process verification, {args.logins} concurrent logins per run")
+    print(f"  {'executor':<8} {'workers':>7} {'rounds':>6} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for rounds in args.rounds:
+        hashed = get_password_hash("benchmark-password", rounds)
+        for kind in args.executors:
+            for workers in args.workers:
+                hasher = PasswordHasher(kind, workers, max_pending=args.logins)
+                hasher.verify("benchmark-password", hashed)  # Start the pool outside the timing
+
+                def login():
+                    start = time.perf_counter()
+                    hasher.verify("benchmark-password", hashed)
+                    return (time.perf_counter() - start) * 1000
+
+                # Callers block on the hasher like request threads do
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=args.logins) as callers:
+                    latencies = list(callers.map(lambda _: login(), range(args.logins)))
+                elapsed = time.perf_counter() - start
+                hasher.shutdown()
+                print(
+                    f"  {kind:<8} {workers:>7} {rounds:>6} {args.logins / elapsed:>9.1f} "
+                    f"{statistics.median(latencies):>8.1f} {percentile(latencies, 0.95):>8.1f}"
+                )
+
+
+async def benchmark_http(args):
+    import httpx
+
+    statuses = Counter()
+    login_latencies = []
+    probe_latencies = []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def login():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/api/v1/auth/login",
+                    json={"email": args.email, "password": args.password},
+                )
+                statuses[response.status_code] += 1
+                if response.status_code == 200:
+                    login_latencies.append((time.perf_counter() - start) * 1000)
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/health")
+                probe_latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.05)
+
+        baseline = []
+        for _ in range(20):
+            start = time.perf_counter()
+            await client.get("/health")
+            baseline.append((time.perf_counter() - start) * 1000)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    print(f"HTTP logins against {args.url} ({args.requests} requests, concurrency {args.concurrency})")
+    print(f"  status codes: {dict(statuses)}")
+    print(f"  successful logins/s: {statuses[200] / elapsed:.1f}")
+    if login_latencies:
+        print(f"  login latency: p50 {statistics.median(login_latencies):.1f} ms, "
+              f"p95 {percentile(login_latencies, 0.95):.1f} ms")
+    print(f"  GET /health idle: p50 {statistics.median(baseline):.1f} ms")
+    if probe_latencies:
+        print(f"  GET /health under load: p50 {statistics.median(probe_latencies):.1f} ms, "
+              f"p95 {percentile(probe_latencies, 0.95):.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[12])
+    parser.add_argument("--executors", nargs="+", default=["thread", "process"], choices=["thread", "process"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--logins", type=int, default=40, help="concurrent logins per in-process run")
+    parser.add_argument("--url", help="benchmark a running server instead")
+    parser.add_argument("--email")
+    parser.add_argument("--password")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    if args.url:
+        if not args.email or not args.password:
+            parser.error("--url needs --email and --password of an existing user")
+        asyncio.run(benchmark_http(args))
+    else:
+        benchmark_in_process(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark QR scan validation: legacy UUID codes vs signed QR tokens.
+
+Legacy codes carry no information, so every scan - including forged codes
+and codes from another club - needs a lookup on orders.qr_code. Signed
+tokens are verified in memory; only valid codes of the bartender's club
+reach the database, and then by primary key.
+
+Usage:
+    python scripts/benchmark_qr_scan.py            # in-memory verification only
+    python scripts/benchmark_qr_scan.py --db       # also time the lookups against DATABASE_URL
+
+The --db mode only runs SELECTs, using the most recent orders that have a QR code.
+"""
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+
+from app.core.qr_service import generate_qr_code, verify_qr_token, validate_qr_code
+
+
+def timed(fn, iterations):
+    """Run fn `iterations` times and return per-call latencies in microseconds."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"  {label:<42} median {statistics.median(samples):>9.1f} us   p95 {p95:>9.1f} us")
+
+
+def benchmark_in_memory(iterations):
+    club_id = uuid.uuid4()
+    valid = generate_qr_code(uuid.uuid4(), club_id)
+    forged = valid[:-4] + ("AAAA" if not valid.endswith("AAAA") else "BBBB")
+    foreign = generate_qr_code(uuid.uuid4(), uuid.uuid4())
+    legacy = str(uuid.uuid4())
+
+    print(f"In-memory validation ({iterations} iterations)")
+    report("signed token: valid", timed(lambda: verify_qr_token(valid), iterations))
+    report("signed token: forged", timed(lambda: verify_qr_token(forged), iterations))
+    report("signed token: other club", timed(lambda: verify_qr_token(foreign).club_id == club_id, iterations))
+    report("malformed code", timed(lambda: verify_qr_token("not-a-code") or validate_qr_code("not-a-code"), iterations))
+    report("legacy UUID: format check only", timed(lambda: validate_qr_code(legacy), iterations))
+
+
+def benchmark_database(iterations):
+    from app.db.base import SessionLocal
+
+    db = SessionLocal()
+    try:
+        orders = db.execute(text(
+            "SELECT id, club_id, qr_code FROM orders WHERE qr_code IS NOT NULL "
+            "ORDER BY created_at DESC LIMIT 100"
+        )).all()
+        if not orders:
+            print("No orders with a QR code - skipping database benchmark")
+            return
+
+        by_code = text("SELECT id FROM orders WHERE qr_code = :qr_code AND club_id = :club_id")
+        by_id = text("SELECT id FROM orders WHERE id = :id AND club_id = :club_id")
+        tokens = [(generate_qr_code(order.id, order.club_id), order.club_id) for order in orders]
+        forged = [(str(uuid.uuid4()), order.club_id) for order in orders]
+
+        def cycle(items):
+            index = 0
+
+            def next_item():
+                nonlocal index
+                index += 1
+                return items[index % len(items)]
+            return next_item
+
+        next_order, next_token, next_forged = cycle(orders), cycle(tokens), cycle(forged)
+
+        def legacy_valid():
+            order = next_order()
+            db.execute(by_code, {"qr_code": order.qr_code, "club_id": order.club_id}).first()
+
+        def legacy_unknown():
+            code, club_id = next_forged()
+            db.execute(by_code, {"qr_code": code, "club_id": club_id}).first()
+
+        def token_valid():
+            code, club_id = next_token()
+            token = verify_qr_token(code)
+            if token and token.club_id == club_id:
+                db.execute(by_id, {"id": token.order_id, "club_id": club_id}).first()
+
+        def token_forged():
+            code, club_id = next_token()
+            verify_qr_token(code[:-4] + "AAAA")
+
+        print(f"Scan lookup against the database ({iterations} iterations, {len(orders)} orders)")
+        report("legacy UUID: valid (lookup by qr_code)", timed(legacy_valid, iterations))
+        report("legacy UUID: unknown code (lookup by qr_code)", timed(legacy_unknown, iterations))
+        report("signed token: valid (verify + lookup by id)", timed(token_valid, iterations))
+        report("signed token: forged (verify only)", timed(token_forged, iterations))
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--db", action="store_true", help="also time database lookups")
+    args = parser.parse_args()
+
+    benchmark_in_memory(args.iterations * 10)
+    if args.db:
+        print()
+        benchmark_database(args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark worker startup.
+
+Reports, over several runs:
+
+- import time: how long `import app.main` takes in a fresh interpreter,
+  plus the modules with the highest self time from `python -X importtime`
+- time to first request: from spawning uvicorn until GET /health answers,
+  until GET /health/ready passes (after the pool warm-up), and how long the
+  first database-backed request then takes
+
+Runs against the database in the environment (.env), like the app would.
+
+Usage:
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --runs 5 --warmup 5 --path /api/v1/clubs
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent.parent
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)"
+
+
+def measure_import(runs: int) -> list:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return samples
+
+
+def slowest_imports(top: int) -> list:
+    """(self ms, cumulative ms, module) of the imports with the highest self time."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)", line)
+        if match:
+            rows.append((int(match.group(1)) / 1000, int(match.group(2)) / 1000, match.group(3)))
+    return sorted(rows, reverse=True)[:top]
+
+
+def wait_for(client: httpx.Client, path: str, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{path} did not answer 200 in time")
+
+
+def measure_first_request(args, port: int) -> dict:
+    env = dict(os.environ, DB_POOL_WARMUP_CONNECTIONS=str(args.warmup))
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            deadline = start + args.timeout
+            live = wait_for(client, "/health", deadline)
+            ready = wait_for(client, "/health/ready", deadline)
+            request_start = time.perf_counter()
+            client.get(args.path)
+            first_request = time.perf_counter() - request_start
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return {
+        "live": live - start,
+        "ready": ready - start,
+        "first_request": first_request,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--warmup", type=int, default=0, help="DB_POOL_WARMUP_CONNECTIONS for the server runs")
+    parser.add_argument("--path", default="/api/v1/clubs", help="first database-backed request")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    samples = measure_import(args.runs)
+    print(f"import app.main: median {statistics.median(samples) * 1000:.0f} ms, "
+          f"max {max(samples) * 1000:.0f} ms over {args.runs} runs")
+    print("  slowest imports (self / cumulative):")
+    for self_ms, cumulative_ms, module in slowest_imports(args.top):
+        print(f"    {self_ms:>8.1f} ms {cumulative_ms:>8.1f} ms  {module}")
+
+    results = [measure_first_request(args, args.port) for _ in range(args.runs)]
+    print(f"uvicorn start, pool warm-up {args.warmup} connections, {args.runs} runs (median)")
+    for key, label in (
+        ("live", "GET /health answers"),
+        ("ready", "GET /health/ready passes"),
+        ("first_request", f"first GET {args.path} takes"),
+    ):
+        print(f"  {label:<32} {statistics.median(r[key] for r in results) * 1000:>8.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Check that every hot query is served by an index.
+
+Creates the tables (with the indexes declared on the models) in a throwaway
+schema, loads a synthetic dataset shaped like production - a long history of
+completed orders and a thin slice of open ones per club - runs ANALYZE, then
+EXPLAIN ANALYZE on each hot query and reports which indexes the plans use.
+
+Everything runs in one transaction that is rolled back at the end, so the
+real tables are never touched and nothing is left behind.
+
+Usage:
+    python scripts/explain_hot_queries.py                   # report to stdout
+    python scripts/explain_hot_queries.py --orders 1000000  # bigger dataset
+    python scripts/explain_hot_queries.py --output report.md
+
+Exits with status 1 if any query does not use its expected index.
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.db.base import Base, engine
+import app.models  # noqa: F401 - registers every table on Base.metadata
+from app.models.bartender import Bartender
+from app.models.drink import Drink
+from app.models.order import Order, OrderItem, OrderStatus
+from app.api.v1.endpoints.bartender import _active_orders_query, _order_changed_at
+
+SCHEMA = "explain_hot_queries"
+SCAN_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN ANALYZE of a statement, with its parameters bound as usual."""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+SEED_SQL = [
+    """
+    INSERT INTO users (id, email, hashed_password, role, is_active, created_at)
+    SELECT gen_random_uuid(), 'user' || g || '@example.com', 'x', 'CUSTOMER', true, now()
+    FROM generate_series(1, :users) g
+    """,
+    """
+    INSERT INTO clubs (id, owner_id, name, is_active, created_at)
+    SELECT gen_random_uuid(), (SELECT id FROM users LIMIT 1), 'Club ' || g, true, now()
+    FROM generate_series(1, :clubs) g
+    """,
+    """
+    INSERT INTO bartenders (id, user_id, club_id, is_active, created_at)
+    SELECT gen_random_uuid(), u.id, c.id, u.rn % 5 <> 0, now()
+    FROM (SELECT id, row_number() OVER () AS rn FROM users) u
+    JOIN (SELECT id, row_number() OVER () AS rn FROM clubs) c ON c.rn = u.rn % :clubs + 1
+    WHERE u.rn <= :bartenders
+    """,
+    """
+    INSERT INTO drinks (id, club_id, name, price, is_available, created_at)
+    SELECT gen_random_uuid(), c.id, 'Drink ' || g, 5 + g % 10, g % 5 <> 0, now()
+    FROM clubs c CROSS JOIN generate_series(1, :drinks_per_club) g
+    """,
+    # One order in 200 is still open (and recent); the rest is history
+    """
+    WITH c AS (SELECT array_agg(id) AS ids FROM clubs),
+         u AS (SELECT array_agg(id) AS ids FROM users),
+         o AS (
+             SELECT g,
+                    CASE
+                        WHEN g % 200 = 0 THEN (ARRAY['PENDING_PAYMENT', 'PAID', 'PREPARING', 'READY'])[1 + (g / 200) % 4]
+                        WHEN g % 20 = 0 THEN 'CANCELLED'
+                        ELSE 'COMPLETED'
+                    END AS status,
+                    CASE
+                        WHEN g % 200 = 0 THEN now() - random() * interval '2 hours'
+                        ELSE now() - random() * interval '365 days'
+                    END AS created_at
+             FROM generate_series(1, :orders) g
+         )
+    INSERT INTO orders (id, customer_id, club_id, total_amount, payment_method, status, qr_code, created_at, updated_at)
+    SELECT gen_random_uuid(),
+           u.ids[1 + floor(random() * array_length(u.ids, 1))::int],
+           c.ids[1 + floor(random() * array_length(c.ids, 1))::int],
+           15,
+           (CASE WHEN o.g % 5 = 0 THEN 'CASH' ELSE 'CARD' END)::paymentmethod,
+           o.status::orderstatus,
+           md5(o.g::text),
+           o.created_at,
+           CASE WHEN o.status = 'PENDING_PAYMENT' THEN NULL ELSE o.created_at + interval '5 minutes' END
+    FROM o, c, u
+    """,
+    """
+    INSERT INTO order_items (id, order_id, drink_id, quantity, price_at_purchase)
+    SELECT gen_random_uuid(), o.id, d.ids[1 + floor(random() * array_length(d.ids, 1))::int], 1, 5
+    FROM orders o
+    CROSS JOIN generate_series(1, :items_per_order)
+    CROSS JOIN (SELECT array_agg(id) AS ids FROM drinks) d
+    """,
+]
+
+
+def seed(conn, args) -> None:
+    params = {
+        "users": args.users,
+        "clubs": args.clubs,
+        "bartenders": args.clubs * 10,
+        "drinks_per_club": args.drinks_per_club,
+        "orders": args.orders,
+        "items_per_order": args.items_per_order,
+    }
+    for statement in SEED_SQL:
+        conn.execute(text(statement), params)
+    for table in ("users", "clubs", "bartenders", "drinks", "orders", "order_items"):
+        conn.execute(text(f"ANALYZE {table}"))
+
+
+def hot_queries(db: Session):
+    """(name, expected index, statement) for each hot query, with realistic parameters."""
+    club_id = db.query(Order.club_id).filter(Order.status == OrderStatus.PAID).limit(1).scalar()
+    customer_id = db.query(Order.customer_id).limit(1).scalar()
+    bartender_user_id = db.query(Bartender.user_id).limit(1).scalar()
+    qr_code = db.query(Order.qr_code).filter(Order.club_id == club_id).limit(1).scalar()
+    order_ids = [row.id for row in db.query(Order.id).filter(Order.club_id == club_id).limit(50)]
+    now = datetime.now(timezone.utc)
+    changed_at = _order_changed_at()
+
+    return [
+        (
+            "bartender feed (active orders of a club)",
+            "ix_orders_club_id_created_at_active",
+            _active_orders_query(db, club_id, now=now).statement,
+        ),
+        (
+            "bar history filtered by status",
+            "ix_orders_club_id_status_created_at",
+            _active_orders_query(db, club_id, OrderStatus.COMPLETED).statement,
+        ),
+        (
+            "bartender changes since cursor",
+            "ix_orders_club_id_changed_at",
+            db.query(Order).filter(
+                Order.club_id == club_id,
+                or_(
+                    changed_at >= now - timedelta(seconds=30),
+                    (Order.status == OrderStatus.READY)
+                    & (changed_at >= now - timedelta(minutes=91))
+                    & (changed_at < now - timedelta(minutes=90)),
+                ),
+            ).order_by(Order.created_at.asc()).statement,
+        ),
+        (
+            "customer order history page",
+            "ix_orders_customer_id_created_at_id",
+            db.query(Order).filter(Order.customer_id == customer_id).order_by(
+                Order.created_at.desc(), Order.id.desc()
+            ).limit(50).statement,
+        ),
+        (
+            "items of a page of orders",
+            "ix_order_items_order_id",
+            db.query(OrderItem).filter(OrderItem.order_id.in_(order_ids)).statement,
+        ),
+        (
+            "club menu",
+            "ix_drinks_club_id_is_available",
+            db.query(Drink).filter(Drink.club_id == club_id).statement,
+        ),
+        (
+            "available drinks of a club",
+            "ix_drinks_club_id_is_available",
+            db.query(Drink).filter(Drink.club_id == club_id, Drink.is_available == True).statement,
+        ),
+        (
+            "bartender profile lookup",
+            "ix_bartenders_user_id_is_active",
+            db.query(Bartender).filter(Bartender.user_id == bartender_user_id, Bartender.is_active == True).statement,
+        ),
+        (
+            "QR scan by code",
+            "ix_orders_qr_code",
+            db.query(Order).filter(Order.qr_code == qr_code, Order.club_id == club_id).statement,
+        ),
+    ]
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def explain(db: Session, statement) -> dict:
+    result = db.execute(Explain(statement)).scalar()
+    return result[0]
+
+
+def describe(plan: dict) -> str:
+    scans = []
+    for node in _plan_nodes(plan["Plan"]):
+        if node["Node Type"] in SCAN_NODES:
+            scans.append(f"{node['Node Type']} using {node['Index Name']}")
+        elif node["Node Type"] == "Seq Scan":
+            scans.append(f"Seq Scan on {node['Relation Name']}")
+    return "; ".join(scans)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--clubs", type=int, default=50)
+    parser.add_argument("--drinks-per-club", type=int, default=100)
+    parser.add_argument("--items-per-order", type=int, default=2)
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    lines = [
+        "# EXPLAIN ANALYZE of hot queries",
+        "",
+        f"Synthetic dataset: {args.orders} orders ({args.items_per_order} items each), {args.users} users, "
+        f"{args.clubs} clubs, {args.drinks_per_club} drinks per club, 0.5% of orders open.",
+        "",
+        "| Query | Expected index | Scans in plan | Execution (ms) | Result |",
+        "|---|---|---|---|---|",
+    ]
+    failures = 0
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            # Every statement - including SET LOCAL - stays in this one
+            # transaction, so this also works through a transaction pooler
+            conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            conn.execute(text(f"SET LOCAL search_path TO {SCHEMA}, public"))
+            Base.metadata.create_all(conn, checkfirst=False)
+            print("Loading synthetic dataset...", file=sys.stderr)
+            seed(conn, args)
+
+            db = Session(bind=conn)
+            for name, expected, statement in hot_queries(db):
+                plan = explain(db, statement)
+                used = {node.get("Index Name") for node in _plan_nodes(plan["Plan"])}
+                ok = expected in used
+                failures += not ok
+                lines.append(
+                    f"| {name} | `{expected}` | {describe(plan)} | "
+                    f"{plan['Execution Time']:.3f} | {'ok' if ok else 'NOT USED'} |"
+                )
+        finally:
+            transaction.rollback()
+
+    report = "\n".join(lines)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Test setup.
+
+The tests run against an in-memory SQLite database and need no server. The
+models use PostgreSQL types and server defaults, so the hooks below render
+them for SQLite and let UUID columns take string ids the way psycopg2 does.
+Everything that talks to Stripe is monkeypatched in the tests that need it.
+"""
+import os
+import tempfile
+import uuid
+from types import SimpleNamespace
+
+# Settings are read on import, so the required ones get test values first
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/clubverse-tests.db")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("STRIPE_SECRET_KEY", "sk_test_dummy")
+os.environ.setdefault("STRIPE_PUBLISHABLE_KEY", "pk_test_dummy")
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql import functions, sqltypes
+
+import app.db.base as base
+
+
+@compiles(functions.now, "sqlite")
+def _now_sqlite(element, compiler, **kw):
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+@compiles(PostgresUUID, "sqlite")
+def _uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+
+_uuid_bind_processor = sqltypes.Uuid.bind_processor
+
+
+def _lenient_uuid_bind_processor(self, dialect):
+    process = _uuid_bind_processor(self, dialect)
+    if process is None:
+        return None
+
+    def bind(value):
+        return process(uuid.UUID(value) if isinstance(value, str) else value)
+
+    return bind
+
+
+sqltypes.Uuid.bind_processor = _lenient_uuid_bind_processor
+
+# One shared connection, so the in-memory database is visible from every
+# thread. Swapped in before the app modules import SessionLocal
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+base.engine = engine
+base.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app.models  # noqa: E402,F401
+from app.core.auth_cache import auth_cache  # noqa: E402
+from app.core.menu_cache import menu_cache  # noqa: E402
+from app.core.request_metrics import instrument_engine  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.bartender import Bartender  # noqa: E402
+from app.models.club import Club  # noqa: E402
+from app.models.drink import Drink  # noqa: E402
+from app.models.order import Order, OrderItem, OrderStatus, PaymentMethod  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+
+instrument_engine(engine)
+
+
+@pytest.fixture(autouse=True)
+def database():
+    base.Base.metadata.create_all(engine)
+    auth_cache.clear()
+    menu_cache.clear()
+    yield
+    base.Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    session = base.SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def statements():
+    """SQL statements executed while the test runs, in order."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _auth_headers(user_id) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+@pytest.fixture
+def seed(db):
+    """A club with a Stripe-enabled owner, five drinks, a bartender and a customer."""
+    owner = User(
+        email="owner@example.com",
+        hashed_password="x",
+        role=UserRole.CLUB_OWNER,
+        full_name="Owner",
+        stripe_account_id="acct_test",
+        stripe_account_status="active",
+    )
+    customer = User(email="customer@example.com", hashed_password="x", role=UserRole.CUSTOMER)
+    bartender = User(email="bartender@example.com", hashed_password="x", role=UserRole.BARTENDER, full_name="Bartender")
+    db.add_all([owner, customer, bartender])
+    db.flush()
+    club = Club(owner_id=owner.id, name="Club")
+    db.add(club)
+    db.flush()
+    drinks = [Drink(club_id=club.id, name=f"Drink {i}", price=5 + i) for i in range(5)]
+    db.add_all(drinks)
+    db.add(Bartender(user_id=bartender.id, club_id=club.id))
+    db.commit()
+    return SimpleNamespace(
+        club_id=club.id,
+        customer_id=customer.id,
+        drink_ids=[drink.id for drink in drinks],
+        owner=_auth_headers(owner.id),
+        customer=_auth_headers(customer.id),
+        bartender=_auth_headers(bartender.id),
+    )
+
+
+@pytest.fixture
+def add_orders(db, seed):
+    """Insert paid orders for the seeded customer, each with two items."""
+
+    def add(count: int, status: OrderStatus = OrderStatus.PAID) -> list:
+        orders = []
+        for _ in range(count):
+            order = Order(
+                customer_id=seed.customer_id,
+                club_id=seed.club_id,
+                total_amount=11,
+                payment_method=PaymentMethod.CARD,
+                status=status,
+            )
+            order.items = [
+                OrderItem(drink_id=drink_id, quantity=1, price_at_purchase=5 + i)
+                for i, drink_id in enumerate(seed.drink_ids[:2])
+            ]
+            orders.append(order)
+        db.add_all(orders)
+        db.commit()
+        return [order.id for order in orders]
+
+    return add
@@ -0,0 +1,107 @@
+"""Admission control queues on the event loop, by priority, within its limits."""
+import asyncio
+import threading
+
+import pytest
+
+from app.db.admission import AdmissionController, AdmissionRejected, Priority
+from app.db.base import db_admission
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_reserved_slot_is_only_for_high_priority():
+    async def scenario():
+        controller = AdmissionController(limit=3, reserved=1, max_queue=5, queue_timeout=0.05)
+        await controller.acquire(Priority.LOW)
+        await controller.acquire(Priority.NORMAL)
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire(Priority.LOW)
+        await controller.acquire(Priority.HIGH)
+        return controller.stats()
+
+    stats = run(scenario())
+    assert stats["in_flight"] == 3
+    assert stats["rejected"]["LOW"] == 1
+
+
+def test_released_slot_goes_to_the_best_waiter():
+    async def scenario():
+        controller = AdmissionController(limit=1, reserved=0, max_queue=5, queue_timeout=1)
+        await controller.acquire(Priority.NORMAL)
+        admitted = []
+
+        async def wait(priority):
+            await controller.acquire(priority)
+            admitted.append(priority)
+
+        waiters = [asyncio.create_task(wait(Priority.LOW)), asyncio.create_task(wait(Priority.HIGH))]
+        await asyncio.sleep(0)
+        controller.release()
+        await asyncio.sleep(0.01)
+        assert admitted == [Priority.HIGH]
+        controller.release()
+        await asyncio.gather(*waiters)
+        return admitted
+
+    assert run(scenario()) == [Priority.HIGH, Priority.LOW]
+
+
+def test_full_queue_rejects_all_but_high_priority():
+    async def scenario():
+        controller = AdmissionController(limit=1, reserved=0, max_queue=1, queue_timeout=0.05)
+        await controller.acquire(Priority.NORMAL)
+        queued = asyncio.create_task(controller.acquire(Priority.LOW))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire(Priority.NORMAL)
+        high = asyncio.create_task(controller.acquire(Priority.HIGH))
+        await asyncio.sleep(0)
+        assert controller.stats()["waiting"] == 2
+        for task in (queued, high):
+            with pytest.raises(AdmissionRejected):
+                await task
+        return controller.stats()
+
+    stats = run(scenario())
+    assert stats["waiting"] == 0
+    assert stats["in_flight"] == 1
+
+
+def test_queued_requests_do_not_hold_threads():
+    async def scenario():
+        controller = AdmissionController(limit=1, reserved=0, max_queue=100, queue_timeout=1)
+        await controller.acquire(Priority.NORMAL)
+        threads = threading.active_count()
+        waiters = [asyncio.create_task(controller.acquire(Priority.LOW)) for _ in range(100)]
+        await asyncio.sleep(0)
+        assert controller.stats()["waiting"] == 100
+        assert threading.active_count() == threads
+        for _ in range(101):
+            controller.release()
+        await asyncio.gather(*waiters)
+        return controller.stats()
+
+    stats = run(scenario())
+    assert stats["admitted"]["LOW"] == 100
+    assert stats["in_flight"] == 0
+
+
+def test_requests_beyond_capacity_get_503_with_retry_after(client, seed, monkeypatch):
+    monkeypatch.setattr(db_admission, "queue_timeout", 0.05)
+    held = db_admission.limit - db_admission.reserved
+    for _ in range(held):
+        run(db_admission.acquire(Priority.NORMAL))
+    try:
+        response = client.get("/api/v1/clubs")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "2"
+        # Bartender writes may still use the reserved slot
+        response = client.post("/api/v1/bartender/scan", json={"qr_code": "unknown"}, headers=seed.bartender)
+        assert response.status_code == 404
+    finally:
+        for _ in range(held):
+            db_admission.release()
+    assert client.get("/api/v1/clubs").status_code == 200
@@ -0,0 +1,76 @@
+"""The auth and menu caches stay bounded and never store a load that raced an invalidation."""
+import time
+import uuid
+
+from app.core.auth_cache import AuthCache, CachedIdentity
+from app.core.menu_cache import MenuCache
+from app.models.user import UserRole
+
+
+def identity(user_id) -> CachedIdentity:
+    return CachedIdentity(
+        user_id=user_id,
+        role=UserRole.CUSTOMER,
+        is_active=True,
+        bartender_id=None,
+        club_id=None,
+        loaded_at=time.monotonic(),
+    )
+
+
+def test_auth_cache_keeps_nothing_for_invalidated_users():
+    cache = AuthCache(max_users=10, ttl_seconds=60)
+    user_ids = [uuid.uuid4() for _ in range(1000)]
+    for user_id in user_ids:
+        with cache.loading(user_id) as version:
+            cache.put(identity(user_id), version)
+        cache.invalidate(user_id)
+        cache.invalidate(uuid.uuid4())  # Users this worker never loaded
+    cache.clear()
+
+    assert cache.stats()["users"] == 0
+    assert cache.stats()["loading"] == 0
+
+
+def test_auth_cache_drops_a_load_that_raced_an_invalidation():
+    cache = AuthCache(max_users=10, ttl_seconds=60)
+    user_id = uuid.uuid4()
+
+    with cache.loading(user_id) as version:
+        cache.invalidate(user_id)
+        cache.put(identity(user_id), version)
+    assert cache.get(user_id) is None
+
+    with cache.loading(user_id) as version:
+        cache.put(identity(user_id), version)
+    assert cache.get(user_id) is not None
+    assert cache.stats()["loading"] == 0
+
+
+def test_menu_cache_keeps_nothing_for_invalidated_clubs(db, seed):
+    cache = MenuCache(max_clubs=10, ttl_seconds=60)
+    cache.get(db, seed.club_id)
+    cache.invalidate(seed.club_id)
+    for _ in range(1000):
+        cache.invalidate(uuid.uuid4())
+    cache.clear()
+
+    assert cache.stats() == {"clubs": 0, "loading": 0, "hits": 0, "misses": 1}
+
+
+def test_menu_cache_drops_a_load_that_raced_an_invalidation(db, seed, monkeypatch):
+    cache = MenuCache(max_clubs=10, ttl_seconds=60)
+    query = db.query
+
+    def query_then_invalidate(*args, **kwargs):
+        cache.invalidate(seed.club_id)  # Another request commits a menu change meanwhile
+        return query(*args, **kwargs)
+
+    monkeypatch.setattr(db, "query", query_then_invalidate)
+    assert len(cache.get(db, seed.club_id).drinks) == 5
+    monkeypatch.undo()
+
+    assert cache.stats()["clubs"] == 0
+    cache.get(db, seed.club_id)
+    assert cache.stats()["clubs"] == 1
+    assert cache.stats()["loading"] == 0
@@ -0,0 +1,46 @@
+"""Resolving the caller costs one query on an auth cache miss, none on a hit, on the request's own session."""
+from sqlalchemy import event
+
+import app.db.base as base
+
+
+def auth_statements(statements: list) -> list:
+    return [statement for statement in statements if "FROM users" in statement]
+
+
+def test_bartender_request_runs_one_auth_query_on_cache_miss(client, seed, statements):
+    response = client.get("/api/v1/bartender/orders", headers=seed.bartender)
+
+    assert response.status_code == 200
+    assert len(auth_statements(statements)) == 1
+    # The user and their active bartender profile come from the same query
+    assert "bartenders" in auth_statements(statements)[0]
+
+
+def test_bartender_request_runs_no_auth_query_on_cache_hit(client, seed, statements):
+    client.get("/api/v1/bartender/orders", headers=seed.bartender)
+    miss = len(statements)
+
+    statements.clear()
+    response = client.get("/api/v1/bartender/orders", headers=seed.bartender)
+
+    assert response.status_code == 200
+    assert auth_statements(statements) == []
+    assert len(statements) == miss - 1
+
+
+def test_async_endpoint_resolves_the_caller_on_its_own_session(client, seed):
+    sessions = set()
+
+    def began(session, transaction, connection):
+        sessions.add(session)
+
+    event.listen(base.SessionLocal, "after_begin", began)
+    try:
+        response = client.post("/api/v1/clubs", headers=seed.owner, json={"name": "Second club"})
+    finally:
+        event.remove(base.SessionLocal, "after_begin", began)
+
+    assert response.status_code == 201, response.text
+    # The auth query (cache miss) runs on the endpoint's session, not on a second one
+    assert len(sessions) == 1
@@ -0,0 +1,140 @@
+"""A retried POST /orders with the same Idempotency-Key creates its order once."""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+import stripe as stripe_sdk
+from fastapi.testclient import TestClient
+
+import app.api.v1.endpoints.orders as orders_endpoints
+import app.core.idempotency as idempotency
+from app.main import app
+from app.models.idempotency_key import IdempotencyKey
+from app.models.order import Order, OrderStatus
+from app.schemas.order import OrderCreate
+
+
+@pytest.fixture
+def stripe(monkeypatch):
+    created = []
+
+    def create_payment_intent(**kwargs):
+        created.append(kwargs["metadata"]["order_id"])
+        return SimpleNamespace(id=f"pi_{len(created)}", client_secret=f"pi_{len(created)}_secret")
+
+    def retrieve_payment_intent(payment_intent_id, stripe_account_id=None):
+        return SimpleNamespace(id=payment_intent_id, client_secret=f"{payment_intent_id}_secret")
+
+    monkeypatch.setattr(orders_endpoints, "create_payment_intent", create_payment_intent)
+    monkeypatch.setattr(idempotency, "retrieve_payment_intent", retrieve_payment_intent)
+    return created
+
+
+def order_body(seed, quantity=1) -> dict:
+    return {
+        "club_id": str(seed.club_id),
+        "payment_method": "card",
+        "items": [{"drink_id": str(seed.drink_ids[0]), "quantity": quantity, "price_at_purchase": 5}],
+    }
+
+
+def place_order(client, seed, key, quantity=1):
+    return client.post(
+        "/api/v1/orders", headers={**seed.customer, "Idempotency-Key": key}, json=order_body(seed, quantity)
+    )
+
+
+def claim_for_another_request(db, seed, key):
+    fingerprint = idempotency.request_fingerprint(OrderCreate(**order_body(seed)).model_dump_json())
+    assert idempotency.claim_idempotency_key(db, seed.customer_id, key, fingerprint) is None
+
+
+def abandon_lock(db, key):
+    db.query(IdempotencyKey).filter(IdempotencyKey.key == key).update(
+        {IdempotencyKey.locked_at: datetime.now(timezone.utc) - timedelta(hours=1)}, synchronize_session=False
+    )
+    db.commit()
+
+
+def test_retry_replays_the_stored_response(client, db, seed, stripe):
+    first = place_order(client, seed, "key-1")
+    retry = place_order(client, seed, "key-1")
+
+    assert first.status_code == 201 and retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert db.query(Order).count() == 1
+    assert len(stripe) == 1
+
+
+def test_key_reused_with_a_different_request_is_rejected(client, seed, stripe):
+    assert place_order(client, seed, "key-1").status_code == 201
+    response = place_order(client, seed, "key-1", quantity=2)
+    assert response.status_code == 422
+
+
+def test_request_in_flight_gets_409_without_waiting(client, db, seed, stripe):
+    claim_for_another_request(db, seed, "key-1")
+
+    response = place_order(client, seed, "key-1")
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+    assert db.query(Order).count() == 0
+
+
+def test_failure_after_the_order_committed_keeps_the_key(db, seed, stripe, monkeypatch):
+    client = TestClient(app, raise_server_exceptions=False)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("serialization failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(orders_endpoints, "build_order_response", broken)
+        assert place_order(client, seed, "key-1").status_code == 500
+    order = db.query(Order).one()
+
+    # Still locked by the failed request: no second order meanwhile
+    retry = place_order(client, seed, "key-1")
+    assert retry.status_code == 409
+
+    # Once the lock is abandoned the committed order is replayed
+    abandon_lock(db, "key-1")
+    retry = place_order(client, seed, "key-1")
+    assert retry.status_code == 201
+    assert retry.json()["id"] == str(order.id)
+    assert retry.json()["payment_intent_id"] == "pi_1_secret"
+    assert db.query(Order).count() == 1
+    assert len(stripe) == 1
+
+    assert place_order(client, seed, "key-1").json() == retry.json()
+
+
+def test_payment_provider_failure_releases_the_key(client, db, seed, monkeypatch):
+    def unavailable(**kwargs):
+        raise stripe_sdk.error.APIConnectionError("Stripe is down")
+
+    monkeypatch.setattr(orders_endpoints, "create_payment_intent", unavailable)
+    assert place_order(client, seed, "key-1").status_code == 502
+    assert db.query(Order).one().status == OrderStatus.CANCELLED
+    assert db.query(IdempotencyKey).count() == 0
+
+
+def test_abandoned_lock_without_an_order_is_taken_over(client, db, seed, stripe):
+    claim_for_another_request(db, seed, "key-1")
+    abandon_lock(db, "key-1")
+
+    response = place_order(client, seed, "key-1")
+    assert response.status_code == 201, response.text
+    assert db.query(Order).count() == 1
+
+
+def test_unexpected_payment_intent_failure_cancels_the_order(db, seed, monkeypatch):
+    client = TestClient(app, raise_server_exceptions=False)
+
+    def malformed(**kwargs):
+        raise KeyError("client_secret")
+
+    monkeypatch.setattr(orders_endpoints, "create_payment_intent", malformed)
+    assert place_order(client, seed, "key-1").status_code == 500
+    assert db.query(Order).one().status == OrderStatus.CANCELLED
+    assert db.query(IdempotencyKey).count() == 0
@@ -0,0 +1,34 @@
+"""Event-loop stalls are scraped per route, and their stacks stay out of public endpoints."""
+import pytest
+
+from app.core.config import settings
+from app.core.loop_monitor import loop_monitor
+
+
+@pytest.fixture
+def stall():
+    loop_monitor.recent_stalls.append({
+        "route": "GET /api/v1/clubs",
+        "blocked_ms": 150.0,
+        "lag_ms": 180.0,
+        "at": 0,
+        "stack": ['  File "app/api/v1/endpoints/clubs.py", line 1, in list_clubs\n'],
+    })
+    loop_monitor._route_histogram("GET /api/v1/clubs").observe(180.0)
+    yield
+    loop_monitor.recent_stalls.clear()
+    loop_monitor.route_lag.clear()
+
+
+def test_loop_health_hides_stacks_by_default(client, stall, monkeypatch):
+    stalls = client.get("/health/loop").json()["recent_stalls"]
+    assert stalls[-1]["route"] == "GET /api/v1/clubs"
+    assert "stack" not in stalls[-1]
+
+    monkeypatch.setattr(settings, "LOOP_MONITOR_EXPOSE_STACKS", True)
+    assert client.get("/health/loop").json()["recent_stalls"][-1]["stack"]
+
+
+def test_metrics_export_stalls_by_route(client, stall):
+    metrics = client.get("/metrics").text
+    assert 'event_loop_stall_milliseconds_count{method="GET",route="/api/v1/clubs"} 1' in metrics
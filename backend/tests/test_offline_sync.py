@@ -0,0 +1,72 @@
+"""Offline syncs are checked against the snapshot they were recorded with."""
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.core.qr_service import sign_snapshot
+
+
+def sync(client, seed, generated_at, signature=None):
+    return client.post(
+        "/api/v1/bartender/orders/sync",
+        headers=seed.bartender,
+        json={
+            "snapshot_generated_at": generated_at,
+            "snapshot_signature": signature or sign_snapshot(seed.club_id, generated_at),
+            "operations": [],
+        },
+    )
+
+
+def test_sync_with_current_snapshot_is_applied(client, seed):
+    snapshot = client.get("/api/v1/bartender/orders/offline-snapshot", headers=seed.bartender).json()
+    response = sync(client, seed, snapshot["generated_at"], snapshot["signature"])
+    assert response.status_code == 200
+    assert response.json()["results"] == []
+
+
+@pytest.mark.parametrize("generated_at", [-1, 2**32, 2**64])
+def test_out_of_range_generation_time_is_rejected(client, seed, generated_at):
+    response = sync(client, seed, generated_at, signature="x")
+    assert response.status_code == 422
+
+
+def test_snapshot_past_its_grace_period_is_rejected(client, seed):
+    max_age = (settings.OFFLINE_SNAPSHOT_TTL_MINUTES + settings.OFFLINE_SNAPSHOT_SYNC_GRACE_MINUTES) * 60
+    response = sync(client, seed, int(time.time()) - max_age - 60)
+    assert response.status_code == 400
+    assert "expired" in response.json()["detail"]
+
+    assert sync(client, seed, int(time.time()) - max_age + 60).status_code == 200
+
+
+def test_signature_with_non_ascii_characters_is_rejected(client, seed):
+    generated_at = int(time.time())
+    response = sync(client, seed, generated_at, signature="sïgnature")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid offline snapshot signature"
+
+
+def test_batch_mixing_naive_and_aware_times_is_replayed_in_order(client, seed, add_orders):
+    order_id = str(add_orders(1)[0])
+    snapshot = client.get("/api/v1/bartender/orders/offline-snapshot", headers=seed.bartender).json()
+    operations = [
+        # Naive times are UTC: this one happened last
+        {"op_id": "ready", "kind": "status", "order_id": order_id, "status": "ready",
+         "performed_at": "2030-01-01T12:02:00"},
+        {"op_id": "preparing", "kind": "status", "order_id": order_id, "status": "preparing",
+         "performed_at": "2030-01-01T13:01:00+01:00"},
+    ]
+    response = client.post(
+        "/api/v1/bartender/orders/sync",
+        headers=seed.bartender,
+        json={
+            "snapshot_generated_at": snapshot["generated_at"],
+            "snapshot_signature": snapshot["signature"],
+            "operations": operations,
+        },
+    )
+    assert response.status_code == 200, response.text
+    assert [result["outcome"] for result in response.json()["results"]] == ["applied", "applied"]
+    assert response.json()["orders"][0]["status"] == "ready"
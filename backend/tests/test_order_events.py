@@ -0,0 +1,41 @@
+"""Bartender devices only hear about orders they can act on."""
+from types import SimpleNamespace
+
+import pytest
+
+import app.api.v1.endpoints.orders as orders_endpoints
+
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+
+    def create_payment_intent(**kwargs):
+        return SimpleNamespace(id="pi_test", client_secret="pi_test_secret")
+
+    monkeypatch.setattr(orders_endpoints, "create_payment_intent", create_payment_intent)
+    monkeypatch.setattr(orders_endpoints, "publish_order_event", lambda kind, order: events.append((kind, order)))
+    return events
+
+
+def place_order(client, seed, payment_method):
+    return client.post(
+        "/api/v1/orders",
+        headers=seed.customer,
+        json={
+            "club_id": str(seed.club_id),
+            "payment_method": payment_method,
+            "items": [{"drink_id": str(seed.drink_ids[0]), "quantity": 1, "price_at_purchase": 5}],
+        },
+    )
+
+
+def test_cash_order_is_published_when_created(client, seed, published):
+    response = place_order(client, seed, "cash")
+    assert response.status_code == 201
+    assert [(kind, order.id) for kind, order in published] == [("order.created", response.json()["id"])]
+
+
+def test_unpaid_card_order_is_not_published(client, seed, published):
+    assert place_order(client, seed, "card").status_code == 201
+    assert published == []
@@ -0,0 +1,114 @@
+"""The incremental bartender feed sends each change once and drops orders that leave the queue."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.core.cursor import encode_cursor
+from app.models.order import Order, OrderStatus, PaymentMethod
+
+
+def changes(client, seed, cursor=None):
+    params = {"cursor": cursor} if cursor else {}
+    response = client.get("/api/v1/bartender/orders/changes", headers=seed.bartender, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def backdate(db, order_id, created_at, updated_at=None):
+    # Setting updated_at keeps its onupdate from stamping the order as just changed
+    db.query(Order).filter(Order.id == order_id).update(
+        {Order.created_at: created_at, Order.updated_at: updated_at}, synchronize_session=False
+    )
+    db.commit()
+
+
+def ago(**delta) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(**delta)
+
+
+def test_first_fetch_returns_the_whole_active_queue(client, db, seed, add_orders):
+    paid, preparing, completed, card_pending = (
+        add_orders(1)[0],
+        add_orders(1, status=OrderStatus.PREPARING)[0],
+        add_orders(1, status=OrderStatus.COMPLETED)[0],
+        add_orders(1, status=OrderStatus.PENDING_PAYMENT)[0],
+    )
+    cash_pending = add_orders(1, status=OrderStatus.PENDING_PAYMENT)[0]
+    db.query(Order).filter(Order.id == cash_pending).update({Order.payment_method: PaymentMethod.CASH})
+    db.commit()
+
+    feed = changes(client, seed)
+
+    assert feed["full"] is True
+    assert feed["removed"] == []
+    assert {order["id"] for order in feed["orders"]} == {str(paid), str(preparing), str(cash_pending)}
+    assert str(completed) not in str(feed) and str(card_pending) not in str(feed)
+
+
+def test_next_fetch_only_returns_what_changed(client, db, seed, add_orders):
+    unchanged, changed = add_orders(2)
+    backdate(db, unchanged, ago(hours=1))
+    backdate(db, changed, ago(hours=1))
+    add_orders(1)  # Moves the cursor past the overlap window that is replayed on every fetch
+    cursor = changes(client, seed)["cursor"]
+
+    response = client.put(
+        f"/api/v1/bartender/orders/{changed}/status", headers=seed.bartender, json={"status": "preparing"}
+    )
+    assert response.status_code == 200
+    feed = changes(client, seed, cursor)
+
+    assert feed["full"] is False
+    statuses = {order["id"]: order["status"] for order in feed["orders"]}
+    assert statuses[str(changed)] == "preparing"
+    assert str(unchanged) not in statuses
+    assert feed["removed"] == []
+
+
+def test_order_leaving_the_queue_is_removed(client, db, seed, add_orders):
+    ready = add_orders(1, status=OrderStatus.READY)[0]
+    cursor = changes(client, seed)["cursor"]
+
+    response = client.put(
+        f"/api/v1/bartender/orders/{ready}/status", headers=seed.bartender, json={"status": "completed"}
+    )
+    assert response.status_code == 200
+    feed = changes(client, seed, cursor)
+
+    assert feed["orders"] == []
+    assert feed["removed"] == [{"id": str(ready), "status": "completed"}]
+
+
+def test_ready_order_that_aged_out_is_removed(client, db, seed, add_orders):
+    ttl = timedelta(minutes=settings.BARTENDER_READY_ORDER_TTL_MINUTES)
+    ready = add_orders(1, status=OrderStatus.READY)[0]
+    last_change = ago(minutes=1) - ttl
+    backdate(db, ready, last_change, last_change)
+    # The previous fetch was made while the order was still in the hot feed
+    cursor = encode_cursor({
+        "c": str(seed.club_id),
+        "t": ago(minutes=2).isoformat(),
+        "a": (last_change - timedelta(minutes=5)).isoformat(),
+    })
+
+    feed = changes(client, seed, cursor)
+
+    assert feed["orders"] == []
+    assert feed["removed"] == [{"id": str(ready), "status": "ready"}]
+
+
+@pytest.mark.parametrize("cursor", ["garbage", encode_cursor({"t": "yesterday"})])
+def test_malformed_cursor_is_rejected(client, seed, cursor):
+    response = client.get("/api/v1/bartender/orders/changes", headers=seed.bartender, params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_other_clubs_cursor_is_rejected(client, seed):
+    cursor = encode_cursor({
+        "c": "00000000-0000-0000-0000-000000000000",
+        "t": ago(minutes=1).isoformat(),
+        "a": ago(minutes=60).isoformat(),
+    })
+    response = client.get("/api/v1/bartender/orders/changes", headers=seed.bartender, params={"cursor": cursor})
+    assert response.status_code == 400
@@ -0,0 +1,64 @@
+"""Walking the order history with X-Next-Cursor visits every order exactly once."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.cursor import encode_cursor
+from app.models.order import Order
+
+
+def walk(client, seed, limit):
+    """All order ids in page order, and the number of pages fetched."""
+    order_ids, pages, params = [], 0, {"limit": limit}
+    while True:
+        response = client.get("/api/v1/orders/me/history", headers=seed.customer, params=params)
+        assert response.status_code == 200, response.text
+        pages += 1
+        order_ids.extend(order["id"] for order in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return order_ids, pages
+        params = {"limit": limit, "cursor": cursor}
+
+
+def test_walk_returns_every_order_once_newest_first(client, db, seed, add_orders):
+    order_ids = add_orders(7)
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    for minute, order_id in enumerate(order_ids):
+        db.query(Order).filter(Order.id == order_id).update({Order.created_at: start + timedelta(minutes=minute)})
+    db.commit()
+
+    walked, pages = walk(client, seed, limit=3)
+
+    assert walked == [str(order_id) for order_id in reversed(order_ids)]
+    assert pages == 3
+
+
+def test_orders_created_at_the_same_time_are_neither_repeated_nor_skipped(client, db, seed, add_orders):
+    order_ids = add_orders(7)
+    db.query(Order).update({Order.created_at: datetime(2026, 1, 1, 22, 0, tzinfo=timezone.utc)})
+    db.commit()
+
+    walked, _ = walk(client, seed, limit=2)
+
+    assert len(walked) == 7
+    assert set(walked) == {str(order_id) for order_id in order_ids}
+
+
+def test_last_full_page_ends_with_an_empty_page(client, seed, add_orders):
+    add_orders(4)
+    walked, pages = walk(client, seed, limit=2)
+    assert len(walked) == 4
+    assert pages == 3
+
+
+@pytest.mark.parametrize("cursor", [
+    "garbage",
+    encode_cursor({"c": "2026-01-01T00:00:00"}),
+    encode_cursor({"c": "not a date", "i": "00000000-0000-0000-0000-000000000000"}),
+    encode_cursor({"c": "2026-01-01T00:00:00", "i": "not a uuid"}),
+])
+def test_malformed_cursor_is_rejected(client, seed, cursor):
+    response = client.get("/api/v1/orders/me/history", headers=seed.customer, params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
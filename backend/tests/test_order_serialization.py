@@ -0,0 +1,34 @@
+"""Order lists load in a fixed number of statements, however many orders they hold."""
+import pytest
+
+
+@pytest.mark.parametrize("order_count", [1, 25])
+def test_bartender_feed_statement_count_is_fixed(client, seed, add_orders, statements, order_count):
+    add_orders(order_count)
+    client.get("/api/v1/bartender/orders", headers=seed.bartender)  # Fill the auth cache
+
+    statements.clear()
+    response = client.get("/api/v1/bartender/orders", headers=seed.bartender)
+
+    assert response.status_code == 200
+    assert len(response.json()) == order_count
+    assert all(len(order["items"]) == 2 and order["club_name"] == "Club" for order in response.json())
+    # The orders with their club, then all their items with the drink names
+    assert len(statements) == 2
+
+
+@pytest.mark.parametrize("order_count", [1, 25])
+def test_order_history_statement_count_is_fixed(client, seed, add_orders, statements, order_count):
+    add_orders(order_count)
+    client.get("/api/v1/orders/me/history", headers=seed.customer)  # Fill the auth cache
+
+    statements.clear()
+    response = client.get("/api/v1/orders/me/history", headers=seed.customer)
+
+    assert response.status_code == 200
+    assert len(response.json()) == order_count
+    assert all(
+        {item["drink_name"] for item in order["items"]} == {"Drink 0", "Drink 1"}
+        for order in response.json()
+    )
+    assert len(statements) == 2
@@ -0,0 +1,116 @@
+"""Batch status updates report one result per entry, in request order."""
+import pytest
+
+import app.api.v1.endpoints.bartender as bartender_endpoints
+from app.models.club import Club
+from app.models.order import Order, OrderStatus, PaymentMethod
+from app.models.user import User, UserRole
+
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+    monkeypatch.setattr(
+        bartender_endpoints, "publish_orders_event", lambda kind, club_id, orders: events.append(orders)
+    )
+    return events
+
+
+@pytest.fixture
+def foreign_order_id(db, seed):
+    owner = User(email="other-owner@example.com", hashed_password="x", role=UserRole.CLUB_OWNER)
+    db.add(owner)
+    db.flush()
+    club = Club(owner_id=owner.id, name="Other club")
+    db.add(club)
+    db.flush()
+    order = Order(
+        customer_id=seed.customer_id,
+        club_id=club.id,
+        total_amount=5,
+        payment_method=PaymentMethod.CARD,
+        status=OrderStatus.PAID,
+    )
+    db.add(order)
+    db.commit()
+    return order.id
+
+
+def batch(client, seed, *updates):
+    response = client.post(
+        "/api/v1/bartender/orders/status:batch",
+        headers=seed.bartender,
+        json={"updates": [{"order_id": str(order_id), "status": target} for order_id, target in updates]},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["results"]
+
+
+def statuses(db, order_ids) -> list:
+    db.expire_all()
+    return [db.get(Order, order_id).status for order_id in order_ids]
+
+
+def test_results_follow_request_order(client, db, seed, add_orders, published):
+    paid = add_orders(2)
+    preparing = add_orders(1, status=OrderStatus.PREPARING)[0]
+
+    results = batch(client, seed, (preparing, "ready"), (paid[1], "preparing"), (paid[0], "cancelled"))
+
+    assert [result["order_id"] for result in results] == [str(preparing), str(paid[1]), str(paid[0])]
+    assert all(result["ok"] for result in results)
+    assert [result["order"]["status"] for result in results] == ["ready", "preparing", "cancelled"]
+    assert statuses(db, [preparing, paid[1], paid[0]]) == [
+        OrderStatus.READY, OrderStatus.PREPARING, OrderStatus.CANCELLED,
+    ]
+    # One live event for the whole batch
+    assert len(published) == 1 and len(published[0]) == 3
+
+
+def test_duplicate_order_is_rejected_whatever_its_case(client, db, seed, add_orders):
+    order_id = add_orders(1)[0]
+
+    results = batch(client, seed, (order_id, "preparing"), (str(order_id).upper(), "cancelled"))
+
+    assert results[0]["ok"] is True
+    assert results[1] == {
+        "order_id": str(order_id).upper(),
+        "ok": False,
+        "order": None,
+        "error": "Order appears more than once in the batch",
+    }
+    assert statuses(db, [order_id]) == [OrderStatus.PREPARING]
+
+
+def test_other_clubs_orders_are_not_touched(client, db, seed, add_orders, foreign_order_id):
+    order_id = add_orders(1)[0]
+
+    results = batch(client, seed, (foreign_order_id, "preparing"), (order_id, "preparing"))
+
+    assert results[0]["ok"] is False
+    assert results[0]["error"] == "Order not found or cannot transition to preparing"
+    assert results[1]["ok"] is True
+    assert statuses(db, [foreign_order_id, order_id]) == [OrderStatus.PAID, OrderStatus.PREPARING]
+
+
+def test_illegal_transition_fails_only_its_entry(client, db, seed, add_orders):
+    paid = add_orders(2)
+
+    results = batch(
+        client, seed, (paid[0], "completed"), (paid[1], "preparing"), (paid[0], "pending_payment"), ("nope", "ready"),
+    )
+
+    assert [result["ok"] for result in results] == [False, True, False, False]
+    assert results[0]["error"] == "Order not found or cannot transition to completed"
+    assert results[2]["error"] == "Order appears more than once in the batch"
+    assert results[3]["error"] == "Invalid order ID format"
+    assert statuses(db, paid) == [OrderStatus.PAID, OrderStatus.PREPARING]
+
+
+def test_target_no_bartender_can_set_is_rejected(client, db, seed, add_orders):
+    order_id = add_orders(1)[0]
+
+    results = batch(client, seed, (order_id, "pending_payment"))
+
+    assert results[0]["error"] == "Cannot transition to pending_payment"
+    assert statuses(db, [order_id]) == [OrderStatus.PAID]
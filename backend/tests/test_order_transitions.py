@@ -0,0 +1,93 @@
+"""Order status changes only move orders along the state machine, and only once."""
+import pytest
+
+import app.api.v1.endpoints.bartender as bartender_endpoints
+from app.core.order_state_machine import BARTENDER_TRANSITIONS, sources_for, transition_orders
+from app.core.qr_service import generate_qr_code
+from app.models.order import Order, OrderStatus, PaymentMethod
+
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+    monkeypatch.setattr(bartender_endpoints, "publish_order_event", lambda kind, order: events.append((kind, order)))
+    return events
+
+
+def with_qr_code(db, order_id, payment_method=PaymentMethod.CARD) -> str:
+    order = db.get(Order, order_id)
+    order.qr_code = generate_qr_code(order.id, order.club_id)
+    order.payment_method = payment_method
+    db.commit()
+    return order.qr_code
+
+
+def set_status(client, seed, order_id, target):
+    return client.put(f"/api/v1/bartender/orders/{order_id}/status", headers=seed.bartender, json={"status": target})
+
+
+def test_illegal_transition_is_rejected_with_the_current_status(client, db, seed, add_orders):
+    order_id = add_orders(1)[0]
+
+    response = set_status(client, seed, order_id, "ready")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cannot transition from paid to ready"
+    db.expire_all()
+    assert db.get(Order, order_id).status == OrderStatus.PAID
+
+
+def test_transition_of_an_unknown_order_is_404(client, seed):
+    response = set_status(client, seed, "00000000-0000-0000-0000-000000000000", "preparing")
+    assert response.status_code == 404
+
+
+def test_transition_applies_once_when_two_bartenders_race(db, seed, add_orders):
+    order_id = add_orders(1)[0]
+    # Both bartenders saw the order as paid and send the same change
+    sources = sources_for(OrderStatus.PREPARING, BARTENDER_TRANSITIONS)
+    first = transition_orders(db, OrderStatus.PREPARING, sources, Order.id == order_id)
+    second = transition_orders(db, OrderStatus.PREPARING, sources, Order.id == order_id)
+    db.commit()
+
+    assert [row.id for row in first] == [order_id]
+    assert second == []
+
+
+def test_second_scan_of_the_same_code_is_rejected(client, db, seed, add_orders, published):
+    qr_code = with_qr_code(db, add_orders(1)[0])
+
+    first = client.post("/api/v1/bartender/scan", headers=seed.bartender, json={"qr_code": qr_code})
+    second = client.post("/api/v1/bartender/scan", headers=seed.bartender, json={"qr_code": qr_code})
+
+    assert first.status_code == 200
+    assert first.json()["status"] == "preparing"
+    assert second.status_code == 400
+    assert second.json()["detail"] == "Order status is preparing, cannot be processed"
+    assert len(published) == 1
+
+
+def test_scanning_an_unpaid_cash_order_shows_it_without_moving_it(client, db, seed, add_orders, published):
+    order_id = add_orders(1, status=OrderStatus.PENDING_PAYMENT)[0]
+    qr_code = with_qr_code(db, order_id, PaymentMethod.CASH)
+
+    response = client.post("/api/v1/bartender/scan", headers=seed.bartender, json={"qr_code": qr_code})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "pending_payment"
+    assert published == []
+
+
+def test_cash_confirmation_only_applies_to_pending_cash_orders(client, db, seed, add_orders):
+    card_order = add_orders(1, status=OrderStatus.PENDING_PAYMENT)[0]
+    cash_order = add_orders(1, status=OrderStatus.PENDING_PAYMENT)[0]
+    with_qr_code(db, cash_order, PaymentMethod.CASH)
+
+    def confirm(order_id):
+        return client.post(f"/api/v1/bartender/orders/{order_id}/confirm-payment", headers=seed.bartender)
+
+    assert confirm(card_order).status_code == 400
+    assert confirm(cash_order).status_code == 200
+    second = confirm(cash_order)
+    assert second.status_code == 400
+    assert second.json()["detail"] == "Order status is paid, cannot confirm payment"
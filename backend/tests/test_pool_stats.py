@@ -0,0 +1,27 @@
+"""The sync and async engines share one connection budget."""
+import pytest
+
+from app.db.pool_stats import split_pool_budget
+
+POOL = {"pool_size": 5, "max_overflow": 2, "pool_timeout": 20, "pool_recycle": 300}
+
+
+def test_async_engine_gets_half_by_default():
+    sync_config, async_config = split_pool_budget(POOL)
+    assert (sync_config["pool_size"], sync_config["max_overflow"]) == (3, 1)
+    assert (async_config["pool_size"], async_config["max_overflow"]) == (2, 1)
+    assert async_config["pool_timeout"] == 20
+
+
+@pytest.mark.parametrize("async_pool_size, async_max_overflow", [(1, 0), (4, 2), (10, 10), (0, 0)])
+def test_split_never_exceeds_the_budget(async_pool_size, async_max_overflow):
+    sync_config, async_config = split_pool_budget(POOL, async_pool_size, async_max_overflow)
+    assert sync_config["pool_size"] + async_config["pool_size"] == POOL["pool_size"]
+    assert sync_config["max_overflow"] + async_config["max_overflow"] == POOL["max_overflow"]
+    # A pool size of 0 would mean an unlimited pool
+    assert sync_config["pool_size"] >= 1 and async_config["pool_size"] >= 1
+
+
+def test_pool_too_small_to_share_is_rejected():
+    with pytest.raises(ValueError):
+        split_pool_budget({**POOL, "pool_size": 1})
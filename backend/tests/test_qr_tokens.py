@@ -0,0 +1,77 @@
+"""Signed QR tokens are verified without the database, and only scan at their own club."""
+import base64
+import uuid
+
+import pytest
+
+from app.core.qr_service import TOKEN_BYTES, generate_qr_code, validate_qr_code, verify_qr_token
+from app.models.order import Order, OrderStatus
+
+
+def test_token_round_trip():
+    order_id, club_id = uuid.uuid4(), uuid.uuid4()
+
+    token = verify_qr_token(generate_qr_code(order_id, club_id))
+
+    assert token.order_id == order_id
+    assert token.club_id == club_id
+    assert token.issued_at > 0
+
+
+def test_tampered_signature_is_rejected():
+    raw = bytearray(base64.urlsafe_b64decode(generate_qr_code(uuid.uuid4(), uuid.uuid4()) + "=="))
+    raw[-1] ^= 1
+    tampered = base64.urlsafe_b64encode(bytes(raw)).rstrip(b"=").decode()
+
+    assert verify_qr_token(tampered) is None
+
+
+def test_tampered_payload_is_rejected():
+    raw = bytearray(base64.urlsafe_b64decode(generate_qr_code(uuid.uuid4(), uuid.uuid4()) + "=="))
+    raw[5] ^= 1  # A byte of the order id
+
+    assert verify_qr_token(base64.urlsafe_b64encode(bytes(raw)).decode()) is None
+
+
+@pytest.mark.parametrize("qr_code", [
+    "",
+    "not base64 at all!",
+    base64.urlsafe_b64encode(b"x" * (TOKEN_BYTES - 1)).decode(),
+    base64.urlsafe_b64encode(b"x" * (TOKEN_BYTES + 1)).decode(),
+    base64.urlsafe_b64encode(b"x" * TOKEN_BYTES).decode(),
+    "é" * 10,
+])
+def test_malformed_input_is_rejected(qr_code):
+    assert verify_qr_token(qr_code) is None
+
+
+def test_legacy_uuid_codes_are_still_recognised():
+    legacy = str(uuid.uuid4())
+    assert verify_qr_token(legacy) is None
+    assert validate_qr_code(legacy)
+
+
+def test_other_clubs_token_is_rejected_without_a_query(client, db, seed, add_orders, statements):
+    order_id = add_orders(1)[0]
+    client.get("/api/v1/bartender/orders", headers=seed.bartender)  # Fill the auth cache
+    foreign = generate_qr_code(order_id, uuid.uuid4())
+
+    statements.clear()
+    response = client.post("/api/v1/bartender/scan", headers=seed.bartender, json={"qr_code": foreign})
+
+    assert response.status_code == 404
+    assert statements == []
+    db.expire_all()
+    assert db.get(Order, order_id).status == OrderStatus.PAID
+
+
+def test_own_clubs_token_scans_the_order(client, db, seed, add_orders):
+    order_id = add_orders(1)[0]
+    order = db.get(Order, order_id)
+    order.qr_code = generate_qr_code(order_id, seed.club_id)
+    db.commit()
+
+    response = client.post("/api/v1/bartender/scan", headers=seed.bartender, json={"qr_code": order.qr_code})
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "preparing"
@@ -0,0 +1,94 @@
+"""Every endpoint with a declared query budget stays within it on its most expensive valid path."""
+from types import SimpleNamespace
+
+import pytest
+
+import app.api.v1.endpoints.clubs as clubs_endpoints
+import app.api.v1.endpoints.orders as orders_endpoints
+from app.core.auth_cache import auth_cache
+from app.core.config import settings
+from app.core.menu_cache import menu_cache
+from app.core.query_budget import QueryBudgetExceeded
+from app.models.bartender import Bartender
+from app.models.drink import Drink
+from app.models.drink_list import DrinkList
+from app.models.user import User, UserRole
+
+
+@pytest.fixture(autouse=True)
+def raise_mode(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_MODE", "raise")
+
+
+@pytest.fixture
+def stripe(monkeypatch):
+    def create_payment_intent(**kwargs):
+        return SimpleNamespace(id="pi_test", client_secret="pi_test_secret")
+
+    monkeypatch.setattr(orders_endpoints, "create_payment_intent", create_payment_intent)
+
+
+def cold_get(client, path, headers=None):
+    # Auth and menu cache misses are the expensive path
+    auth_cache.clear()
+    menu_cache.clear()
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_card_order_with_idempotency_key_stays_within_budget(client, seed, stripe):
+    auth_cache.clear()
+    menu_cache.clear()
+    response = client.post(
+        "/api/v1/orders",
+        headers={**seed.customer, "Idempotency-Key": "order-1"},
+        json={
+            "club_id": str(seed.club_id),
+            "payment_method": "card",
+            "items": [
+                {"drink_id": str(drink_id), "quantity": 2, "price_at_purchase": 1}
+                for drink_id in seed.drink_ids
+            ],
+        },
+    )
+    assert response.status_code == 201, response.text
+    assert response.json()["payment_intent_id"] == "pi_test_secret"
+
+
+def test_order_reads_stay_within_budget(client, seed, add_orders):
+    order_id = add_orders(3)[0]
+    cold_get(client, f"/api/v1/orders/{order_id}", seed.customer)
+    cold_get(client, "/api/v1/orders/me/history", seed.customer)
+    cold_get(client, "/api/v1/bartender/orders", seed.bartender)
+    cursor = cold_get(client, "/api/v1/bartender/orders/changes", seed.bartender).json()["cursor"]
+    cold_get(client, f"/api/v1/bartender/orders/changes?cursor={cursor}", seed.bartender)
+
+
+def test_club_reads_stay_within_budget(client, seed):
+    cold_get(client, "/api/v1/clubs")
+    cold_get(client, f"/api/v1/clubs/{seed.club_id}")
+    cold_get(client, f"/api/v1/clubs/{seed.club_id}/drinks")
+
+
+def test_drink_list_and_bartender_reads_stay_within_budget(client, db, seed):
+    drinks = db.query(Drink).all()
+    drink_lists = [DrinkList(name=f"List {i}", drinks=drinks[:3]) for i in range(4)]
+    db.add_all(drink_lists)
+    for i in range(4):
+        user = User(email=f"bartender{i}@example.com", hashed_password="x", role=UserRole.BARTENDER, full_name=f"B{i}")
+        db.add(user)
+        db.flush()
+        db.add(Bartender(user_id=user.id, club_id=seed.club_id))
+    db.commit()
+
+    lists = cold_get(client, "/api/v1/drink-lists").json()
+    assert [drink_list["drink_count"] for drink_list in lists] == [3, 3, 3, 3]
+    cold_get(client, f"/api/v1/drink-lists/{drink_lists[0].id}")
+    assert len(cold_get(client, f"/api/v1/bartenders/club/{seed.club_id}", seed.owner).json()) == 5
+
+
+def test_request_over_budget_fails_in_raise_mode(client, seed, monkeypatch):
+    monkeypatch.setattr(clubs_endpoints.list_clubs, "__query_budget__", 0)
+    with pytest.raises(QueryBudgetExceeded):
+        client.get("/api/v1/clubs")
@@ -0,0 +1,147 @@
+"""Stripe events are applied once, in the order they happened, and retried when they fail."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import app.api.v1.endpoints.payments as payments_endpoints
+import app.core.webhook_inbox as webhook_inbox
+from app.models.order import Order, OrderStatus
+from app.models.stripe_webhook_event import StripeWebhookEvent
+
+SUCCEEDED = webhook_inbox.PAYMENT_SUCCEEDED
+FAILED = webhook_inbox.PAYMENT_FAILED
+
+
+@pytest.fixture(autouse=True)
+def published(monkeypatch):
+    events = []
+    monkeypatch.setattr(webhook_inbox, "recent_event_ids", webhook_inbox.RecentEventIds(100))
+    monkeypatch.setattr(webhook_inbox, "publish_order_event", lambda kind, order: events.append((kind, order.id)))
+    return events
+
+
+@pytest.fixture
+def order_id(db, add_orders):
+    order_id = add_orders(1, status=OrderStatus.PENDING_PAYMENT)[0]
+    db.query(Order).filter(Order.id == order_id).update({Order.payment_intent_id: "pi_1"})
+    db.commit()
+    return order_id
+
+
+def stripe_event(event_id: str, event_type: str, created: int) -> dict:
+    return {"id": event_id, "type": event_type, "created": created, "data": {"object": {"id": "pi_1"}}}
+
+
+def deliver(*events) -> None:
+    for event in events:
+        webhook_inbox.store_webhook_event(event)
+
+
+def process(db) -> int:
+    return webhook_inbox.process_inbox_batch(db, batch_size=100)
+
+
+def order_state(db, order_id):
+    db.expire_all()
+    order = db.get(Order, order_id)
+    return order.status, order.qr_code
+
+
+def test_redelivered_event_is_stored_and_applied_once(client, db, order_id, published, monkeypatch):
+    monkeypatch.setattr(payments_endpoints, "handle_webhook", lambda payload, signature: None)
+    monkeypatch.setattr(payments_endpoints.webhook_inbox_worker, "wake", lambda: None)
+    event = stripe_event("evt_1", SUCCEEDED, 1)
+
+    for _ in range(2):
+        response = client.post("/api/v1/payments/webhook", json=event, headers={"stripe-signature": "t=1,v1=x"})
+        assert response.status_code == 200
+    assert webhook_inbox.recent_event_ids.hits == 1  # Dropped before touching the database
+
+    # A worker that has not seen it yet is stopped by the primary key instead
+    monkeypatch.setattr(webhook_inbox, "recent_event_ids", webhook_inbox.RecentEventIds(100))
+    assert webhook_inbox.store_webhook_event(event) is False
+    assert db.query(StripeWebhookEvent).count() == 1
+
+    assert process(db) == 1
+    assert process(db) == 0
+    assert order_state(db, order_id)[0] == OrderStatus.PAID
+    assert published == [("order.paid", str(order_id))]
+
+
+def test_late_payment_failed_does_not_undo_a_payment(db, order_id):
+    deliver(stripe_event("evt_2", FAILED, 2), stripe_event("evt_1", SUCCEEDED, 1))
+    assert process(db) == 2
+
+    status, qr_code = order_state(db, order_id)
+    assert status == OrderStatus.PAID
+    assert qr_code is not None
+
+    # Also when the failure arrives in a later batch
+    deliver(stripe_event("evt_3", FAILED, 3))
+    assert process(db) == 1
+    assert order_state(db, order_id) == (OrderStatus.PAID, qr_code)
+
+
+def test_payment_after_a_failed_attempt_is_applied(db, order_id):
+    deliver(stripe_event("evt_1", FAILED, 1))
+    process(db)
+    assert order_state(db, order_id) == (OrderStatus.CANCELLED, None)
+
+    deliver(stripe_event("evt_2", SUCCEEDED, 2))
+    process(db)
+    status, qr_code = order_state(db, order_id)
+    assert status == OrderStatus.PAID
+    assert qr_code is not None
+
+
+def test_failed_event_is_retried_with_backoff(db, order_id, monkeypatch):
+    apply_events = webhook_inbox._apply_events
+
+    def broken(db, events):
+        raise RuntimeError("database hiccup")
+
+    deliver(stripe_event("evt_1", SUCCEEDED, 1))
+    monkeypatch.setattr(webhook_inbox, "_apply_events", broken)
+    assert process(db) == 0
+
+    event = db.get(StripeWebhookEvent, "evt_1")
+    assert event.attempts == 1
+    assert event.last_error == "database hiccup"
+    assert event.processed_at is None
+    delay = event.next_attempt_at.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)
+    assert timedelta(seconds=1) < delay <= timedelta(seconds=2)
+
+    # Not due yet, then applied once it is
+    monkeypatch.setattr(webhook_inbox, "_apply_events", apply_events)
+    assert process(db) == 0
+    event.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.commit()
+    assert process(db) == 1
+    assert order_state(db, order_id)[0] == OrderStatus.PAID
+
+
+def test_one_bad_event_does_not_hold_back_its_batch(db, order_id, monkeypatch):
+    apply_events = webhook_inbox._apply_events
+
+    def fails_on_evt_bad(db, events):
+        if any(event.id == "evt_bad" for event in events):
+            raise RuntimeError("bad event")
+        return apply_events(db, events)
+
+    monkeypatch.setattr(webhook_inbox, "_apply_events", fails_on_evt_bad)
+    deliver(stripe_event("evt_bad", FAILED, 1), stripe_event("evt_1", SUCCEEDED, 2))
+
+    assert process(db) == 1
+    assert order_state(db, order_id)[0] == OrderStatus.PAID
+    assert db.get(StripeWebhookEvent, "evt_bad").attempts == 1
+
+
+def test_event_is_given_up_after_max_attempts(db, order_id, monkeypatch):
+    deliver(stripe_event("evt_1", SUCCEEDED, 1))
+    monkeypatch.setattr(webhook_inbox.settings, "WEBHOOK_MAX_ATTEMPTS", 1)
+    db.query(StripeWebhookEvent).update({StripeWebhookEvent.attempts: 1})
+    db.commit()
+
+    assert process(db) == 0
+    assert order_state(db, order_id)[0] == OrderStatus.PENDING_PAYMENT
+    assert webhook_inbox.inbox_stats(db)["failed"] == 1
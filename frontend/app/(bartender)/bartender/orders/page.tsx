@@ -1,8 +1,8 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { bartenderApi } from '@/lib/api/bartender'
-import { Order, PaymentMethod } from '@/types'
+import { Order, OrderStatus, PaymentMethod, LiveOrderEvent } from '@/types'
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card'
 import { Button } from '@/components/ui/button'
 import { Badge } from '@/components/ui/badge'
@@ -10,23 +10,107 @@ import { Loader2, CreditCard, DollarSign, CheckCircle2, ShoppingBag } from 'luci
 import { useToast } from '@/hooks/use-toast'
 import { cn } from '@/lib/utils'
 
+// Mirrors the backend bar queue: paid, preparing, ready and pending cash orders
+function isActiveOrder(order: Order) {
+  if (order.status === OrderStatus.PENDING_PAYMENT) {
+    return order.payment_method === PaymentMethod.CASH
+  }
+  return [OrderStatus.PAID, OrderStatus.PREPARING, OrderStatus.READY].includes(order.status as OrderStatus)
+}
+
 export default function BartenderOrdersPage() {
   const { toast } = useToast()
   const [orders, setOrders] = useState<Order[]>([])
   const [isLoading, setIsLoading] = useState(true)
   const [confirmingPayment, setConfirmingPayment] = useState<string | null>(null)
+  const isLive = useRef(false)
+  const feedCursor = useRef<string | null>(null)
 
   useEffect(() => {
-    loadOrders()
-    // Poll for new orders every 5 seconds
-    const interval = setInterval(loadOrders, 5000)
-    return () => clearInterval(interval)
+    let socket: WebSocket | null = null
+    let pollInterval: ReturnType<typeof setInterval> | null = null
+    let reconnectTimeout: ReturnType<typeof setTimeout> | null = null
+    let reconnectDelay = 1000
+    let closed = false
+
+    const startPolling = () => {
+      if (pollInterval) return
+      loadOrders()
+      // Fallback while the live channel is down: poll every 5 seconds
+      pollInterval = setInterval(loadOrders, 5000)
+    }
+
+    const stopPolling = () => {
+      if (pollInterval) clearInterval(pollInterval)
+      pollInterval = null
+    }
+
+    const connect = () => {
+      socket = bartenderApi.connectLiveOrders(handleLiveEvent)
+      if (!socket) {
+        startPolling()
+        return
+      }
+      socket.onopen = () => {
+        isLive.current = true
+        reconnectDelay = 1000
+        stopPolling()
+      }
+      socket.onclose = () => {
+        isLive.current = false
+        if (closed) return
+        startPolling()
+        reconnectTimeout = setTimeout(connect, reconnectDelay)
+        reconnectDelay = Math.min(reconnectDelay * 2, 30000)
+      }
+    }
+
+    connect()
+    return () => {
+      closed = true
+      stopPolling()
+      if (reconnectTimeout) clearTimeout(reconnectTimeout)
+      socket?.close()
+    }
   }, [])
 
+  const handleLiveEvent = (event: LiveOrderEvent) => {
+    if (event.type === 'snapshot') {
+      feedCursor.current = null
+      setOrders(event.orders)
+      setIsLoading(false)
+    } else if (event.type !== 'ping') {
+      const changed = event.type === 'orders.status_changed' ? event.orders : [event.order]
+      const changedIds = new Set(changed.map((order) => order.id))
+      setOrders((current) =>
+        [...current.filter((order) => !changedIds.has(order.id)), ...changed.filter(isActiveOrder)]
+          .sort((a, b) => a.created_at.localeCompare(b.created_at))
+      )
+    }
+  }
+
+  // Refresh after an action only when the live channel won't deliver the change
+  const refreshIfOffline = () => {
+    if (!isLive.current) loadOrders()
+  }
+
   const loadOrders = async () => {
     try {
-      const data = await bartenderApi.getOrders()
-      setOrders(data)
+      // Only fetch what changed since the last sync
+      const changes = await bartenderApi.getOrderChanges(feedCursor.current ?? undefined)
+      feedCursor.current = changes.cursor
+      if (changes.full) {
+        setOrders(changes.orders)
+      } else {
+        const dropped = new Set([
+          ...changes.removed.map((order) => order.id),
+          ...changes.orders.map((order) => order.id),
+        ])
+        setOrders((current) =>
+          [...current.filter((order) => !dropped.has(order.id)), ...changes.orders]
+            .sort((a, b) => a.created_at.localeCompare(b.created_at))
+        )
+      }
     } catch (error: any) {
       toast({
         variant: 'destructive',
@@ -46,7 +130,7 @@ export default function BartenderOrdersPage() {
         title: 'Payment confirmed',
         description: 'Order marked as paid',
       })
-      loadOrders()
+      refreshIfOffline()
     } catch (error: any) {
       toast({
         variant: 'destructive',
@@ -64,7 +148,7 @@ export default function BartenderOrdersPage() {
       toast({
         title: 'Status updated',
       })
-      loadOrders()
+      refreshIfOffline()
     } catch (error: any) {
       toast({
         variant: 'destructive',
@@ -1,6 +1,6 @@
 'use client'
 
-import { useState, useEffect, useMemo, useCallback } from 'react'
+import { useState, useEffect, useMemo, useCallback, useRef } from 'react'
 import { useParams, useRouter } from 'next/navigation'
 import { clubsApi } from '@/lib/api/clubs'
 import { drinksApi, Drink } from '@/lib/api/drinks'
@@ -40,6 +40,8 @@ export default function ClubDrinksPage() {
   const [paymentMethod, setPaymentMethod] = useState<PaymentMethod>(PaymentMethod.CARD)
   const [isCreatingOrder, setIsCreatingOrder] = useState(false)
   const [createdOrder, setCreatedOrder] = useState<Order | null>(null)
+  // One key per checkout attempt - retries of the same cart reuse it
+  const orderIdempotencyKey = useRef<string | null>(null)
   const { toast } = useToast()
 
   const loadData = useCallback(async () => {
@@ -106,9 +108,18 @@ export default function ClubDrinksPage() {
       .filter(Boolean) as Array<{ drink: Drink; quantity: number }>
   }, [cart, drinks])
 
+  // A changed cart or payment method is a new order, not a retry
+  useEffect(() => {
+    orderIdempotencyKey.current = null
+  }, [cart, paymentMethod])
+
   const handleCheckout = async () => {
     if (cartItems.length === 0) return
 
+    if (!orderIdempotencyKey.current) {
+      orderIdempotencyKey.current = crypto.randomUUID()
+    }
+
     setIsCreatingOrder(true)
     try {
       const order = await ordersApi.createOrder({
@@ -119,7 +130,7 @@ export default function ClubDrinksPage() {
           quantity,
           price_at_purchase: drink.price,
         })),
-      })
+      }, orderIdempotencyKey.current)
 
       setCreatedOrder(order)
       setCart(new Map())
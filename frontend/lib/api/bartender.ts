@@ -1,5 +1,13 @@
-import { apiClient } from './client'
-import { Order } from '@/types'
+import { apiClient, API_BASE_URL } from './client'
+import {
+  Order,
+  OrderFeedChanges,
+  LiveOrderEvent,
+  OrderStatusBatchResult,
+  OfflineSnapshot,
+  OfflineOperation,
+  OfflineSyncResponse,
+} from '@/types'
 
 export const bartenderApi = {
   /**
@@ -11,6 +19,15 @@ export const bartenderApi = {
     return response.data
   },
 
+  /**
+   * Get orders created or changed since the cursor (whole queue without one)
+   */
+  getOrderChanges: async (cursor?: string): Promise<OrderFeedChanges> => {
+    const params = cursor ? { cursor } : {}
+    const response = await apiClient.get<OrderFeedChanges>('/bartender/orders/changes', { params })
+    return response.data
+  },
+
   /**
    * Scan QR code
    */
@@ -34,5 +51,62 @@ export const bartenderApi = {
     const response = await apiClient.put<Order>(`/bartender/orders/${orderId}/status`, { status })
     return response.data
   },
-}
 
+  /**
+   * Update several orders in one request (e.g. a whole tray to ready).
+   * Results come back in request order; failed entries carry an error.
+   */
+  updateOrderStatusBatch: async (
+    updates: Array<{ order_id: string; status: string }>
+  ): Promise<OrderStatusBatchResult[]> => {
+    const response = await apiClient.post<{ results: OrderStatusBatchResult[] }>(
+      '/bartender/orders/status:batch',
+      { updates }
+    )
+    return response.data.results
+  },
+
+  /**
+   * Get a signed snapshot of the club's active orders for scanning offline
+   */
+  getOfflineSnapshot: async (): Promise<OfflineSnapshot> => {
+    const response = await apiClient.get<OfflineSnapshot>('/bartender/orders/offline-snapshot')
+    return response.data
+  },
+
+  /**
+   * Send scans and status changes recorded offline, against the snapshot they were made with.
+   * Results come back in request order.
+   */
+  syncOfflineOperations: async (
+    snapshot: OfflineSnapshot,
+    operations: OfflineOperation[]
+  ): Promise<OfflineSyncResponse> => {
+    const response = await apiClient.post<OfflineSyncResponse>('/bartender/orders/sync', {
+      snapshot_generated_at: snapshot.generated_at,
+      snapshot_signature: snapshot.signature,
+      operations,
+    })
+    return response.data
+  },
+
+  /**
+   * Open the live order channel for the bartender's club.
+   * The server sends a snapshot on connect, then one event per changed order.
+   */
+  connectLiveOrders: (onEvent: (event: LiveOrderEvent) => void): WebSocket | null => {
+    const token = typeof window !== 'undefined' ? localStorage.getItem('auth_token') : null
+    if (!token) return null
+
+    const wsUrl = API_BASE_URL.replace(/^http/, 'ws')
+    const socket = new WebSocket(`${wsUrl}/bartender/orders/live?token=${encodeURIComponent(token)}`)
+    socket.onmessage = (message) => {
+      try {
+        onEvent(JSON.parse(message.data) as LiveOrderEvent)
+      } catch {
+        // Ignore malformed frames
+      }
+    }
+    return socket
+  },
+}
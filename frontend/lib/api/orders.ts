@@ -4,9 +4,12 @@ import { Order, OrderCreate, OrderStatusUpdate } from '@/types'
 export const ordersApi = {
   /**
    * Create new order (customer)
+   * Reuse the same idempotencyKey when retrying so the order is only created once
    */
-  createOrder: async (data: OrderCreate): Promise<Order> => {
-    const response = await apiClient.post<Order>('/orders', data)
+  createOrder: async (data: OrderCreate, idempotencyKey?: string): Promise<Order> => {
+    const response = await apiClient.post<Order>('/orders', data, {
+      headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : undefined,
+    })
     return response.data
   },
 
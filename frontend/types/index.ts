@@ -214,6 +214,65 @@ export interface OrderStatusUpdate {
   status: OrderStatus
 }
 
+export interface OrderFeedChanges {
+  orders: Order[]
+  removed: Array<{ id: string; status: OrderStatus | string }>
+  cursor: string
+  full: boolean
+}
+
+export interface OrderStatusBatchResult {
+  order_id: string
+  ok: boolean
+  order?: Order
+  error?: string
+}
+
+export interface OfflineOrder {
+  code_hash?: string // First 16 hex chars of SHA-256(qr_code)
+  order_id: string
+  status: OrderStatus
+  payment_method: PaymentMethod
+  total_amount: number
+  items: Array<{ drink_name?: string; quantity: number }>
+}
+
+export interface OfflineSnapshot {
+  club_id: string
+  generated_at: number
+  expires_at: number
+  signature: string
+  orders: OfflineOrder[] // Sorted by code_hash
+}
+
+export interface OfflineOperation {
+  op_id: string
+  kind: 'scan' | 'status' | 'confirm_payment'
+  qr_code?: string
+  order_id?: string
+  status?: OrderStatus
+  performed_at: string
+}
+
+export interface OfflineOperationResult {
+  op_id: string
+  outcome: 'applied' | 'unchanged' | 'conflict' | 'rejected'
+  order_id?: string
+  status?: OrderStatus
+  error?: string
+}
+
+export interface OfflineSyncResponse {
+  results: OfflineOperationResult[]
+  orders: Order[]
+}
+
+export type LiveOrderEvent =
+  | { type: 'snapshot'; orders: Order[] }
+  | { type: 'order.created' | 'order.paid' | 'order.status_changed'; order: Order }
+  | { type: 'orders.status_changed'; orders: Order[] }
+  | { type: 'ping' }
+
 // Bartender types
 export interface Bartender {
   id: string